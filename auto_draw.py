@@ -16,9 +16,12 @@ AutoDraw - برنامج الرسم التلقائي
 - pillow>=8.0.0 (معالجة الصور)
 - pyautogui>=0.9.52 (التحكم في الماوس والكيبورد)
 - numpy>=1.19.0 (معالجة المصفوفات)
-- keyboard>=0.13.5 (التقاط مفتاح ESC)
+- keyboard>=0.13.5 (التقاط مفتاح ESC خارج Windows، حيث تُقرأ حالة المفتاح مباشرة)
 - opencv-python>=4.5.0 (اختياري - لتحسين معالجة الصور)
 - win32gui (اختياري - للتعامل مع النوافذ في Windows)
+- orjson (اختياري - لحفظ الإعدادات بسرعة أكبر)
+- numba (اختياري - لتسريع حسابات الألوان؛ أو شغّل compile_kernels.py مرة لترجمة النوى مسبقًا)
+- scipy (اختياري - لمطابقة الألوان بسرعة مع اللوحات الكبيرة)
 """
 
 # تأكد من استيراد المكتبات الأساسية أولاً
@@ -27,17 +30,74 @@ import sys
 import time
 import json
 import argparse
+import atexit
+import collections
+import ctypes
+import functools
+import hashlib
 import logging
+import logging.handlers
+import math
+import queue
+import stat
 import threading
 import traceback
+import types
 from datetime import datetime
 from io import BytesIO
 from urllib.parse import urlparse
 
+from auto_draw_common import (LazyModule, check_pillow_simd, configure_pyautogui, esc_pressed, keyboard,
+                              load_aot_kernel, parse_color_positions, pillow_simd)
+
+# Directory containing this script (settings, logs and icon live next to it)
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Marker file whose mtime records the last old-log scan
+LOG_SCAN_MARKER = ".autodraw_logscan"
+LOG_SCAN_INTERVAL = 24 * 60 * 60  # Re-scan at most once a day
+
+def _cleanup_old_logs(log_dir):
+    """Remove per-run log files older than 7 days"""
+    log = logging.getLogger()
+    marker = os.path.join(log_dir, LOG_SCAN_MARKER)
+    
+    # A single stat on the marker replaces the directory walk on warm runs;
+    # logs expire on a 7-day scale so a daily scan is frequent enough
+    try:
+        if time.time() - os.stat(marker).st_mtime < LOG_SCAN_INTERVAL:
+            return
+    except OSError:
+        pass  # No marker yet - scan now
+    
+    try:
+        for f in os.listdir(log_dir):
+            if f.startswith("autodraw_") and f.endswith(".log"):
+                file_path = os.path.join(log_dir, f)
+                file_time = os.path.getmtime(file_path)
+                if (time.time() - file_time) > 7 * 24 * 60 * 60:  # 7 days
+                    try:
+                        os.remove(file_path)
+                        log.debug("Removed old log file: %s", f)
+                    except OSError:
+                        pass
+        
+        # Record the scan time in the marker's mtime
+        with open(marker, 'a'):
+            pass
+        os.utime(marker, None)
+    except Exception as e:
+        log.warning(f"Error cleaning old log files: {e}")
+
 # Setup logging
 def setup_logging():
     """Configure application-wide logging with proper formatting and file output"""
-    log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+    # None of our formats use process/thread info, so don't collect it per record
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    
+    log_dir = os.path.join(_HERE, "logs")
     
     # Ensure log directory exists
     if not os.path.exists(log_dir):
@@ -45,7 +105,7 @@ def setup_logging():
             os.makedirs(log_dir)
         except Exception:
             # Fall back to current directory if we can't create the logs dir
-            log_dir = os.path.dirname(os.path.abspath(__file__))
+            log_dir = _HERE
     
     # Create timestamped log filename
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -55,53 +115,31 @@ def setup_logging():
     logger = logging.getLogger()
     logger.setLevel(logging.DEBUG)
     
-    # File handler for debug logs - enhanced to log everything
+    # File handler for debug logs - enhanced to log everything. This per-run
+    # file is the only log file: old ones are removed after 7 days by
+    # _cleanup_old_logs, so a rotating copy would just write every record twice
     file_handler = logging.FileHandler(log_file, encoding='utf-8')
     file_handler.setLevel(logging.DEBUG)
     detailed_format = logging.Formatter('%(asctime)s [%(levelname)s] %(name)s (%(filename)s:%(lineno)d): %(message)s')
     file_handler.setFormatter(detailed_format)
     
-    # Add rotating file handler to manage log file size
-    try:
-        from logging.handlers import RotatingFileHandler
-        # Keep backup logs up to 5MB each, 5 backups max
-        rotating_handler = RotatingFileHandler(
-            os.path.join(log_dir, "autodraw.log"),
-            maxBytes=5*1024*1024,  # 5MB
-            backupCount=5,
-            encoding='utf-8'
-        )
-        rotating_handler.setLevel(logging.DEBUG)
-        rotating_handler.setFormatter(detailed_format)
-        logger.addHandler(rotating_handler)
-        
-        # Also clean up old log files (older than 7 days)
-        try:
-            for f in os.listdir(log_dir):
-                if f.startswith("autodraw_") and f.endswith(".log"):
-                    file_path = os.path.join(log_dir, f)
-                    file_time = os.path.getmtime(file_path)
-                    if (time.time() - file_time) > 7 * 24 * 60 * 60:  # 7 days
-                        try:
-                            os.remove(file_path)
-                            print(f"Removed old log file: {f}")
-                        except:
-                            pass
-        except Exception as e:
-            print(f"Error cleaning old log files: {e}")
-    except ImportError:
-        # If RotatingFileHandler is not available (unlikely), continue with regular handler
-        pass
-    
     # Console handler for info+ logs
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_format = logging.Formatter('%(levelname)s: %(message)s')
     console_handler.setFormatter(console_format)
     
-    # Add handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Route all records through a queue. The caller's thread still merges
+    # msg % args (QueueHandler.prepare) before enqueuing; the sinks' own
+    # formatters and the file/console I/O run on the listener thread
+    log_queue = queue.Queue(-1)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler,
+        respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
     
     # Log system information
     logger.info(f"AutoDraw started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -109,33 +147,42 @@ def setup_logging():
     logger.info(f"Operating system: {sys.platform}")
     logger.info(f"Log file: {log_file}")
     
+    # Clean up old log files in the background so startup isn't blocked on disk I/O
+    threading.Thread(target=_cleanup_old_logs, args=(log_dir,), daemon=True).start()
+    
     return logger
 
 # Initialize logger at module level
 logger = setup_logging()
 logger.info(f"Starting AutoDraw application")
 
+# error_handler also logs every call with its arguments when AUTODRAW_DEBUG
+# is set. The root logger is always at DEBUG for the log files, so its level
+# can't serve as the switch, and repr() of images and arrays is too costly
+# to pay on every call
+DEBUG_CALLS = bool(os.environ.get("AUTODRAW_DEBUG"))
+
 # Error handling decorator
 def error_handler(func):
     """Decorator for catching and logging exceptions in methods"""
     def wrapper(*args, **kwargs):
         try:
-            # Log function calls with parameters when in debug mode
-            if args and hasattr(args[0], '__class__'):
-                class_name = args[0].__class__.__name__
-            else:
-                class_name = func.__module__
-                
-            arg_str = ', '.join([str(a) for a in args[1:]])
-            kwarg_str = ', '.join([f"{k}={v}" for k, v in kwargs.items()])
-            params = ', '.join(filter(None, [arg_str, kwarg_str]))
-            logger.debug(f"Calling {class_name}.{func.__name__}({params})")
+            # Log function calls with parameters when in debug mode; the
+            # guard keeps us from stringifying images/arrays on every call
+            debug = DEBUG_CALLS
+            if debug:
+                if args and hasattr(args[0], '__class__'):
+                    class_name = args[0].__class__.__name__
+                else:
+                    class_name = func.__module__
+                logger.debug("Calling %s.%s(%r, %r)", class_name, func.__name__, args[1:], kwargs)
             
             # Execute the function
             result = func(*args, **kwargs)
             
             # Log completion
-            logger.debug(f"Completed {class_name}.{func.__name__}")
+            if debug:
+                logger.debug("Completed %s.%s", class_name, func.__name__)
             return result
             
         except Exception as e:
@@ -147,9 +194,10 @@ def error_handler(func):
                 
             # Log detailed error information
             logger.error(f"Error in {class_name}.{func.__name__}: {str(e)}")
-            logger.debug(f"Exception type: {type(e).__name__}")
-            logger.debug(f"Function arguments: {args[1:]} {kwargs}")
-            logger.debug(f"Traceback: {traceback.format_exc()}")
+            logger.debug("Exception type: %s", type(e).__name__)
+            if DEBUG_CALLS:
+                logger.debug("Function arguments: %r %r", args[1:], kwargs)
+            logger.debug("Traceback: %s", traceback.format_exc())
             
             # Show error to user if it's a UI function
             if 'GUI' in class_name:
@@ -167,49 +215,446 @@ def error_handler(func):
             return None
     return wrapper
 
-# Import required packages with error handling
-try:
-    import requests
-    import tkinter as tk
-    from tkinter import filedialog, ttk, messagebox, simpledialog
-    from PIL import Image, ImageTk, ImageOps, ImageFilter, ImageEnhance
-    import numpy as np
-    import pyautogui
-    import keyboard  # Added for Esc key detection
-    import re
-    import webbrowser
-    
-    # Disable PyAutoGUI failsafe
-    pyautogui.FAILSAFE = False
-    
-    # Optional imports with fallbacks
+# Screen size, looked up once when PyAutoGUI is first imported
+SCREEN_SIZE = None
+
+def _configure_pyautogui(module):
+    """Apply global PyAutoGUI tuning as soon as it is imported"""
+    global SCREEN_SIZE
+    configure_pyautogui(module)
+    
+    # Pre-warm the platform screen-size query
     try:
-        import cv2
-    except ImportError:
-        logger.warning("OpenCV (cv2) not found. Some image processing features may be limited.")
-        cv2 = None
-        
+        SCREEN_SIZE = tuple(module.size())
+    except Exception as e:
+        logger.warning(f"Could not query screen size: {e}")
+
+# Clicks submitted per SendInput call when drawing at full speed
+CLICK_BATCH_SIZE = 64
+
+# Shortest sleep worth requesting while pacing clicks (seconds)
+SLEEP_GRANULARITY = 0.001
+
+# Color groups whose drawing paths are ordered ahead of the one being drawn
+PATH_PREFETCH = 8
+
+# Direct Win32 cursor access - microseconds per call instead of PyAutoGUI's
+# per-call bookkeeping; other platforms fall back to PyAutoGUI
+if sys.platform == 'win32':
+    from auto_draw_common import (MOUSEEVENTF_ABSOLUTE, MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP,
+                                  MOUSEEVENTF_MOVE, mouse_input_buffer, send_inputs, user32 as _user32)
+    
+    class _POINT(ctypes.Structure):
+        _fields_ = [("x", ctypes.c_long), ("y", ctypes.c_long)]
+    
+    def get_cursor_pos():
+        """Return the current mouse position as (x, y)"""
+        point = _POINT()
+        _user32.GetCursorPos(ctypes.byref(point))
+        return point.x, point.y
+    
+    def set_cursor_pos(x, y):
+        """Move the mouse to (x, y) instantly"""
+        _user32.SetCursorPos(int(x), int(y))
+    
+    _MOVE_FLAGS = MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_MOVE
+    _CLICK_FLAGS = _MOVE_FLAGS | MOUSEEVENTF_LEFTDOWN | MOUSEEVENTF_LEFTUP
+    
+    _click_buffer = mouse_input_buffer(CLICK_BATCH_SIZE, _CLICK_FLAGS)
+    _move_buffer = mouse_input_buffer(CLICK_BATCH_SIZE, _MOVE_FLAGS)
+    
+    def _send_mouse_batch(points, buffer):
+        """Send one event from buffer per (x, y) in points, CLICK_BATCH_SIZE per SendInput call"""
+        width, height = get_screen_size()
+        # Absolute coordinates are normalized to 0..65535 across the primary screen
+        scale = np.array([65535.0 / max(width - 1, 1), 65535.0 / max(height - 1, 1)], dtype=np.float32)
+        targets = np.rint(np.asarray(points, dtype=np.float32) * scale).astype(np.int32).tolist()
+        
+        for start in range(0, len(targets), CLICK_BATCH_SIZE):
+            batch = targets[start:start + CLICK_BATCH_SIZE]
+            for event, (dx, dy) in zip(buffer, batch):
+                event.mi.dx = dx
+                event.mi.dy = dy
+            send_inputs(buffer, len(batch))
+    
+    def click_points(points):
+        """Click each (x, y) in points - up to CLICK_BATCH_SIZE clicks per SendInput call"""
+        _send_mouse_batch(points, _click_buffer)
+    
+    def move_points(points):
+        """Move the mouse through each (x, y) in points - a stroke while the button is down"""
+        _send_mouse_batch(points, _move_buffer)
+else:
+    def get_cursor_pos():
+        """Return the current mouse position as (x, y)"""
+        x, y = pyautogui.position()
+        return x, y
+    
+    def set_cursor_pos(x, y):
+        """Move the mouse to (x, y) instantly"""
+        pyautogui.moveTo(x, y, _pause=False)
+    
+    def click_points(points):
+        """Click each (x, y) in points"""
+        for x, y in np.asarray(points).tolist():
+            pyautogui.click(x, y, _pause=False)
+    
+    def move_points(points):
+        """Move the mouse through each (x, y) in points - a stroke while the button is down"""
+        for x, y in np.asarray(points).tolist():
+            pyautogui.moveTo(x, y, _pause=False)
+
+def get_screen_size():
+    """Return the cached (width, height) of the primary screen"""
+    global SCREEN_SIZE
+    if SCREEN_SIZE is None:
+        SCREEN_SIZE = tuple(pyautogui.size())
+    return SCREEN_SIZE
+
+
+# Lazily imported packages - resolved on first attribute access
+requests = LazyModule("requests")
+tk = LazyModule("tkinter")
+filedialog = LazyModule("tkinter.filedialog")
+ttk = LazyModule("tkinter.ttk")
+messagebox = LazyModule("tkinter.messagebox")
+simpledialog = LazyModule("tkinter.simpledialog")
+tkfont = LazyModule("tkinter.font")
+Image = LazyModule("PIL.Image", on_load=check_pillow_simd)
+ImageTk = LazyModule("PIL.ImageTk")
+ImageOps = LazyModule("PIL.ImageOps")
+ImageFilter = LazyModule("PIL.ImageFilter")
+ImageEnhance = LazyModule("PIL.ImageEnhance")
+np = LazyModule("numpy")
+pyautogui = LazyModule("pyautogui", on_load=_configure_pyautogui)
+
+# Optional imports with fallbacks
+cv2 = LazyModule(
+    "cv2", required=False,
+    warning="OpenCV (cv2) not found. Some image processing features may be limited."
+)
+
+# Loop range for parallel kernels; swapped for numba.prange once Numba is imported
+prange = range
+
+def _configure_numba(module):
+    """Let @jit(parallel=True) kernels pick up Numba's parallel range"""
+    global prange
+    prange = module.prange
+
+scipy_spatial = LazyModule(
+    "scipy.spatial", required=False,
+    warning="SciPy not found. Large palettes will be matched with a linear scan."
+)
+numba = LazyModule(
+    "numba", required=False,
+    warning="Numba not found. Color matching will run without JIT compilation.",
+    on_load=_configure_numba
+)
+
+# orjson is an optional, much faster JSON serializer for settings files
+orjson = LazyModule(
+    "orjson", required=False,
+    warning="orjson not found. Settings will be saved with the standard json module."
+)
+
+# Type checking for imports
+if sys.platform == 'win32':
     try:
         import win32gui  # pylint: disable=unused-import
     except ImportError:
-        logger.warning("win32gui not found. Window handling features may be limited.")
+        logger.warning("win32gui module import failed. Some Windows-specific features will be unavailable.")
         win32gui = None
-        
-    # Type checking for imports
-    if sys.platform == 'win32':
-        try:
-            import win32gui  # pylint: disable=unused-import,reimported
-        except ImportError:
-            logger.warning("win32gui module import failed. Some Windows-specific features will be unavailable.")
-            win32gui = None
+else:
+    win32gui = None  # Non-Windows platforms
+
+# PIL <-> NumPy interop helpers
+def pil_to_np(img):
+    """Return a NumPy view of a PIL image via its array interface
+    
+    Unlike np.array this skips the extra full-image copy. The result may be
+    read-only, so callers must not modify it in place - copy it first if needed.
+    """
+    return np.asarray(img)
+
+def np_to_pil(arr):
+    """Wrap a NumPy array as a PIL image
+    
+    Contiguous uint8 L and RGBA arrays are mapped without a copy (the image
+    keeps the array alive); RGB and other layouts are copied by Pillow.
+    """
+    return Image.fromarray(arr)
+
+def resize_image(img, size, resample=None, reducing_gap=None):
+    """Resize img to size, with OpenCV's SIMD resampler when it is available
+    
+    OpenCV handles RGB and L images: INTER_AREA when shrinking, otherwise
+    INTER_LANCZOS4 or INTER_LINEAR to match resample (LANCZOS by default).
+    RGBA stays with Pillow, which premultiplies alpha so transparent
+    pixels don't bleed into the edges, as does everything without cv2 or
+    with Pillow-SIMD, whose own resampler is already vectorised.
+    """
+    if resample is None:
+        resample = Image.LANCZOS
+    if cv2 and not pillow_simd() and img.mode in ("RGB", "L"):
+        if size[0] <= img.width and size[1] <= img.height:
+            interpolation = cv2.INTER_AREA
+        elif resample == Image.LANCZOS:
+            interpolation = cv2.INTER_LANCZOS4
+        else:
+            interpolation = cv2.INTER_LINEAR
+        return np_to_pil(cv2.resize(pil_to_np(img), size, interpolation=interpolation))
+    return img.resize(size, resample, reducing_gap=reducing_gap)
+
+def jit(**options):
+    """Compile a function with numba.njit on its first call, when Numba is installed
+    
+    Compilation is deferred so importing this module never pays for
+    importing Numba; without it, the plain Python function is used.
+    """
+    def decorate(func):
+        compiled = []
+        
+        @functools.wraps(func)
+        def wrapper(*args):
+            if not compiled:
+                compiled.append(numba.njit(**options)(func) if numba else func)
+            return compiled[0](*args)
+        
+        wrapper.py_func = func
+        return wrapper
+    return decorate
+
+@functools.lru_cache(maxsize=None)
+def aot_kernel(name):
+    """Return the @jit kernel name precompiled by compile_kernels.py, or None
+    
+    None too when the build is out of date with the kernel's source here.
+    The extension needs neither Numba nor a JIT compile at run time.
+    """
+    return load_aot_kernel(name, globals()[name].py_func)
+
+def write_json_atomic(path, data):
+    """Write data as indented JSON, replacing path atomically
+    
+    The file is written to a temporary sibling and moved into place, so a
+    crash mid-write can never leave a truncated settings file behind.
+    """
+    if orjson:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
     else:
-        win32gui = None  # Non-Windows platforms
-        
-except ImportError as e:
-    logger.critical(f"Failed to import required module: {e}")
-    print(f"Error: Missing required dependency - {e}")
-    print("Please install required packages using: pip install -r requirements.txt")
-    sys.exit(1)
+        payload = json.dumps(data, indent=2).encode('utf-8')
+    
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+# Longer side of the downsized source copy reused by previews and by
+# processing at resolutions that fit in it
+WORKING_IMAGE_SIZE = 2048
+
+# A decoded image and what is known about its source (see AutoDraw.open_image)
+LoadedImage = collections.namedtuple(
+    "LoadedImage", ["image", "image_path", "image_filename", "image_stat", "source_size"]
+)
+
+# Downsized working copies of local images (see AutoDraw.get_working_image),
+# kept between runs; the least recently used are evicted past the limit
+IMAGE_CACHE_DIR = os.path.join(_HERE, "cache")
+IMAGE_CACHE_MAX_ENTRIES = 32
+
+def image_cache_path(image_path, image_stat, decoded_size):
+    """Return the cache file for the working copy of image_path
+    
+    The key covers the file's identity and modification time (from
+    image_stat, its os.stat result when loaded), the size it was decoded at
+    (JPEG drafts decode smaller) and WORKING_IMAGE_SIZE.
+    """
+    key = f"{os.path.abspath(image_path)}|{image_stat.st_mtime_ns}|{image_stat.st_size}|{decoded_size}|{WORKING_IMAGE_SIZE}"
+    return os.path.join(IMAGE_CACHE_DIR, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".png")
+
+def make_working_image(image, image_path=None, image_stat=None):
+    """Return image capped at WORKING_IMAGE_SIZE on its longer side
+    
+    Local files (image_path and their image_stat given) keep the copy on
+    disk, so reopening one skips decoding and resampling the full source.
+    """
+    width, height = image.size
+    if max(width, height) <= WORKING_IMAGE_SIZE:
+        return image
+    cache_path = image_cache_path(image_path, image_stat, image.size) if image_path and image_stat else None
+    working = load_cached_image(cache_path) if cache_path else None
+    if working is None:
+        scale = WORKING_IMAGE_SIZE / max(width, height)
+        working = image.resize((max(1, round(width * scale)), max(1, round(height * scale))),
+                               Image.LANCZOS, reducing_gap=3.0)
+        if cache_path:
+            save_cached_image(cache_path, working)
+    return working
+
+def load_cached_image(cache_path):
+    """Load a cached image, or return None if there is no usable entry"""
+    try:
+        image = Image.open(cache_path)
+        image.load()
+        os.utime(cache_path, None)  # Mark as recently used for eviction
+        return image
+    except (OSError, ValueError):
+        return None
+
+def save_cached_image(cache_path, image):
+    """Store image in the cache, evicting the least recently used entries"""
+    try:
+        os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        # Fast compression - the cache trades disk space for load time
+        image.save(tmp_path, "PNG", compress_level=1)
+        os.replace(tmp_path, cache_path)
+        _evict_cache_entries(".png")
+    except OSError as e:
+        logger.warning(f"Could not cache image: {e}")
+
+def _evict_cache_entries(suffix):
+    """Remove the least recently used cache files ending in suffix past the limit"""
+    entries = [entry for entry in os.scandir(IMAGE_CACHE_DIR) if entry.name.endswith(suffix)]
+    if len(entries) > IMAGE_CACHE_MAX_ENTRIES:
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - IMAGE_CACHE_MAX_ENTRIES]:
+            os.remove(entry.path)
+
+# Bump when process_image changes its output, so older cached results are ignored
+PROCESSED_CACHE_VERSION = 2
+
+def processed_cache_path(auto_draw):
+    """Return the cache file for auto_draw's processed image, or None
+    
+    The key covers the source file (path, modification time, size), every
+    setting process_image reads, the palette colors and which optional
+    modules shaped the result. Images loaded from URLs are not cached.
+    """
+    image_stat = auto_draw.image_stat
+    if not auto_draw.image_path or image_stat is None:
+        return None
+    key = (f"{auto_draw.image_path}|{image_stat.st_mtime_ns}|{image_stat.st_size}|{auto_draw.style}|"
+           f"{auto_draw.resolution}|{auto_draw.skip_white}|{auto_draw.palette}|"
+           f"{bool(cv2)}|{pillow_simd()}|{PROCESSED_CACHE_VERSION}")
+    return os.path.join(IMAGE_CACHE_DIR, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".npz")
+
+def load_processed_cache(cache_path):
+    """Return the cached (pixels, palette index map or None), or None if there is no usable entry"""
+    try:
+        with np.load(cache_path) as data:
+            pixels = data["pixels"]
+            index_map = data["index_map"] if "index_map" in data.files else None
+        os.utime(cache_path, None)  # Mark as recently used for eviction
+        return pixels, index_map
+    except (OSError, ValueError, KeyError):
+        return None
+
+def save_processed_cache(cache_path, image, index_map):
+    """Store a processed image and its palette index map, evicting the least recently used entries"""
+    try:
+        os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+        arrays = {"pixels": pil_to_np(image)}
+        if index_map is not None:
+            arrays["index_map"] = index_map
+        # The temporary name keeps the .npz suffix so np.savez doesn't append one
+        tmp_path = cache_path + ".tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, cache_path)
+        _evict_cache_entries(".npz")
+    except OSError as e:
+        logger.warning(f"Could not cache processed image: {e}")
+
+# Browser-like headers - some image hosts reject the default requests agent
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.google.com/'
+}
+
+# Fonts used by the GUI: name -> (family, size[, weight]). AutoDrawGUI
+# creates one named tkinter Font per entry, shared by all widgets and styles
+GUI_FONTS = {
+    "ui9": ("Segoe UI", 9),
+    "ui10": ("Segoe UI", 10),
+    "ui11": ("Segoe UI", 11),
+    "ui11_bold": ("Segoe UI", 11, "bold"),
+    "ui12_bold": ("Segoe UI", 12, "bold"),
+    "arial9": ("Arial", 9),
+    "arial10": ("Arial", 10),
+    "arial12": ("Arial", 12),
+    "arial12_bold": ("Arial", 12, "bold")
+}
+
+# Built-in choices of the target application and drawing strategy dropdowns
+TARGET_APP_VALUES = ("mspaint", "gartic")
+DRAWING_STRATEGIES = ("optimized", "line-by-line", "color-by-color")
+
+# Keyboard shortcuts listed by Help > Keyboard Shortcuts
+SHORTCUTS = (
+    ("Ctrl+O", "Open image file"),
+    ("Ctrl+S", "Save settings"),
+    ("F5", "Start drawing"),
+    ("F6", "Set drawing area"),
+    ("F7", "Set color positions"),
+    ("Ctrl+T", "Toggle theme"),
+    ("Esc", "Stop drawing (while drawing)")
+)
+SHORTCUTS_TEXT = "\n".join(f"{key:<10} : {desc}" for key, desc in SHORTCUTS)
+
+# File dialog filters for opening images and palettes
+IMAGE_FILETYPES = (
+    ("Image files", "*.jpg *.jpeg *.png *.bmp *.gif *.tiff *.svg"),
+    ("All files", "*.*")
+)
+PALETTE_FILETYPES = (
+    ("JSON files", "*.json"),
+    ("CSV files", "*.csv"),
+    ("All files", "*.*")
+)
+
+# Number of entries kept in the File > Recent Files menu
+MAX_RECENT_FILES = 10
+
+# Trailing delay before the preview is repainted after a window resize
+PREVIEW_RESIZE_DELAY_MS = 50
+
+# Longest wait for the main window to unmap before an on-screen selection
+ICONIFY_TIMEOUT = 0.5
+
+# Seconds counted down in the status bar before drawing starts
+DRAW_COUNTDOWN_SECONDS = 3
+
+# Preview resizes box-reduce the source down to this many times the preview
+# size before the final resampling pass (the value Image.thumbnail uses)
+PREVIEW_REDUCING_GAP = 2.0
+
+# URL schemes treated as remote image sources
+URL_SCHEMES = ('http://', 'https://')
+
+# URL path extensions trusted as images without checking Content-Type
+IMAGE_URL_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp'})
+
+@functools.lru_cache(maxsize=None)
+def get_http_session():
+    """Return the shared requests session used for image downloads
+    
+    Created on first use so requests stays lazily imported. Pooled
+    connections let repeated downloads from a host skip the TCP/TLS handshake.
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    session.headers.update(HTTP_HEADERS)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4,
+                          max_retries=Retry(total=2, backoff_factor=0.3))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
 
 # Application version information
 VERSION = "1.0.1"
@@ -255,12 +700,19 @@ DARK_THEME = {
     "hover": "#343a40"
 }
 
+# Freeze the themes like the translations below: apply_theme uses them
+# directly instead of copying a dict per toggle
+LIGHT_THEME = types.MappingProxyType(LIGHT_THEME)
+DARK_THEME = types.MappingProxyType(DARK_THEME)
+
 # Available languages
 LANGUAGES = {
     "en": "English",
     "ar": "العربية",
     "es": "Español"
 }
+LANGUAGES = types.MappingProxyType(LANGUAGES)
+_LANGUAGE_ITEMS = tuple(LANGUAGES.items())  # (code, name) pairs for the language menu
 
 # Translations
 TRANSLATIONS = {
@@ -428,12 +880,89 @@ TRANSLATIONS = {
     }
 }
 
+# Freeze each language table into a read-only view so the shared dicts
+# can't be mutated by accident from a GUI callback. Strings whose arguments
+# are fixed for the whole run are formatted once here
+TRANSLATIONS = {
+    lang: types.MappingProxyType({**table, "version": table["version"].format(VERSION, AUTHOR)})
+    for lang, table in TRANSLATIONS.items()
+}
+
+# Attribute-style view of the translations (e.g. t.select_window_msg); keys
+# missing from a language fall back to an empty string
+Translation = collections.namedtuple(
+    "Translation", sorted({key for table in TRANSLATIONS.values() for key in table})
+)
+TRANSLATIONS_NT = {
+    lang: Translation(**{key: table.get(key, "") for key in Translation._fields})
+    for lang, table in TRANSLATIONS.items()
+}
+
+# Common color names used to label entries in the color position picker
+PICKER_COLOR_NAMES = {
+    (0, 0, 0): "Black",
+    (127, 127, 127): "Gray", 
+    (192, 192, 192): "Silver",
+    (255, 255, 255): "White",
+    (255, 0, 0): "Red",
+    (128, 0, 0): "Maroon",
+    (255, 165, 0): "Orange",
+    (255, 255, 0): "Yellow",
+    (0, 255, 0): "Lime",
+    (0, 128, 0): "Green",
+    (0, 255, 255): "Cyan",
+    (0, 0, 255): "Blue",
+    (0, 0, 128): "Navy",
+    (128, 0, 128): "Purple",
+    (255, 0, 255): "Magenta",
+    (165, 42, 42): "Brown",
+    (255, 192, 203): "Pink"
+}
+_PICKER_NAMES = tuple(PICKER_COLOR_NAMES.values())
+
+# Height in pixels of one row in the color position list
+COLOR_ROW_HEIGHT = 46
+
+# Color-position capture countdown: length in seconds and label color per second left
+COUNTDOWN_SECONDS = 3
+COUNTDOWN_COLORS = {3: "#00FF00", 2: "#FFFF00", 1: "#FF0000"}  # Green, yellow, red
+
+@functools.lru_cache(maxsize=None)
+def _picker_color_array():
+    """(N, 3) int32 array of PICKER_COLOR_NAMES keys, built on first use"""
+    # int32 so squared channel differences (up to 3 * 255**2) can't overflow
+    return np.asarray(list(PICKER_COLOR_NAMES), dtype=np.int32)
+
+@functools.lru_cache(maxsize=512)
+def get_picker_color_name(color):
+    """Get a user-friendly name for an RGB tuple"""
+    name = PICKER_COLOR_NAMES.get(color)
+    if name is not None:
+        return name
+    
+    # Find closest named color for better UX (squared distance, no sqrt)
+    diff = _picker_color_array() - np.asarray(color[:3], dtype=np.int32)
+    distances = np.einsum('ij,ij->i', diff, diff)
+    closest = int(distances.argmin())
+    
+    # If quite close to a named color, use that name with a modifier
+    if distances[closest] < 30 ** 2:
+        return f"{_PICKER_NAMES[closest]}-like"
+    
+    # Otherwise just return RGB values
+    return f"RGB({color[0]}, {color[1]}, {color[2]})"
+
+@functools.lru_cache(maxsize=512)
+def rgb_to_hex(color):
+    """Convert RGB tuple to hex color string"""
+    return f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}"
+
 class DrawingAreaSelector:
     """Class to help user select drawing area and color positions"""
     
     def __init__(self, lang="en"):
         self.lang = lang
-        self.translations = TRANSLATIONS[lang]
+        self.t = TRANSLATIONS_NT[lang]
     
     def select_drawing_area(self):
         """Select drawing area with improved reliability and UX"""
@@ -445,7 +974,7 @@ class DrawingAreaSelector:
             # Use try-finally to ensure cleanup even if there's an error
             try:
                 result = messagebox.askokcancel(
-                    self.translations["select_drawing_area"],
+                    self.t.select_drawing_area,
                     "You will now select the drawing area on your screen.\n\n"
                     "1. Click the top-left corner\n"
                     "2. Then click the bottom-right corner\n\n"
@@ -512,22 +1041,46 @@ class DrawingAreaSelector:
                 )
                 cancel_button.place(x=10, y=screen_height - 50)
                 
+                # Current crosshair position, so lines can be shifted by a delta
+                crosshair_pos = [0, 0]
+                
                 def update_crosshair(x, y):
                     """Update crosshair position and coordinates display"""
-                    canvas.coords(h_line, 0, y, screen_width, y)
-                    canvas.coords(v_line, x, 0, x, screen_height)
+                    # The lines span the full screen, so only their offset changes
+                    dx = x - crosshair_pos[0]
+                    dy = y - crosshair_pos[1]
+                    if dy:
+                        canvas.move(h_line, 0, dy)
+                    if dx:
+                        canvas.move(v_line, dx, 0)
+                    crosshair_pos[0], crosshair_pos[1] = x, y
                     coords_label.config(text=f"X: {x}, Y: {y}")
                     
-                def on_motion(event):
-                    """Handle mouse movement"""
-                    update_crosshair(event.x, event.y)
+                # Latest pointer position waiting to be drawn; motion events are
+                # coalesced so the overlay is only redrawn once per idle cycle
+                pending_motion = [None]
+                
+                def flush_motion():
+                    """Apply the most recent pointer position to the overlay"""
+                    if pending_motion[0] is None or not overlay.winfo_exists():
+                        return
+                    x, y = pending_motion[0]
+                    pending_motion[0] = None
+                    
+                    update_crosshair(x, y)
                     
                     # Update rectangle if first point is set
                     if len(coords) == 1 and rect_id:
-                        canvas.coords(rect_id, start_x, start_y, event.x, event.y)
-                        width = abs(event.x - start_x)
-                        height = abs(event.y - start_y)
+                        canvas.coords(rect_id, start_x, start_y, x, y)
+                        width = abs(x - start_x)
+                        height = abs(y - start_y)
                         instruction_label.config(text=f"Dimensions: {width} × {height} pixels")
+                
+                def on_motion(event):
+                    """Handle mouse movement"""
+                    if pending_motion[0] is None:
+                        overlay.after_idle(flush_motion)
+                    pending_motion[0] = (event.x, event.y)
                     
                 def on_click(event):
                     """Handle mouse clicks"""
@@ -600,25 +1153,26 @@ class DrawingAreaSelector:
     
     def select_window(self):
         """Allow user to select a window by clicking on it"""
+        t = self.t
+        title = t.select_window
+        msg = t.select_window_msg
+        
         root = tk.Tk()
         root.withdraw()
         
-        result = messagebox.askokcancel(
-            self.translations["select_window"],
-            self.translations["select_window_msg"]
-        )
+        result = messagebox.askokcancel(title, msg)
         
         if not result:
             return None
         
         # Create a small overlay window for instructions
         overlay = tk.Toplevel(root)
-        overlay.title(self.translations["select_window"])
+        overlay.title(title)
         overlay.geometry("300x100+50+50")
         overlay.attributes("-topmost", True)
         overlay.resizable(False, False)
         
-        instruction = tk.Label(overlay, text=self.translations["select_window_msg"], font=("Arial", 12))
+        instruction = tk.Label(overlay, text=msg, font=("Arial", 12))
         instruction.pack(pady=20)
         
         # Result container
@@ -675,8 +1229,8 @@ class DrawingAreaSelector:
                 result_root = tk.Tk()
                 result_root.withdraw()
                 messagebox.showinfo(
-                    self.translations["window_selected"],
-                    self.translations["window_title"].format(window_info[0]["title"])
+                    t.window_selected,
+                    t.window_title.format(window_info[0]["title"])
                 )
                 result_root.destroy()
                 
@@ -692,7 +1246,7 @@ class DrawingAreaSelector:
             )
             return None
         except Exception as e:
-            messagebox.showerror(self.translations["error"], f"{self.translations['error_window']} {str(e)}")
+            messagebox.showerror(t.error, f"{t.error_window} {str(e)}")
             return None
     
     def select_color_positions(self, colors):
@@ -712,28 +1266,56 @@ class DrawingAreaSelector:
             print("Error: No colors provided for position selection")
             return None
             
+        return ColorPositionDialog(colors).run()
+
+class ColorPositionDialog:
+    """Window for capturing the screen position of each palette color
+    
+    The color list is virtualized: only enough row widgets to fill the
+    viewport exist, and scrolling re-binds them to different palette entries.
+    """
+    
+    def __init__(self, colors):
+        self.colors = colors if isinstance(colors, list) else list(colors)
+        self.color_positions = {}  # {(r,g,b): (x,y)}
+        self.row_pool = []
+        self.list_state = {"top": 0, "bound": None}
+        
+        # Solid-color swatch images, kept alive for the lifetime of this Tk
+        # root (PhotoImages belong to one interpreter, so they are not global)
+        self.swatch_cache = {}
+        
+        # Countdown window state for the color currently being picked
+        self.countdown = None
+        self.countdown_label = None
+        self.timer = {"color": None, "start": 0.0, "shown": None, "after_id": None}
+        
+        self._build()
+    
+    def _build(self):
+        """Create the instruction window and its widgets"""
         # Setup main window
-        root = tk.Tk()
+        self.root = root = tk.Tk()
         root.withdraw()
         
         # Create instruction window with better UI
-        instruction_window = tk.Toplevel(root)
-        instruction_window.title("Select Color Positions")
-        instruction_window.geometry("600x650+50+50")
-        instruction_window.attributes("-topmost", True)
-        instruction_window.configure(bg="#f0f0f0")  # Light gray background
+        self.window = window = tk.Toplevel(root)
+        window.title("Select Color Positions")
+        window.geometry("600x650+50+50")
+        window.attributes("-topmost", True)
+        window.configure(bg="#f0f0f0")  # Light gray background
         
         # Set window icon if available
         try:
-            icon_path = os.path.join(os.path.dirname(__file__), "icon.png")
+            icon_path = os.path.join(_HERE, "icon.png")
             if os.path.exists(icon_path):
                 icon = tk.PhotoImage(file=icon_path)
-                instruction_window.iconphoto(True, icon)
+                window.iconphoto(True, icon)
         except Exception:
             pass
         
         # Main frame with padding and styling
-        main_frame = ttk.Frame(instruction_window, padding=15)
+        main_frame = ttk.Frame(window, padding=15)
         main_frame.pack(fill=tk.BOTH, expand=True)
         
         # Header with title
@@ -779,328 +1361,18 @@ class DrawingAreaSelector:
         color_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # Create a canvas with scrollbar for color entries
-        canvas = tk.Canvas(color_frame, bg="#f0f0f0", highlightthickness=0)
-        scrollbar = ttk.Scrollbar(color_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
+        self.canvas = tk.Canvas(color_frame, bg="#f0f0f0", highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(color_frame, orient="vertical", command=self._on_scrollbar)
         
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        # Define the color positions and reference variables
-        color_positions = {}
-        position_vars = {}
-        
-        # Define common color names for better identification
-        color_names = {
-            (0, 0, 0): "Black",
-            (127, 127, 127): "Gray", 
-            (192, 192, 192): "Silver",
-            (255, 255, 255): "White",
-            (255, 0, 0): "Red",
-            (128, 0, 0): "Maroon",
-            (255, 165, 0): "Orange",
-            (255, 255, 0): "Yellow",
-            (0, 255, 0): "Lime",
-            (0, 128, 0): "Green",
-            (0, 255, 255): "Cyan",
-            (0, 0, 255): "Blue",
-            (0, 0, 128): "Navy",
-            (128, 0, 128): "Purple",
-            (255, 0, 255): "Magenta",
-            (165, 42, 42): "Brown",
-            (255, 192, 203): "Pink"
-        }
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
         
-        def get_color_name(color):
-            """Get a user-friendly name for a color"""
-            if color in color_names:
-                return color_names[color]
-            
-            # Find closest named color for better UX
-            closest_name = None
-            min_distance = float('inf')
-            
-            for known_color, name in color_names.items():
-                r1, g1, b1 = color
-                r2, g2, b2 = known_color
-                distance = ((r1-r2)**2 + (g1-g2)**2 + (b1-b2)**2)**0.5
-                
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_name = name
-            
-            # If quite close to a named color, use that name with a modifier
-            if min_distance < 30 and closest_name:
-                return f"{closest_name}-like"
-            
-            # Otherwise just return RGB values
-            return f"RGB({color[0]}, {color[1]}, {color[2]})"
-        
-        def rgb_to_hex(color):
-            """Convert RGB tuple to hex color string"""
-            return "#{:02x}{:02x}{:02x}".format(*color)
-        
-        def select_position_for_color(color, test_button):
-            """Capture mouse position for a color with enhanced UI"""
-            # Hide instruction window temporarily
-            instruction_window.withdraw()
-            
-            # Create countdown window with better visibility
-            countdown = tk.Toplevel(root)
-            countdown.title("Select Color Position")
-            countdown.geometry("400x300+100+100")
-            countdown.attributes("-topmost", True)
-            countdown.configure(bg="#333333")
-            
-            # Setup variables
-            color_name = get_color_name(color)
-            color_hex = rgb_to_hex(color)
-            seconds_left = [3]  # Use list for nonlocal access
-            
-            # Color preview - larger and with border
-            preview_frame = tk.Frame(countdown, bg=color_hex, width=100, height=100,
-                                   highlightbackground="white", highlightthickness=2)
-            preview_frame.pack(pady=20)
-            
-            # Instructions with animation
-            text_var = tk.StringVar()
-            text_var.set(f"Position your mouse over the {color_name} color\nin your drawing application.")
-            
-            instruction_label = tk.Label(
-                countdown, 
-                textvariable=text_var,
-                font=("Arial", 12, "bold"),
-                bg="#333333",
-                fg="white"
-            )
-            instruction_label.pack(pady=10)
-            
-            # Countdown display with animated color
-            countdown_var = tk.StringVar()
-            countdown_var.set(f"Capturing in {seconds_left[0]} seconds...")
-            
-            countdown_label = tk.Label(
-                countdown,
-                textvariable=countdown_var,
-                font=("Arial", 14, "bold"),
-                bg="#333333",
-                fg="#00FF00"  # Start with green
-            )
-            countdown_label.pack(pady=10)
-            
-            # Cancel button
-            cancel_button = tk.Button(
-                countdown,
-                text="Cancel",
-                font=("Arial", 11),
-                bg="red",
-                fg="white",
-                command=lambda: countdown.destroy()
-            )
-            cancel_button.pack(pady=15)
-            
-            # Update countdown display with animation
-            def update_countdown():
-                """Update countdown timer"""
-                seconds_left[0] -= 1
-                
-                # Change colors based on time left
-                if seconds_left[0] == 2:
-                    countdown_label.config(fg="#FFFF00")  # Yellow
-                elif seconds_left[0] == 1:
-                    countdown_label.config(fg="#FF0000")  # Red
-                
-                countdown_var.set(f"Capturing in {seconds_left[0]} seconds...")
-                
-                if seconds_left[0] > 0:
-                    countdown.after(1000, update_countdown)
-            
-            # Capture position when countdown completes
-            def do_capture():
-                """Capture the mouse position"""
-                try:
-                    # Get current mouse position
-                    x, y = pyautogui.position()
-                    
-                    # Basic validation - check if mouse is at (0,0) which is unlikely
-                    if (x, y) == (0, 0):
-                        result = messagebox.askyesno(
-                            "Warning", 
-                            "Mouse position is at (0,0), which is unusual.\n"
-                            "This might indicate a problem. Do you want to try again?",
-                            parent=countdown
-                        )
-                        if result:
-                            # Restart the countdown
-                            seconds_left[0] = 3
-                            update_countdown()
-                            countdown.after(3000, do_capture)
-                            return
-                    
-                    # Save position and update UI
-                    color_positions[color] = (x, y)
-                    position_vars[color].set(f"({x}, {y})")
-                    
-                    # Enable test button
-                    test_button.config(state="normal")
-                    
-                    # Close countdown window and show instruction window
-                    countdown.destroy()
-                    instruction_window.deiconify()
-                    
-                except Exception as e:
-                    print(f"Error capturing mouse position: {e}")
-                    messagebox.showerror(
-                        "Error", 
-                        f"Failed to capture position: {str(e)}",
-                        parent=countdown
-                    )
-                    countdown.destroy()
-                    instruction_window.deiconify()
-            
-            # Start countdown
-            countdown.after(1000, update_countdown)
-            countdown.after(3000, do_capture)
-        
-        def add_custom_color():
-            """Add a custom color to the palette"""
-            try:
-                from tkinter import colorchooser
-                color_rgb, color_hex = colorchooser.askcolor(
-                    title="Select Custom Color",
-                    parent=instruction_window
-                )
-                
-                if color_rgb:
-                    # Convert to integer RGB tuple
-                    new_color = tuple(map(int, color_rgb))
-                    
-                    # Add to colors if not already there
-                    if new_color not in colors:
-                        colors.append(new_color)
-                        add_color_entry(new_color)
-                        messagebox.showinfo(
-                            "Success", 
-                            f"Added new color: {get_color_name(new_color)}",
-                            parent=instruction_window
-                        )
-            except Exception as e:
-                messagebox.showerror(
-                    "Error", 
-                    f"Failed to add custom color: {str(e)}",
-                    parent=instruction_window
-                )
-        
-        def add_color_entry(color):
-            """Add a color entry to the scrollable frame"""
-            # Create a frame for each color entry
-            color_entry_frame = ttk.Frame(scrollable_frame)
-            color_entry_frame.pack(fill=tk.X, pady=8, padx=5)
-            
-            # Color preview - larger and with border
-            color_hex = rgb_to_hex(color)
-            color_preview = tk.Frame(
-                color_entry_frame, 
-                width=40, 
-                height=30, 
-                bg=color_hex, 
-                highlightbackground="black", 
-                highlightthickness=1
-            )
-            color_preview.pack(side=tk.LEFT, padx=10)
-            
-            # Color name
-            color_name = get_color_name(color)
-            name_label = ttk.Label(
-                color_entry_frame, 
-                text=color_name, 
-                width=15
-            )
-            name_label.pack(side=tk.LEFT, padx=5)
-            
-            # Position display
-            position_var = tk.StringVar(value="Not set")
-            position_vars[color] = position_var
-            position_label = ttk.Label(
-                color_entry_frame, 
-                textvariable=position_var, 
-                width=12
-            )
-            position_label.pack(side=tk.LEFT, padx=5)
-            
-            # Test button for validation - initially disabled
-            test_button = ttk.Button(
-                color_entry_frame,
-                text="Test",
-                command=lambda c=color: test_color_position(c),
-                state="disabled"  # Enabled only after position is set
-            )
-            test_button.pack(side=tk.RIGHT, padx=5)
-            
-            # Pick button
-            pick_button = ttk.Button(
-                color_entry_frame, 
-                text="Pick", 
-                command=lambda c=color, btn=test_button: select_position_for_color(c, btn)
-            )
-            pick_button.pack(side=tk.RIGHT, padx=5)
-        
-        def test_color_position(color):
-            """Test a color position by moving the mouse there"""
-            if color in color_positions:
-                # Hide the window temporarily
-                instruction_window.withdraw()
-                
-                # Create test window
-                test_window = tk.Toplevel(root)
-                test_window.title("Testing Color Position")
-                test_window.geometry("350x180+100+100")
-                test_window.attributes("-topmost", True)
-                test_window.configure(bg="#f0f0f0")
-                
-                # Information display
-                ttk.Label(
-                    test_window, 
-                    text=f"Moving to {get_color_name(color)} position...",
-                    font=("Arial", 12, "bold")
-                ).pack(pady=(20, 10))
-                
-                x, y = color_positions[color]
-                ttk.Label(
-                    test_window, 
-                    text=f"Position: ({x}, {y})",
-                    font=("Arial", 11)
-                ).pack(pady=5)
-                
-                # Close button
-                ttk.Button(
-                    test_window,
-                    text="Done",
-                    command=lambda: [test_window.destroy(), instruction_window.deiconify()]
-                ).pack(pady=15)
-                
-                # Perform the mouse movement
-                def move_mouse():
-                    try:
-                        # Move mouse to position
-                        pyautogui.moveTo(x, y, duration=0.5)
-                    except Exception as e:
-                        messagebox.showerror("Error", f"Failed to move mouse: {str(e)}")
-                    
-                # Schedule movement after a short delay
-                test_window.after(500, move_mouse)
-        
-        # Add all colors to the UI
-        for color in colors:
-            add_color_entry(color)
+        # Show the colors in view; more rows are created as the canvas grows
+        self.canvas.bind("<Configure>", self._on_canvas_configure)
+        window.bind("<MouseWheel>", self._on_mousewheel)
+        window.bind("<Button-4>", self._on_mousewheel)
+        window.bind("<Button-5>", self._on_mousewheel)
+        self.render_rows()
         
         # Custom color button
         custom_color_frame = ttk.Frame(main_frame)
@@ -1109,17 +1381,17 @@ class DrawingAreaSelector:
         add_color_button = ttk.Button(
             custom_color_frame,
             text="Add Custom Color",
-            command=add_custom_color
+            command=self._add_custom_color
         )
         add_color_button.pack(side=tk.LEFT)
         
         # Display total number of colors
-        color_count_var = tk.StringVar(value=f"Total colors: {len(colors)}")
-        ttk.Label(
+        self.color_count_label = ttk.Label(
             custom_color_frame,
-            textvariable=color_count_var,
+            text=f"Total colors: {len(self.colors)}",
             font=("Arial", 10)
-        ).pack(side=tk.RIGHT, padx=10)
+        )
+        self.color_count_label.pack(side=tk.RIGHT, padx=10)
         
         # Create separator
         ttk.Separator(main_frame, orient="horizontal").pack(fill=tk.X, pady=10)
@@ -1132,7 +1404,7 @@ class DrawingAreaSelector:
         cancel_button = ttk.Button(
             button_frame,
             text="Cancel",
-            command=lambda: [color_positions.clear(), instruction_window.destroy()]
+            command=self._cancel
         )
         cancel_button.pack(side=tk.RIGHT, padx=5)
         
@@ -1140,54 +1412,401 @@ class DrawingAreaSelector:
         done_button = ttk.Button(
             button_frame,
             text="Done",
-            command=lambda: on_done()
+            command=self._on_done
         )
         done_button.pack(side=tk.RIGHT, padx=5)
         
-        def on_done():
-            """Handle completion of color position selection"""
-            if not color_positions:
+        # Enable keyboard shortcuts
+        window.bind("<Escape>", self._cancel)
+    
+    def run(self):
+        """Show the dialog and return the captured positions, or None"""
+        # Wait for instruction window to close
+        self.root.wait_window(self.window)
+        
+        # Cleanup
+        self.root.destroy()
+        
+        # Return the selected positions
+        return self.color_positions if self.color_positions else None
+    
+    def get_swatch(self, color, width=40, height=30):
+        """Return a cached PhotoImage filled with a single color"""
+        key = (color, width, height)
+        image = self.swatch_cache.get(key)
+        if image is None:
+            image = tk.PhotoImage(master=self.root, width=width, height=height)
+            image.put(rgb_to_hex(color), to=(0, 0, width, height))
+            self.swatch_cache[key] = image
+        return image
+    
+    # ----- Virtualized color list -----
+    
+    def _create_row(self):
+        """Create one pooled row widget and place it in the canvas"""
+        canvas = self.canvas
+        row_frame = ttk.Frame(canvas)
+        
+        # Color preview - an image-backed label with a thin border
+        color_preview = tk.Label(row_frame, borderwidth=1, relief="solid")
+        color_preview.pack(side=tk.LEFT, padx=10)
+        
+        # Color name
+        name_label = ttk.Label(row_frame, width=15)
+        name_label.pack(side=tk.LEFT, padx=5)
+        
+        # Position display
+        position_label = ttk.Label(row_frame, width=12)
+        position_label.pack(side=tk.LEFT, padx=5)
+        
+        # Test button for validation - enabled only after position is set
+        test_button = ttk.Button(row_frame, text="Test")
+        test_button.pack(side=tk.RIGHT, padx=5)
+        
+        # Pick button
+        pick_button = ttk.Button(row_frame, text="Pick")
+        pick_button.pack(side=tk.RIGHT, padx=5)
+        
+        window_id = canvas.create_window(
+            0, len(self.row_pool) * COLOR_ROW_HEIGHT,
+            window=row_frame, anchor="nw",
+            width=max(canvas.winfo_width(), 1), height=COLOR_ROW_HEIGHT
+        )
+        self.row_pool.append({
+            "window": window_id,
+            "preview": color_preview,
+            "name": name_label,
+            "position": position_label,
+            "test": test_button,
+            "pick": pick_button,
+        })
+    
+    def _bind_row(self, row, color):
+        """Point a pooled row at a palette color"""
+        row["preview"].configure(image=self.get_swatch(color))
+        row["name"].configure(text=get_picker_color_name(color))
+        
+        if color in self.color_positions:
+            x, y = self.color_positions[color]
+            row["position"].configure(text=f"({x}, {y})")
+            row["test"].configure(state="normal", command=functools.partial(self._test, color))
+        else:
+            row["position"].configure(text="Not set")
+            row["test"].configure(state="disabled")
+        
+        row["pick"].configure(command=functools.partial(self._pick, color))
+    
+    def render_rows(self, force=False):
+        """Bind the row pool to the colors currently in view"""
+        canvas = self.canvas
+        colors = self.colors
+        list_state = self.list_state
+        
+        visible = max(1, canvas.winfo_height() // COLOR_ROW_HEIGHT + 1)
+        while len(self.row_pool) < visible:
+            self._create_row()
+        
+        # Clamp the first visible index to the list bounds
+        top = max(0, min(list_state["top"], len(colors) - visible + 1))
+        list_state["top"] = top
+        
+        # Skip rebinding when nothing in view changed
+        bound = (top, visible, len(colors))
+        if not force and bound == list_state["bound"]:
+            return
+        list_state["bound"] = bound
+        
+        for i, row in enumerate(self.row_pool):
+            index = top + i
+            if i < visible and index < len(colors):
+                self._bind_row(row, tuple(colors[index]))
+                canvas.itemconfigure(row["window"], state="normal")
+            else:
+                canvas.itemconfigure(row["window"], state="hidden")
+        
+        # Keep the scrollbar in sync with the virtual list
+        total = max(len(colors), 1)
+        self.scrollbar.set(top / total, min(1.0, (top + visible) / total))
+    
+    def _on_scrollbar(self, action, *args):
+        """Handle scrollbar drags and arrow clicks"""
+        if action == "moveto":
+            self.list_state["top"] = int(float(args[0]) * len(self.colors))
+        elif action == "scroll":
+            step = int(args[0])
+            if args[1] == "pages":
+                step *= max(1, self.canvas.winfo_height() // COLOR_ROW_HEIGHT)
+            self.list_state["top"] += step
+        self.render_rows()
+    
+    def _on_mousewheel(self, event):
+        """Scroll the list with the mouse wheel"""
+        if getattr(event, "num", None) == 4:
+            step = -1
+        elif getattr(event, "num", None) == 5:
+            step = 1
+        else:
+            step = -1 if event.delta > 0 else 1
+        self.list_state["top"] += step
+        self.render_rows()
+    
+    def _on_canvas_configure(self, event):
+        """Stretch rows to the canvas width and fill new space"""
+        for row in self.row_pool:
+            self.canvas.itemconfigure(row["window"], width=event.width)
+        self.render_rows()
+    
+    # ----- Position capture -----
+    
+    def _pick(self, color):
+        """Capture mouse position for a color with enhanced UI"""
+        # Hide instruction window temporarily
+        self.window.withdraw()
+        
+        # Create countdown window with better visibility
+        self.countdown = countdown = tk.Toplevel(self.root)
+        countdown.title("Select Color Position")
+        countdown.geometry("400x300+100+100")
+        countdown.attributes("-topmost", True)
+        countdown.configure(bg="#333333")
+        
+        # Setup variables
+        color_name = get_picker_color_name(color)
+        color_hex = rgb_to_hex(color)
+        self.timer["color"] = color
+        
+        # Color preview - larger and with border
+        preview_frame = tk.Frame(countdown, bg=color_hex, width=100, height=100,
+                               highlightbackground="white", highlightthickness=2)
+        preview_frame.pack(pady=20)
+        
+        # Instructions with animation
+        instruction_label = tk.Label(
+            countdown, 
+            text=f"Position your mouse over the {color_name} color\nin your drawing application.",
+            font=("Arial", 12, "bold"),
+            bg="#333333",
+            fg="white"
+        )
+        instruction_label.pack(pady=10)
+        
+        # Countdown display with animated color
+        self.countdown_label = tk.Label(
+            countdown,
+            text=f"Capturing in {COUNTDOWN_SECONDS} seconds...",
+            font=("Arial", 14, "bold"),
+            bg="#333333",
+            fg="#00FF00"  # Start with green
+        )
+        self.countdown_label.pack(pady=10)
+        
+        # Cancel button
+        cancel_button = tk.Button(
+            countdown,
+            text="Cancel",
+            font=("Arial", 11),
+            bg="red",
+            fg="white",
+            command=self._cancel_countdown
+        )
+        cancel_button.pack(pady=15)
+        countdown.protocol("WM_DELETE_WINDOW", self._cancel_countdown)
+        
+        # Start countdown
+        self._start_countdown()
+    
+    def _start_countdown(self):
+        """(Re)start the countdown from the beginning"""
+        self.timer["start"] = time.monotonic()
+        self.timer["shown"] = None
+        self._tick()
+    
+    def _tick(self):
+        """Update the countdown display and capture when time is up
+        
+        A single scheduler driven by elapsed wall time, so a stalled event
+        loop cannot desynchronize the display from the capture.
+        """
+        timer = self.timer
+        timer["after_id"] = None
+        elapsed = time.monotonic() - timer["start"]
+        if elapsed >= COUNTDOWN_SECONDS:
+            self._capture()
+            return
+        
+        left = COUNTDOWN_SECONDS - int(elapsed)
+        if left != timer["shown"]:
+            timer["shown"] = left
+            self.countdown_label.config(
+                text=f"Capturing in {left} seconds...",
+                fg=COUNTDOWN_COLORS.get(left, "#00FF00")
+            )
+        timer["after_id"] = self.countdown.after(50, self._tick)
+    
+    def _close_countdown(self):
+        """Close the countdown window and show the instruction window"""
+        self.countdown.destroy()
+        self.countdown = self.countdown_label = None
+        self.window.deiconify()
+    
+    def _cancel_countdown(self):
+        """Stop the pending capture and return to the color list"""
+        if self.timer["after_id"] is not None:
+            self.countdown.after_cancel(self.timer["after_id"])
+            self.timer["after_id"] = None
+        self._close_countdown()
+    
+    def _capture(self):
+        """Capture the mouse position"""
+        try:
+            # Get current mouse position
+            x, y = get_cursor_pos()
+            
+            # Basic validation - check if mouse is at (0,0) which is unlikely
+            if (x, y) == (0, 0):
                 result = messagebox.askyesno(
-                    "Warning",
-                    "No color positions have been set. Are you sure you want to continue?",
-                    parent=instruction_window
+                    "Warning", 
+                    "Mouse position is at (0,0), which is unusual.\n"
+                    "This might indicate a problem. Do you want to try again?",
+                    parent=self.countdown
                 )
-                if not result:
+                if result:
+                    # Restart the countdown
+                    self._start_countdown()
                     return
             
-            # Check for unset colors
-            unset_count = len(colors) - len(color_positions)
-            if unset_count > 0:
-                result = messagebox.askyesnocancel(
-                    "Incomplete Selection",
-                    f"{unset_count} colors don't have positions set.\n\n"
-                    "• Click 'Yes' to continue setting positions\n"
-                    "• Click 'No' to proceed with the colors that are set\n"
-                    "• Click 'Cancel' to cancel the operation",
-                    parent=instruction_window
-                )
-                
-                if result is True:  # Yes - continue setting
-                    return
-                elif result is False:  # No - proceed with what we have
-                    instruction_window.destroy()
-                else:  # Cancel
-                    color_positions.clear()
-                    instruction_window.destroy()
-            else:
-                instruction_window.destroy()
+            # Save position and update UI (enables the Test button)
+            self.color_positions[self.timer["color"]] = (x, y)
+            self.render_rows(force=True)
+            
+            # Close countdown window and show instruction window
+            self._close_countdown()
+            
+        except Exception as e:
+            print(f"Error capturing mouse position: {e}")
+            messagebox.showerror(
+                "Error", 
+                f"Failed to capture position: {str(e)}",
+                parent=self.countdown
+            )
+            self._close_countdown()
+    
+    def _test(self, color):
+        """Test a color position by moving the mouse there"""
+        if color not in self.color_positions:
+            return
         
-        # Enable keyboard shortcuts
-        instruction_window.bind("<Escape>", lambda e: [color_positions.clear(), instruction_window.destroy()])
+        # Hide the window temporarily
+        self.window.withdraw()
         
-        # Wait for instruction window to close
-        root.wait_window(instruction_window)
+        # Create test window
+        test_window = tk.Toplevel(self.root)
+        test_window.title("Testing Color Position")
+        test_window.geometry("350x180+100+100")
+        test_window.attributes("-topmost", True)
+        test_window.configure(bg="#f0f0f0")
         
-        # Cleanup
-        root.destroy()
+        # Information display
+        ttk.Label(
+            test_window, 
+            text=f"Moving to {get_picker_color_name(color)} position...",
+            font=("Arial", 12, "bold")
+        ).pack(pady=(20, 10))
         
-        # Return the selected positions
-        return color_positions if color_positions else None
+        x, y = self.color_positions[color]
+        ttk.Label(
+            test_window, 
+            text=f"Position: ({x}, {y})",
+            font=("Arial", 11)
+        ).pack(pady=5)
+        
+        # Close button
+        ttk.Button(
+            test_window,
+            text="Done",
+            command=lambda: [test_window.destroy(), self.window.deiconify()]
+        ).pack(pady=15)
+        
+        # Perform the mouse movement
+        def move_mouse():
+            try:
+                # Move mouse to position
+                set_cursor_pos(x, y)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to move mouse: {str(e)}")
+            
+        # Move as soon as the test window has been drawn
+        test_window.after_idle(move_mouse)
+    
+    # ----- Palette and dialog buttons -----
+    
+    def _add_custom_color(self):
+        """Add a custom color to the palette"""
+        try:
+            from tkinter import colorchooser
+            color_rgb, color_hex = colorchooser.askcolor(
+                title="Select Custom Color",
+                parent=self.window
+            )
+            
+            if color_rgb:
+                # Convert to integer RGB tuple
+                new_color = tuple(map(int, color_rgb))
+                
+                # Add to colors if not already there and scroll to it
+                if new_color not in self.colors:
+                    self.colors.append(new_color)
+                    self.list_state["top"] = len(self.colors) - 1
+                    self.render_rows(force=True)
+                    self.color_count_label.configure(text=f"Total colors: {len(self.colors)}")
+                    messagebox.showinfo(
+                        "Success", 
+                        f"Added new color: {get_picker_color_name(new_color)}",
+                        parent=self.window
+                    )
+        except Exception as e:
+            messagebox.showerror(
+                "Error", 
+                f"Failed to add custom color: {str(e)}",
+                parent=self.window
+            )
+    
+    def _cancel(self, event=None):
+        """Discard all positions and close the dialog"""
+        self.color_positions.clear()
+        self.window.destroy()
+    
+    def _on_done(self):
+        """Handle completion of color position selection"""
+        if not self.color_positions:
+            result = messagebox.askyesno(
+                "Warning",
+                "No color positions have been set. Are you sure you want to continue?",
+                parent=self.window
+            )
+            if not result:
+                return
+        
+        # Check for unset colors
+        unset_count = len(self.colors) - len(self.color_positions)
+        if unset_count > 0:
+            result = messagebox.askyesnocancel(
+                "Incomplete Selection",
+                f"{unset_count} colors don't have positions set.\n\n"
+                "• Click 'Yes' to continue setting positions\n"
+                "• Click 'No' to proceed with the colors that are set\n"
+                "• Click 'Cancel' to cancel the operation",
+                parent=self.window
+            )
+            
+            if result is True:  # Yes - continue setting
+                return
+            elif result is False:  # No - proceed with what we have
+                self.window.destroy()
+            else:  # Cancel
+                self._cancel()
+        else:
+            self.window.destroy()
 
 class ToolTip:
     """Create a tooltip for a given widget"""
@@ -1219,13 +1838,582 @@ class ToolTip:
             self.tooltip_window.destroy()
             self.tooltip_window = None
 
+# Default palettes for the supported target applications
+MSPAINT_PALETTE = (
+    (0, 0, 0),       # Black
+    (127, 127, 127), # Gray
+    (136, 0, 21),    # Dark red
+    (237, 28, 36),   # Red
+    (255, 127, 39),  # Orange
+    (255, 242, 0),   # Yellow
+    (34, 177, 76),   # Green
+    (0, 162, 232),   # Blue
+    (63, 72, 204),   # Dark blue
+    (163, 73, 164),  # Purple
+    (255, 255, 255), # White
+    (195, 195, 195), # Light gray
+    (185, 122, 87),  # Brown
+    (255, 174, 201), # Pink
+    (255, 201, 14),  # Gold
+    (239, 228, 176), # Light yellow
+    (181, 230, 29),  # Light green
+    (153, 217, 234), # Light blue
+    (112, 146, 190), # Medium blue
+    (200, 191, 231), # Lavender
+)
+
+GARTIC_PALETTE = (
+    (0, 0, 0),       # Black
+    (102, 102, 102), # Dark gray
+    (170, 170, 170), # Light gray
+    (255, 255, 255), # White
+    (124, 77, 54),   # Brown
+    (198, 120, 87),  # Light brown
+    (240, 156, 118), # Beige
+    (242, 178, 55),  # Orange
+    (252, 215, 3),   # Yellow
+    (253, 253, 150), # Light yellow
+    (108, 224, 134), # Light green
+    (54, 180, 107),  # Green
+    (39, 127, 70),   # Dark green
+    (135, 242, 255), # Light blue
+    (34, 177, 214),  # Blue
+    (28, 101, 140),  # Dark blue
+    (158, 114, 189), # Purple
+    (120, 71, 135),  # Dark purple
+    (255, 110, 166), # Pink
+    (255, 18, 64),   # Red
+)
+
+# Basic default palette
+BASIC_PALETTE = (
+    (0, 0, 0),       # Black
+    (127, 127, 127), # Gray
+    (255, 0, 0),     # Red
+    (0, 255, 0),     # Green
+    (0, 0, 255),     # Blue
+    (255, 255, 0),   # Yellow
+    (0, 255, 255),   # Cyan
+    (255, 0, 255),   # Magenta
+    (255, 255, 255), # White
+)
+
+DEFAULT_PALETTES = {
+    "mspaint": MSPAINT_PALETTE,
+    "paint": MSPAINT_PALETTE,
+    "gartic": GARTIC_PALETTE,
+    "gartic phone": GARTIC_PALETTE
+}
+
+# Tables derived from the built-in palettes, shared by every AutoDraw using
+# one: get_default_palette hands out fresh lists (callers extend them in
+# place), but re-selecting a default palette reuses its LUT and arrays
+_DEFAULT_PALETTE_CACHES = {palette: {} for palette in (*DEFAULT_PALETTES.values(), BASIC_PALETTE)}
+
+# Without a palette, pixel-style images are reduced to this many adaptive
+# colors - every distinct color costs a color switch while drawing
+AUTO_PALETTE_COLORS = 32
+
+def reduce_colors(img, colors=AUTO_PALETTE_COLORS):
+    """Return img with at most colors adaptive colors, keeping an RGBA alpha channel
+    
+    Uses Pillow's fast octree quantizer without dithering, so each color
+    forms solid regions instead of scattered pixels.
+    """
+    rgb = img if img.mode == "RGB" else img.convert("RGB")
+    reduced = rgb.quantize(colors, method=Image.FASTOCTREE, dither=0).convert("RGB")
+    if img.mode == "RGBA":
+        reduced.putalpha(img.getchannel("A"))
+    return reduced
+
+# sRGB (D65) to XYZ conversion matrix and the D65 reference white
+RGB_TO_XYZ = (
+    (0.4124, 0.3576, 0.1805),
+    (0.2126, 0.7152, 0.0722),
+    (0.0193, 0.1192, 0.9505),
+)
+XYZ_WHITE = (95.047, 100.0, 108.883)
+
+# Constant-folded factors for the RGB -> LAB conversions
+_INV_255 = 1.0 / 255.0
+_INV_1055 = 1.0 / 1.055
+_INV_1292 = 1.0 / 12.92
+_X_SCALE = 100.0 / XYZ_WHITE[0]  # Percent scale and reference white in one factor
+_Z_SCALE = 100.0 / XYZ_WHITE[2]
+_LAB_EPS = 0.008856
+_SIXTEEN_OVER_116 = 16.0 / 116.0
+_ONE_THIRD = 1.0 / 3.0
+
+@functools.lru_cache(maxsize=None)
+def _rgb_to_xyz_matrix():
+    """Return the transposed RGB->XYZ matrix, scaled to percent and
+    pre-divided by the reference white, as float32"""
+    matrix = np.array(RGB_TO_XYZ, dtype=np.float32) * 100
+    matrix /= np.array(XYZ_WHITE, dtype=np.float32)[:, None]
+    return np.ascontiguousarray(matrix.T)
+
+def rgb2lab_batch(rgb):
+    """Convert an (N, 3) array of RGB colors to an (N, 3) float32 LAB array"""
+    c = np.asarray(rgb, dtype=np.float32).reshape(-1, 3) * _INV_255
+    
+    # sRGB gamma expansion
+    lin = np.where(c > 0.04045, ((c + 0.055) * _INV_1055) ** 2.4, c * _INV_1292)
+    
+    # Linear RGB to white-normalized XYZ in one matrix multiply
+    t = lin @ _rgb_to_xyz_matrix()
+    
+    # XYZ to Lab
+    f = np.where(t > _LAB_EPS, np.cbrt(t), 7.787 * t + _SIXTEEN_OVER_116)
+    lab = np.empty_like(f)
+    lab[:, 0] = 116 * f[:, 1] - 16
+    lab[:, 1] = 500 * (f[:, 0] - f[:, 1])
+    lab[:, 2] = 200 * (f[:, 1] - f[:, 2])
+    return lab
+
+@jit(cache=True, fastmath=True, boundscheck=False)
+def rgb2lab_scalar(r, g, b):
+    """Convert one RGB color to LAB (JIT-compiled when Numba is available)"""
+    # Normalize RGB values
+    r = r * _INV_255
+    g = g * _INV_255
+    b = b * _INV_255
+    
+    # Convert to sRGB
+    if r > 0.04045:
+        r = math.pow((r + 0.055) * _INV_1055, 2.4)
+    else:
+        r = r * _INV_1292
+        
+    if g > 0.04045:
+        g = math.pow((g + 0.055) * _INV_1055, 2.4)
+    else:
+        g = g * _INV_1292
+        
+    if b > 0.04045:
+        b = math.pow((b + 0.055) * _INV_1055, 2.4)
+    else:
+        b = b * _INV_1292
+    
+    # Convert to white-normalized XYZ
+    x = (r * 0.4124 + g * 0.3576 + b * 0.1805) * _X_SCALE
+    y = r * 0.2126 + g * 0.7152 + b * 0.0722
+    z = (r * 0.0193 + g * 0.1192 + b * 0.9505) * _Z_SCALE
+    
+    # Convert XYZ to Lab. math.pow instead of math.cbrt: Numba cannot
+    # compile cbrt and it needs Python 3.11
+    if x > _LAB_EPS:
+        x = math.pow(x, _ONE_THIRD)
+    else:
+        x = (7.787 * x) + _SIXTEEN_OVER_116
+        
+    if y > _LAB_EPS:
+        y = math.pow(y, _ONE_THIRD)
+    else:
+        y = (7.787 * y) + _SIXTEEN_OVER_116
+        
+    if z > _LAB_EPS:
+        z = math.pow(z, _ONE_THIRD)
+    else:
+        z = (7.787 * z) + _SIXTEEN_OVER_116
+    
+    return (116 * y) - 16, 500 * (x - y), 200 * (y - z)
+
+@jit(cache=True, fastmath=True, boundscheck=False)
+def delta_e_cie94_sq_scalar(L1, a1, b1, L2, a2, b2):
+    """Squared CIE94 color difference between two LAB colors
+    
+    For nearest-color searches: the ordering matches delta_e_cie94_scalar,
+    without the two square roots.
+    """
+    dL = L1 - L2
+    da = a1 - a2
+    db = b1 - b2
+    
+    c1 = math.sqrt(a1 * a1 + b1 * b1)
+    c2 = math.sqrt(a2 * a2 + b2 * b2)
+    dC = c1 - c2
+    dH2 = max(0.0, da * da + db * db - dC * dC)
+    
+    sc = 1 + 0.045 * c1
+    sh = 1 + 0.015 * c1
+    return dL * dL + (dC / sc) * (dC / sc) + dH2 / (sh * sh)
+
+@jit(cache=True, fastmath=True, boundscheck=False)
+def delta_e_cie94_scalar(L1, a1, b1, L2, a2, b2):
+    """CIE94 color difference between two LAB colors (JIT-compiled when Numba is available)"""
+    dL = L1 - L2
+    da = a1 - a2
+    db = b1 - b2
+    
+    c1 = math.sqrt(a1 * a1 + b1 * b1)
+    c2 = math.sqrt(a2 * a2 + b2 * b2)
+    
+    dC = c1 - c2
+    
+    # Only dH squared is needed - clamp it instead of taking its root,
+    # a negative value would otherwise come from rounding
+    dhSquared = max(0.0, da * da + db * db - dC * dC)
+    
+    # Weighting factors (kL = sl = 1)
+    sc = 1 + 0.045 * c1
+    sh = 1 + 0.015 * c1
+    
+    return math.sqrt(dL * dL + (dC / sc) * (dC / sc) + dhSquared / (sh * sh))
+
+def cie94_distance_sq(lab, palette_lab, palette_chroma=None):
+    """Squared CIE94 difference between each LAB color and each palette color
+    
+    lab is (N, 3) and palette_lab is (P, 3), or (N, K, 3) for a separate
+    candidate list per color; returns an (N, P) or (N, K) array. The square
+    root is skipped since it does not change which entry is closest.
+    """
+    lab = np.asarray(lab, dtype=np.float32).reshape(-1, 3)
+    if palette_chroma is None:
+        palette_chroma = np.hypot(palette_lab[..., 1], palette_lab[..., 2])
+    
+    dL = lab[:, 0:1] - palette_lab[..., 0]
+    da = lab[:, 1:2] - palette_lab[..., 1]
+    db = lab[:, 2:3] - palette_lab[..., 2]
+    
+    c1 = np.hypot(lab[:, 1:2], lab[:, 2:3])
+    dC = c1 - palette_chroma
+    dH2 = np.maximum(0.0, da * da + db * db - dC * dC)
+    
+    sc = 1 + 0.045 * c1
+    sh = 1 + 0.015 * c1
+    return dL * dL + (dC / sc) ** 2 + dH2 / (sh * sh)
+
+@jit(parallel=True, cache=True, fastmath=True)
+def quantize_lab_kernel(lab, palette_lab, palette_chroma, out):
+    """Write the index of the closest palette color (squared CIE94) for each LAB row into out
+    
+    Rows are spread across cores with prange; only worth calling when
+    Numba is available.
+    """
+    for i in prange(lab.shape[0]):
+        L = lab[i, 0]
+        a = lab[i, 1]
+        b = lab[i, 2]
+        c1 = math.sqrt(a * a + b * b)
+        sc = 1 + 0.045 * c1
+        sh = 1 + 0.015 * c1
+        
+        best = 1e18
+        best_index = 0
+        for j in range(palette_lab.shape[0]):
+            dL = L - palette_lab[j, 0]
+            da = a - palette_lab[j, 1]
+            db = b - palette_lab[j, 2]
+            dC = c1 - palette_chroma[j]
+            dH2 = max(0.0, da * da + db * db - dC * dC)
+            distance = dL * dL + (dC / sc) ** 2 + dH2 / (sh * sh)
+            if distance < best:
+                best = distance
+                best_index = j
+        out[i] = best_index
+
+# Bits per channel used to key the RGB -> palette lookup table (64 levels, 262144 entries)
+PALETTE_LUT_BITS = 6
+
+# Palettes at least this large are searched with a k-d tree over LAB (when SciPy
+# is available); the nearest candidates in Euclidean LAB are then re-ranked by CIE94
+PALETTE_TREE_MIN_SIZE = 128
+PALETTE_TREE_CANDIDATES = 8
+
+# Color names used in drawing logs
+NAMED_COLORS = {
+    (0, 0, 0): "Black",
+    (255, 255, 255): "White",
+    (255, 0, 0): "Red",
+    (0, 255, 0): "Green",
+    (0, 0, 255): "Blue",
+    (255, 255, 0): "Yellow",
+    (255, 0, 255): "Magenta",
+    (0, 255, 255): "Cyan",
+    (128, 128, 128): "Gray",
+    (128, 0, 0): "Maroon",
+    (0, 128, 0): "Dark Green",
+    (0, 0, 128): "Navy Blue",
+    (128, 128, 0): "Olive",
+    (128, 0, 128): "Purple",
+    (0, 128, 128): "Teal"
+}
+
+# Integer R, G, B weights of the weighted RGB distance (0.3, 0.59, 0.11 x 100)
+COLOR_DISTANCE_WEIGHTS = (30, 59, 11)
+COLOR_DISTANCE_SCALE = 100
+
+@functools.lru_cache(maxsize=None)
+def _named_color_table():
+    """NAMED_COLORS as an (N, 3) int64 array plus the matching tuple of names"""
+    return np.array(list(NAMED_COLORS), dtype=np.int64), tuple(NAMED_COLORS.values())
+
+@functools.lru_cache(maxsize=None)
+def _edge_enhance_kernel():
+    """3x3 edge-enhance kernel matching PIL's ImageFilter.EDGE_ENHANCE"""
+    kernel = np.full((3, 3), -1.0, dtype=np.float32)
+    kernel[1, 1] = 10.0
+    return kernel / 2.0
+
+def _spread_bits(values):
+    """Interleave zeros between the low 16 bits of each uint32 value"""
+    values = values & 0x0000FFFF
+    values = (values | (values << 8)) & 0x00FF00FF
+    values = (values | (values << 4)) & 0x0F0F0F0F
+    values = (values | (values << 2)) & 0x33333333
+    return (values | (values << 1)) & 0x55555555
+
+def morton_keys(points):
+    """Z-order (Morton) key of each point in an (N, 2) integer array"""
+    points = np.asarray(points)
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.uint32)
+    offset = points - points.min(axis=0)  # Keys need non-negative coordinates
+    xs = offset[:, 0].astype(np.uint32)
+    ys = offset[:, 1].astype(np.uint32)
+    return _spread_bits(xs) | (_spread_bits(ys) << 1)
+
+# Largest point count for the quadratic Numba tour when SciPy is missing
+PATH_NN_MAX_POINTS = 20000
+
+@jit(cache=True, fastmath=True, boundscheck=False)
+def nearest_neighbour_kernel(points, start_x, start_y, visited, out):
+    """Write a greedy nearest-neighbour visiting order of the (N, 2) points into out
+    
+    visited is an all-False (N,) scratch array. Brute force O(N^2) on squared
+    distances; only worth calling when Numba is available.
+    """
+    n = points.shape[0]
+    current_x = start_x
+    current_y = start_y
+    
+    for step in range(n):
+        best = 1e18
+        best_index = 0
+        for i in range(n):
+            if not visited[i]:
+                dx = points[i, 0] - current_x
+                dy = points[i, 1] - current_y
+                distance = dx * dx + dy * dy
+                if distance < best:
+                    best = distance
+                    best_index = i
+        visited[best_index] = True
+        out[step] = best_index
+        current_x = points[best_index, 0]
+        current_y = points[best_index, 1]
+
+def white_pixel_mask(pixels, white_threshold):
+    """Return a bool mask of the (..., 3|4) pixels whose color channels all reach white_threshold
+    
+    Takes the darkest channel with two np.minimum passes (the second in
+    place) and compares once, instead of comparing every channel and
+    combining three full-size masks.
+    """
+    darkest = np.minimum(pixels[..., 0], pixels[..., 1])
+    np.minimum(darkest, pixels[..., 2], out=darkest)
+    return darkest >= white_threshold
+
+@jit(cache=True, nogil=True, boundscheck=False)
+def drawable_pixels_kernel(flat, white_threshold, out):
+    """Write the index of every (N, 3|4) pixel row to draw into out; return how many
+    
+    Rows are skipped when all three color channels reach white_threshold
+    or, for RGBA, when alpha is 0. One pass instead of several full-size
+    NumPy masks; only worth calling when Numba or its aot_kernel() is available.
+    """
+    has_alpha = flat.shape[1] == 4
+    count = 0
+    for i in range(flat.shape[0]):
+        keep = (flat[i, 0] < white_threshold) | (flat[i, 1] < white_threshold) | (flat[i, 2] < white_threshold)
+        if has_alpha:
+            keep &= flat[i, 3] != 0
+        # Branch-free compaction: always write, only advance for kept rows
+        out[count] = i
+        count += keep
+    return count
+
+def drawable_pixel_indices(flat, white_threshold):
+    """Return the indices of the pixel rows of flat that draw_image paints
+    
+    Skips white pixels, and transparent ones for RGBA data.
+    """
+    kernel = aot_kernel("drawable_pixels_kernel") or (drawable_pixels_kernel if numba else None)
+    if kernel is not None:
+        out = np.empty(len(flat), dtype=np.int64)
+        count = kernel(np.ascontiguousarray(flat), white_threshold, out)
+        return out[:count]
+    
+    valid = ~white_pixel_mask(flat, white_threshold)
+    if flat.shape[1] == 4:
+        valid &= flat[:, 3] != 0
+    return np.flatnonzero(valid)
+
+def warm_up():
+    """Import the heavy modules and compile the drawing kernels ahead of use
+    
+    Meant for a background thread while the user is still answering a
+    prompt. Failures are only logged: the same imports are retried, with
+    their usual error handling, when the code actually needs them.
+    """
+    try:
+        # A missing required module is left for its first real use to report
+        if not all([module.preload() for module in (np, Image, pyautogui, keyboard)]):
+            return
+        for module in (cv2, scipy_spatial):
+            module.preload()
+        drawable_pixel_indices(np.zeros((1, 3), dtype=np.uint8), 245)
+        if numba.preload():
+            lab = rgb2lab_batch(np.zeros((1, 3), dtype=np.uint8))
+            quantize_lab_kernel(lab, lab, np.hypot(lab[:, 1], lab[:, 2]), np.empty(1, dtype=np.intp))
+    except Exception as e:
+        logger.debug(f"Warm-up failed: {e}")
+
+def order_drawing_path(points, start):
+    """Return an index order that visits an (N, 2) array of screen points
+    with little mouse travel, beginning near start
+    
+    With SciPy this is a greedy nearest-neighbour tour driven by a k-d tree;
+    without it the same tour is brute-forced with Numba (or the precompiled
+    kernel) for up to PATH_NN_MAX_POINTS points, and otherwise points are
+    sorted along a Z-order (Morton) curve.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    if n < 2:
+        return np.arange(n)
+    
+    if not scipy_spatial:
+        kernel = aot_kernel("nearest_neighbour_kernel") or (nearest_neighbour_kernel if numba else None)
+        if kernel is not None and n <= PATH_NN_MAX_POINTS:
+            order = np.empty(n, dtype=np.int32)
+            kernel(points.astype(np.float32), np.float32(start[0]), np.float32(start[1]),
+                   np.zeros(n, dtype=np.bool_), order)
+            return order
+        return np.argsort(morton_keys(points.astype(np.int64)), kind='stable')
+    
+    order = np.empty(n, dtype=np.intp)
+    visited = np.zeros(n, dtype=bool)
+    tree_ids = np.arange(n)
+    tree = scipy_spatial.cKDTree(points)
+    current = start
+    k = 8
+    
+    for step in range(n):
+        while True:
+            _, found = tree.query(current, k=min(k, len(tree_ids)))
+            candidates = tree_ids[np.atleast_1d(found)]
+            free = candidates[~visited[candidates]]
+            if free.size:
+                break
+            if k < 64:
+                k *= 2
+            else:
+                # The neighbourhood is used up - rebuild over the unvisited points
+                tree_ids = np.flatnonzero(~visited)
+                tree = scipy_spatial.cKDTree(points[tree_ids])
+                k = 8
+        
+        nearest = free[0]
+        visited[nearest] = True
+        order[step] = nearest
+        current = points[nearest]
+    
+    return order
+
+# Largest deviation in pixels allowed when straightening outline strokes
+STROKE_SIMPLIFY_EPSILON = 1.0
+
+def simplify_stroke(points, epsilon=STROKE_SIMPLIFY_EPSILON):
+    """Ramer-Douglas-Peucker simplification of an (N, 2) polyline
+    
+    Keeps both end points and every vertex needed for the straight lines
+    between kept vertices to stay within epsilon pixels of the original path.
+    """
+    points = np.asarray(points)
+    n = len(points)
+    if n < 3:
+        return points
+    
+    coords = points.astype(np.float64)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    spans = [(0, n - 1)]
+    
+    while spans:
+        start, end = spans.pop()
+        if end - start < 2:
+            continue
+        
+        # Distance of the inner vertices to the chord from start to end
+        inner = coords[start + 1:end] - coords[start]
+        chord = coords[end] - coords[start]
+        chord_sq = float(chord @ chord)
+        projection = np.clip(inner @ chord / chord_sq, 0.0, 1.0) if chord_sq else np.zeros(len(inner))
+        offsets = inner - projection[:, None] * chord
+        distances_sq = np.einsum('ij,ij->i', offsets, offsets)
+        
+        farthest = int(np.argmax(distances_sq))
+        if distances_sq[farthest] > epsilon * epsilon:
+            split = start + 1 + farthest
+            keep[split] = True
+            spans.append((start, split))
+            spans.append((split, end))
+    
+    return points[keep]
+
+@jit(cache=True, boundscheck=False)
+def trace_outline_kernel(remaining, seeds, neighbour_offsets, path, breaks):
+    """Walk 8-connected strokes through a padded flat uint8 bitmap
+    
+    Visits seeds in order; from each pixel still set in remaining, follows
+    the first set neighbour (in neighbour_offsets order) until none is left,
+    clearing pixels as they are visited. Flat indices are written to path and
+    the path index where each stroke starts to breaks; returns the number of
+    strokes. Mirrors the pure-Python walk in draw_image; only worth calling
+    when Numba is available.
+    """
+    length = 0
+    count = 0
+    for seed in seeds:
+        if remaining[seed] == 0:
+            continue
+        remaining[seed] = 0
+        breaks[count] = length
+        count += 1
+        path[length] = seed
+        length += 1
+        
+        current = seed
+        found = True
+        while found:
+            found = False
+            for offset in neighbour_offsets:
+                neighbour = current + offset
+                if remaining[neighbour]:
+                    remaining[neighbour] = 0
+                    path[length] = neighbour
+                    length += 1
+                    current = neighbour
+                    found = True
+                    break
+    return count
+
 class AutoDraw:
     def __init__(self):
         """Initialize AutoDraw with improved settings for precise drawing"""
         # Core properties
         self.image = None
+        self.image_path = None
+        self.image_stat = None  # os.stat of image_path, taken once when loaded
+        self.source_size = None  # (w, h) of the source, before draft decoding
+        self._working_image = None  # (source image, downsized copy) from get_working_image
         self.processed_image = None
+        self._palette_version = 0  # Bumped whenever the palette is replaced
+        self._palette_cache = {}  # Arrays and tables derived from the palette
+        self._palette_cache_key = None
         self.palette = []
+        self.palette_index_map = None  # (palette key, per-pixel palette indices) from process_image
         self.target_app = "mspaint"
         self.style = "pixel"
         self.resolution = 1.0
@@ -1233,8 +2421,10 @@ class AutoDraw:
         self.stop_drawing = False
         
         # Drawing area and color positions
+        self.last_window = None  # {"hwnd": ..., "title": ...} of the last selected target window
         self.canvas_area = None  # (x1, y1, x2, y2)
         self.color_positions = {}  # {(r,g,b): (x,y)}
+        self.palette_position_cache = {}  # {(r,g,b): (x,y)} found on screen during one drawing
         
         # Drawing optimization settings
         self.skip_white = True  # Skip white pixels
@@ -1243,7 +2433,7 @@ class AutoDraw:
         self.precision_value = 50  # 0-100, balance between speed and precision
         
         # Configuration file path
-        self.config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings.json")
+        self.config_file = os.path.join(_HERE, "settings.json")
         
         # Load saved settings
         self.load_settings()
@@ -1264,7 +2454,9 @@ class AutoDraw:
             },
             "palette": self.palette if isinstance(self.palette, list) else [],
             "canvas_area": self.canvas_area,
-            "color_positions": {str(k): v for k, v in self.color_positions.items()} if self.color_positions else {}
+            "last_window": self.last_window,
+            # Stored as [[r, g, b], [x, y]] pairs so loading needs no string parsing
+            "color_positions": [[list(k), list(v)] for k, v in self.color_positions.items()] if self.color_positions else []
         }
         
         try:
@@ -1274,8 +2466,7 @@ class AutoDraw:
                 os.makedirs(config_dir)
                 
             # Save with pretty formatting for better human readability
-            with open(self.config_file, 'w') as f:
-                json.dump(settings, f, indent=4)
+            write_json_atomic(self.config_file, settings)
                 
             logger.info(f"Settings saved successfully to {self.config_file}")
             return True
@@ -1307,6 +2498,10 @@ class AutoDraw:
             if "speed" in settings:
                 self.speed = float(settings["speed"])
                 
+            # Last selected target window (re-validated before use)
+            if settings.get("last_window"):
+                self.last_window = dict(settings["last_window"])
+                
             # Load drawing area if available
             if "canvas_area" in settings and settings["canvas_area"]:
                 self.canvas_area = tuple(settings["canvas_area"])
@@ -1315,22 +2510,9 @@ class AutoDraw:
             if "palette" in settings and settings["palette"]:
                 self.palette = settings["palette"]
                 
-            # Load color positions if available, converting string keys back to tuples
+            # Load color positions if available
             if "color_positions" in settings and settings["color_positions"]:
-                color_positions = {}
-                for key, value in settings["color_positions"].items():
-                    # Handle both string format "(r,g,b)" and legacy format "r,g,b"
-                    if key.startswith("(") and key.endswith(")"):
-                        # Modern format
-                        color = eval(key)  # Convert string tuple to actual tuple
-                    else:
-                        # Legacy format
-                        r, g, b = map(int, key.split(","))
-                        color = (r, g, b)
-                        
-                    color_positions[color] = tuple(value)
-                    
-                self.color_positions = color_positions
+                self.color_positions = parse_color_positions(settings["color_positions"])
                 
             # Load optimization settings
             if "drawing" in settings:
@@ -1354,7 +2536,6 @@ class AutoDraw:
             logger.error(f"Error loading settings: {e}")
             return False
     
-    @error_handler
     def load_image(self, source):
         """Load image from file path, URL, or BytesIO object with improved error handling
         
@@ -1364,80 +2545,132 @@ class AutoDraw:
         Returns:
             bool: True if image loaded successfully, False otherwise
         """
+        loaded = self.open_image(source)
+        if loaded is None:
+            return False
+        self.set_loaded_image(loaded)
+        return True
+    
+    @error_handler
+    def open_image(self, source):
+        """Decode an image without making it the current one
+        
+        Safe to call from a worker thread: nothing on self is modified.
+        Pass the result to set_loaded_image to install it.
+        
+        Args:
+            source: Can be a string file path, URL string, or BytesIO object
+            
+        Returns:
+            LoadedImage, or None if the image could not be loaded
+        """
         try:
-            # Clear any previous image data
-            self.image = None
-            self.processed_image = None
-            self.preview_image = None
+            image_path = None
+            image_stat = None
             
             # Handle different source types
             if isinstance(source, BytesIO):
                 # Direct BytesIO data (like from URL)
-                self.image = Image.open(source)
-                self.image_filename = "image_from_url.jpg"
-                self.image_path = None
+                image = Image.open(source)
+                image_filename = "image_from_url.jpg"
                 
             elif isinstance(source, str):
                 # Check if source is a URL
-                if re.match(r'^https?://', source):
+                if source.startswith(URL_SCHEMES):
                     try:
-                        # Use headers to avoid rejection by some servers
-                        headers = {
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                            'Accept': 'image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
-                            'Accept-Language': 'en-US,en;q=0.9',
-                            'Referer': 'https://www.google.com/'
-                        }
-                        
-                        # Set reasonable timeout
-                        response = requests.get(source, headers=headers, timeout=10)
-                        
-                        if response.status_code != 200:
-                            raise ConnectionError(f"Failed to download image. Status code: {response.status_code}")
+                        # Set reasonable timeout and stream the body straight into PIL
+                        with get_http_session().get(source, timeout=10, stream=True) as response:
+                            if response.status_code != 200:
+                                raise ConnectionError(f"Failed to download image. Status code: {response.status_code}")
+                                
+                            # Check content type to verify it's an image, unless the
+                            # URL already names an image file (some hosts serve those
+                            # as application/octet-stream)
+                            ext = os.path.splitext(urlparse(source).path)[1].lower()
+                            content_type = response.headers.get('Content-Type', '')
+                            if ext not in IMAGE_URL_EXTENSIONS and not content_type.startswith('image/'):
+                                raise ValueError(f"URL does not point to an image. Content-Type: {content_type}")
                             
-                        # Check content type to verify it's an image
-                        content_type = response.headers.get('Content-Type', '')
-                        if not content_type.startswith('image/'):
-                            raise ValueError(f"URL does not point to an image. Content-Type: {content_type}")
+                            response.raw.decode_content = True
+                            image = Image.open(response.raw)
+                            # Finish decoding before the connection is closed
+                            image.load()
                             
-                        self.image = Image.open(BytesIO(response.content))
-                        self.image_filename = os.path.basename(source) or "image_from_url.jpg"
-                        self.image_path = None
+                        image_filename = os.path.basename(source) or "image_from_url.jpg"
                         
                     except requests.RequestException as e:
                         raise ConnectionError(f"Network error while fetching image: {e}")
                         
                 else:
-                    # Local file path
-                    if not os.path.isfile(source):
+                    # Local file path - stat it once; the result also keys
+                    # the on-disk caches for this image
+                    try:
+                        image_stat = os.stat(source)
+                    except OSError:
+                        image_stat = None
+                    if image_stat is None or not stat.S_ISREG(image_stat.st_mode):
                         raise FileNotFoundError(f"Image file not found: {source}")
                         
-                    self.image = Image.open(source)
-                    self.image_path = os.path.abspath(source)
-                    self.image_filename = os.path.basename(source)
+                    image = Image.open(source)
+                    image_path = os.path.abspath(source)
+                    image_filename = os.path.basename(source)
             else:
                 raise TypeError("Unsupported source type. Must be a file path, URL, or BytesIO object.")
             
-            # Ensure image is in RGB mode for consistent processing
-            if self.image.mode != 'RGB':
-                self.image = self.image.convert('RGB')
+            # Size of the source image, before any reduced-size decoding
+            source_size = image.size
+            
+            # When the drawing will be downscaled anyway, let the JPEG decoder
+            # produce a smaller image directly (no effect once already decoded).
+            # Only files on disk can be reopened at full size later, so URL and
+            # BytesIO sources are always decoded in full
+            if image.format == 'JPEG' and self.resolution < 1.0 and image_path is not None:
+                width, height = source_size
+                image.draft('RGB', (max(1, int(width * self.resolution)), max(1, int(height * self.resolution))))
+            
+            # Ensure image is in RGB mode for consistent processing; RGBA is
+            # kept as-is and flattened by process_image
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGB')
                 
-            # Save image dimensions and log success
-            self.image_width, self.image_height = self.image.size
-            print(f"Image loaded successfully: {self.image_width}x{self.image_height} pixels")
+            # Log success
+            print(f"Image loaded successfully: {source_size[0]}x{source_size[1]} pixels")
             
-            return True
+            return LoadedImage(image, image_path, image_filename, image_stat, source_size)
             
         except (IOError, OSError) as e:
             print(f"Error opening image file: {e}")
-            return False
+            return None
         except requests.exceptions.RequestException as e:
             print(f"Error downloading image from URL: {e}")
-            return False
+            return None
         except Exception as e:
             print(f"Unexpected error loading image: {e}")
             traceback.print_exc()
-            return False
+            return None
+    
+    def set_loaded_image(self, loaded, working=None):
+        """Make a LoadedImage from open_image the current image
+        
+        working, if given, is its make_working_image copy, already built.
+        """
+        self.image, self.image_path, self.image_filename, self.image_stat, self.source_size = loaded
+        self.processed_image = None
+        self.preview_image = None
+        self.image_width, self.image_height = loaded.source_size
+        if working is not None:
+            self._working_image = (loaded.image, working)
+    
+    def get_working_image(self):
+        """Return the loaded image capped at WORKING_IMAGE_SIZE on its longer side
+        
+        Built once per loaded image, so repeated previews and processing at
+        moderate resolutions resample from it instead of the full source.
+        """
+        if self._working_image is None or self._working_image[0] is not self.image:
+            working = make_working_image(self.image, self.image_path, self.image_stat)
+            self._working_image = (self.image, working)
+        return self._working_image[1]
     
     @error_handler
     def load_palette(self, palette_path):
@@ -1449,14 +2682,19 @@ class AutoDraw:
                 with open(palette_path, 'r') as f:
                     self.palette = json.load(f)
             elif ext == '.csv':
-                self.palette = []
-                with open(palette_path, 'r') as f:
-                    lines = f.readlines()
-                    for line in lines:
-                        parts = line.strip().split(',')
-                        if len(parts) >= 3:
-                            r, g, b = int(parts[0]), int(parts[1]), int(parts[2])
-                            self.palette.append((r, g, b))
+                try:
+                    # Parse the whole file in one vectorized pass
+                    arr = np.loadtxt(palette_path, delimiter=',', dtype=np.int64, usecols=(0, 1, 2), ndmin=2)
+                    self.palette = list(map(tuple, arr.tolist()))
+                except ValueError:
+                    # Malformed rows - fall back to the tolerant line-by-line parser
+                    self.palette = []
+                    with open(palette_path, 'r') as f:
+                        for line in f:
+                            parts = line.strip().split(',')
+                            if len(parts) >= 3:
+                                r, g, b = int(parts[0]), int(parts[1]), int(parts[2])
+                                self.palette.append((r, g, b))
             else:
                 raise Exception("Unsupported palette file format")
             
@@ -1467,67 +2705,7 @@ class AutoDraw:
     
     def get_default_palette(self, app_name):
         """Return default palette based on target application"""
-        if app_name.lower() == "mspaint" or app_name.lower() == "paint":
-            # Default MS Paint palette
-            return [
-                (0, 0, 0),       # Black
-                (127, 127, 127), # Gray
-                (136, 0, 21),    # Dark red
-                (237, 28, 36),   # Red
-                (255, 127, 39),  # Orange
-                (255, 242, 0),   # Yellow
-                (34, 177, 76),   # Green
-                (0, 162, 232),   # Blue
-                (63, 72, 204),   # Dark blue
-                (163, 73, 164),  # Purple
-                (255, 255, 255), # White
-                (195, 195, 195), # Light gray
-                (185, 122, 87),  # Brown
-                (255, 174, 201), # Pink
-                (255, 201, 14),  # Gold
-                (239, 228, 176), # Light yellow
-                (181, 230, 29),  # Light green
-                (153, 217, 234), # Light blue
-                (112, 146, 190), # Medium blue
-                (200, 191, 231)  # Lavender
-            ]
-        elif app_name.lower() == "gartic" or app_name.lower() == "gartic phone":
-            # Default Gartic Phone palette
-            return [
-                (0, 0, 0),       # Black
-                (102, 102, 102), # Dark gray
-                (170, 170, 170), # Light gray
-                (255, 255, 255), # White
-                (124, 77, 54),   # Brown
-                (198, 120, 87),  # Light brown
-                (240, 156, 118), # Beige
-                (242, 178, 55),  # Orange
-                (252, 215, 3),   # Yellow
-                (253, 253, 150), # Light yellow
-                (108, 224, 134), # Light green
-                (54, 180, 107),  # Green
-                (39, 127, 70),   # Dark green
-                (135, 242, 255), # Light blue
-                (34, 177, 214),  # Blue
-                (28, 101, 140),  # Dark blue
-                (158, 114, 189), # Purple
-                (120, 71, 135),  # Dark purple
-                (255, 110, 166), # Pink
-                (255, 18, 64)    # Red
-            ]
-        else:
-            # Basic default palette
-            return [
-                (0, 0, 0),       # Black
-                (127, 127, 127), # Gray
-                (255, 0, 0),     # Red
-                (0, 255, 0),     # Green
-                (0, 0, 255),     # Blue
-                (255, 255, 0),   # Yellow
-                (0, 255, 255),   # Cyan
-                (255, 0, 255),   # Magenta
-                (255, 255, 255)  # White
-            ]
+        return list(DEFAULT_PALETTES.get(app_name.lower(), BASIC_PALETTE))
     
     def find_closest_color(self, color):
         """Enhanced method to find the closest color in the palette to the given color
@@ -1535,118 +2713,198 @@ class AutoDraw:
         if not self.palette:
             return color
         
-        r, g, b = color
-        min_distance = float('inf')
-        closest_color = None
-        
-        # Convert RGB to LAB color space for better perceptual matching
-        lab1 = self.rgb2lab(color)
-        
-        for palette_color in self.palette:
-            # Convert palette color to LAB
-            lab2 = self.rgb2lab(palette_color)
+        # Answers are memoized until the palette changes
+        closest = self._palette_cached("closest", dict)
+        key = tuple(color)
+        if key not in closest:
+            palette_lab, palette_chroma = self.get_palette_lab()
+            lab = rgb2lab_batch((key,))
             
-            # Calculate delta E (CIE94 color difference)
-            distance = self.delta_e_cie94(lab1, lab2)
-            
-            if distance < min_distance:
-                min_distance = distance
-                closest_color = palette_color
-        
-        return closest_color
+            # Large palettes: only re-rank the nearest candidates from the k-d tree
+            tree = self.get_palette_tree()
+            if tree is not None:
+                _, candidates = tree.query(lab, k=min(PALETTE_TREE_CANDIDATES, len(self.palette)))
+                distances = cie94_distance_sq(lab, palette_lab[candidates], palette_chroma[candidates])
+                index = int(candidates[0, np.argmin(distances)])
+            else:
+                # Compare against the whole palette at once in LAB space
+                distances = cie94_distance_sq(lab, palette_lab, palette_chroma)
+                index = int(np.argmin(distances))
+            closest[key] = self.palette[index]
+        return closest[key]
     
-    def rgb2lab(self, rgb):
-        """Convert RGB color to LAB color space for better perceptual matching"""
-        r, g, b = rgb
+    def quantize_to_palette(self, rgb, chunk_size=65536):
+        """Return the index of the closest palette color (CIE94) for each row of an (N, 3) RGB array
         
-        # Normalize RGB values
-        r = r / 255.0
-        g = g / 255.0
-        b = b / 255.0
+        Uses the parallel Numba kernel when available; otherwise pixels are
+        processed with NumPy in chunks to bound the size of the (chunk, P)
+        distance matrix.
+        """
+        palette_lab, palette_chroma = self.get_palette_lab()
+        rgb = np.asarray(rgb).reshape(-1, 3)
+        indices = np.empty(len(rgb), dtype=np.intp)
+        
+        if numba:
+            quantize_lab_kernel(rgb2lab_batch(rgb), palette_lab, palette_chroma, indices)
+            return indices
+        
+        tree = self.get_palette_tree()
+        k = min(PALETTE_TREE_CANDIDATES, len(self.palette))
+        
+        for start in range(0, len(rgb), chunk_size):
+            lab = rgb2lab_batch(rgb[start:start + chunk_size])
+            if tree is not None:
+                # Re-rank each pixel's nearest tree candidates by CIE94
+                _, candidates = tree.query(lab, k=k, workers=-1)
+                distances = cie94_distance_sq(lab, palette_lab[candidates], palette_chroma[candidates])
+                best = distances.argmin(axis=1)
+                indices[start:start + chunk_size] = candidates[np.arange(len(best)), best]
+            else:
+                distances = cie94_distance_sq(lab, palette_lab, palette_chroma)
+                indices[start:start + chunk_size] = distances.argmin(axis=1)
         
-        # Convert to sRGB - use if-else instead of logical operators
-        if r > 0.04045:
-            r = ((r + 0.055) / 1.055) ** 2.4
-        else:
-            r = r / 12.92
-            
-        if g > 0.04045:
-            g = ((g + 0.055) / 1.055) ** 2.4
-        else:
-            g = g / 12.92
-            
-        if b > 0.04045:
-            b = ((b + 0.055) / 1.055) ** 2.4
-        else:
-            b = b / 12.92
+        return indices
+    
+    @property
+    def palette(self):
+        """The palette as a list of (r, g, b) tuples"""
+        return self._palette
+    
+    @palette.setter
+    def palette(self, colors):
+        self._palette = [tuple(int(v) for v in color[:3]) for color in colors] if colors else []
+        self.palette_changed()
+    
+    @property
+    def color_positions(self):
+        """Picked screen positions of palette colors as {(r, g, b): (x, y)}"""
+        return self._color_positions
+    
+    @color_positions.setter
+    def color_positions(self, positions):
+        self._color_positions = dict(positions) if positions else {}
+        self._color_position_arrays = None
+    
+    def get_color_position_arrays(self):
+        """Return color_positions as parallel (N, 3) color and (N, 2) position int64 arrays"""
+        if self._color_position_arrays is None:
+            self._color_position_arrays = (
+                np.array(list(self._color_positions), dtype=np.int64).reshape(-1, 3),
+                np.array(list(self._color_positions.values()), dtype=np.int64).reshape(-1, 2)
+            )
+        return self._color_position_arrays
+    
+    def find_color_position(self, color, tolerance=20):
+        """Return the picked (x, y) of the positioned color closest to color, or None
         
-        # Convert to XYZ
-        x = (r * 0.4124 + g * 0.3576 + b * 0.1805) * 100
-        y = (r * 0.2126 + g * 0.7152 + b * 0.0722) * 100
-        z = (r * 0.0193 + g * 0.1192 + b * 0.9505) * 100
+        Only colors within tolerance (weighted RGB distance) count, so a color
+        without a position of its own is never drawn with a different one.
+        """
+        if not self._color_positions:
+            return None
         
-        # Convert XYZ to Lab
-        x /= 95.047
-        y /= 100.0
-        z /= 108.883
+        colors, positions = self.get_color_position_arrays()
+        differences = colors - np.asarray(color[:3], dtype=np.int64)
+        distances = (differences * differences) @ COLOR_DISTANCE_WEIGHTS
+        closest = int(np.argmin(distances))
+        if distances[closest] > tolerance * tolerance * COLOR_DISTANCE_SCALE:
+            return None
+        return tuple(positions[closest].tolist())
+    
+    def palette_changed(self):
+        """Drop arrays derived from the palette; call after modifying it in place"""
+        self._palette_version += 1
+    
+    def palette_key(self):
+        """Identify the current palette contents for caches
         
-        # Use if-else instead of logical operators
-        if x > 0.008856:
-            x = x ** (1/3)
-        else:
-            x = (7.787 * x) + (16/116)
-            
-        if y > 0.008856:
-            y = y ** (1/3)
-        else:
-            y = (7.787 * y) + (16/116)
-            
-        if z > 0.008856:
-            z = z ** (1/3)
-        else:
-            z = (7.787 * z) + (16/116)
+        The length is included so in-place appends are noticed even without
+        a palette_changed() call.
+        """
+        return (self._palette_version, len(self._palette))
+    
+    def _palette_cached(self, name, build):
+        """Return a value derived from the palette, rebuilding it after the palette changes"""
+        key = self.palette_key()
+        if self._palette_cache_key != key:
+            self._palette_cache = _DEFAULT_PALETTE_CACHES.get(tuple(self._palette))
+            if self._palette_cache is None:
+                self._palette_cache = {}
+            self._palette_cache_key = key
+        if name not in self._palette_cache:
+            self._palette_cache[name] = build()
+        return self._palette_cache[name]
+    
+    def get_palette_arrays(self):
+        """Return the palette as a (P, 3) uint8 array, its (P, 3) float32 LAB values and their chroma"""
+        def build():
+            palette_np = np.asarray(self._palette, dtype=np.uint8).reshape(-1, 3)
+            palette_lab = rgb2lab_batch(palette_np)
+            palette_c1 = np.hypot(palette_lab[:, 1], palette_lab[:, 2])
+            return palette_np, palette_lab, palette_c1
+        return self._palette_cached("arrays", build)
+    
+    def get_palette_lab(self):
+        """Return the palette in LAB space and its chroma, cached until the palette changes"""
+        _, palette_lab, palette_c1 = self.get_palette_arrays()
+        return palette_lab, palette_c1
+    
+    def get_palette_lut(self):
+        """Return the RGB -> palette index lookup table, built once per palette
         
-        L = (116 * y) - 16
-        a = 500 * (x - y)
-        b = 200 * (y - z)
+        The table is keyed by the top PALETTE_LUT_BITS bits of each channel;
+        each entry holds the CIE94 match for the center of its RGB bucket.
+        """
+        def build():
+            levels = 1 << PALETTE_LUT_BITS
+            step = 256 // levels
+            centers = np.arange(levels, dtype=np.uint8) * step + step // 2
+            r, g, b = np.meshgrid(centers, centers, centers, indexing='ij')
+            centroids = np.stack((r, g, b), axis=-1).reshape(-1, 3)
+            return self.quantize_to_palette(centroids).astype(np.int32)
+        return self._palette_cached("lut", build)
+    
+    def quantize_with_lut(self, rgb):
+        """Map uint8 RGB values (shape (..., 3)) to palette indices with a single table lookup"""
+        shift = 8 - PALETTE_LUT_BITS
+        rgb = np.asarray(rgb, dtype=np.uint8)
+        keys = (rgb[..., 0] >> shift).astype(np.intp) << (2 * PALETTE_LUT_BITS)
+        keys |= (rgb[..., 1] >> shift).astype(np.intp) << PALETTE_LUT_BITS
+        keys |= rgb[..., 2] >> shift
+        return self.get_palette_lut()[keys]
+    
+    def get_palette_image(self):
+        """Return a 1x1 "P" image carrying the palette, for PIL's C-level quantize
         
-        return (L, a, b)
+        Unused palette slots repeat the first color so they can never win a match.
+        """
+        def build():
+            colors = self._palette[:256]
+            colors = colors + [colors[0]] * (256 - len(colors))
+            palette_image = Image.new("P", (1, 1))
+            palette_image.putpalette([value for color in colors for value in color])
+            return palette_image
+        return self._palette_cached("image", build)
+    
+    def get_palette_tree(self):
+        """Return a k-d tree over the palette LAB values, or None for small
+        palettes or when SciPy is not installed"""
+        if len(self._palette) < PALETTE_TREE_MIN_SIZE or not scipy_spatial:
+            return None
+        return self._palette_cached("tree", lambda: scipy_spatial.cKDTree(self.get_palette_lab()[0]))
+    
+    def rgb2lab(self, rgb):
+        """Convert RGB color to LAB color space for better perceptual matching"""
+        r, g, b = rgb
+        return rgb2lab_scalar(float(r), float(g), float(b))
     
     def delta_e_cie94(self, lab1, lab2):
         """Calculate CIE94 color difference between two LAB colors"""
-        L1, a1, b1 = lab1
-        L2, a2, b2 = lab2
-        
-        dL = L1 - L2
-        da = a1 - a2
-        db = b1 - b2
-        
-        c1 = (a1 ** 2 + b1 ** 2) ** 0.5
-        c2 = (a2 ** 2 + b2 ** 2) ** 0.5
-        
-        dC = c1 - c2
-        
-        # Ensure we don't get a negative value under the square root
-        # which would result in a complex number
-        dhSquared = da ** 2 + db ** 2 - dC ** 2
-        if dhSquared < 0:
-            dH = 0  # Avoid complex numbers
-        else:
-            dH = dhSquared ** 0.5
-        
-        # Parameters
-        kL = 1
-        k1 = 0.045
-        k2 = 0.015
-        
-        sl = 1
-        sc = 1 + k1 * c1
-        sh = 1 + k2 * c1
-        
-        # Delta E calculation
-        dE = ((dL / (kL * sl)) ** 2 + (dC / sc) ** 2 + (dH / sh) ** 2) ** 0.5
-        
-        return dE
+        return delta_e_cie94_scalar(*lab1, *lab2)
+    
+    def delta_e_cie94_sq(self, lab1, lab2):
+        """Squared CIE94 difference - cheaper when only comparing distances"""
+        return delta_e_cie94_sq_scalar(*lab1, *lab2)
     
     @error_handler
     def process_image(self):
@@ -1663,15 +2921,41 @@ class AutoDraw:
             return False
             
         try:
-            # Work with a copy to preserve original
-            img = self.image.copy()
-            
-            # Apply resolution scaling
-            if self.resolution != 1.0:
-                width, height = img.size
-                new_width = int(width * self.resolution)
-                new_height = int(height * self.resolution)
-                img = img.resize((new_width, new_height), Image.LANCZOS)
+            self.palette_index_map = None
+            
+            # Apply resolution scaling relative to the source size
+            width, height = self.source_size or self.image.size
+            new_width = int(width * self.resolution)
+            new_height = int(height * self.resolution)
+            
+            # Work with a copy to preserve original - of the capped working
+            # copy when it is big enough, so the full source (possibly never
+            # decoded, with a cached working copy) isn't touched
+            working = self.get_working_image()
+            if working is not self.image and working.width >= new_width and working.height >= new_height:
+                img = working.copy()
+            else:
+                img = self.image.copy()
+                
+                # A reduced-size JPEG decode may be too small if the resolution
+                # was raised after loading - go back to the full image
+                if (img.width < new_width or img.height < new_height) and img.size != (width, height) and self.image_path:
+                    logger.info("Reloading full-size image for the current resolution")
+                    self.image = Image.open(self.image_path)
+                    if self.image.mode not in ('RGB', 'RGBA'):
+                        self.image = self.image.convert('RGB')
+                    img = self.image.copy()
+            
+            if img.size != (new_width, new_height):
+                scale = img.width / new_width
+                if img.width > new_width and img.height > new_height:
+                    if abs(scale - round(scale)) < 0.01 and round(scale) * new_height == img.height:
+                        # Integer downscale - a box-filter reduce is much cheaper than LANCZOS
+                        img = img.reduce(round(scale))
+                
+                # Other downscales (with a fast preliminary reduce), upscaling
+                if img.size != (new_width, new_height):
+                    img = resize_image(img, (new_width, new_height), Image.LANCZOS, reducing_gap=3.0)
                 logger.info(f"Resized image to {new_width}x{new_height} (resolution: {self.resolution}x)")
             
             # Convert image to RGB mode for consistent processing
@@ -1681,31 +2965,26 @@ class AutoDraw:
             # Special handling for white pixels - mark them in alpha channel 
             # This helps with efficient white pixel skipping during drawing
             if hasattr(self, 'skip_white') and self.skip_white:
-                # Convert to RGBA to add alpha channel
-                img_rgba = img.convert("RGBA")
-                pixel_data = img_rgba.load()
-                width, height = img_rgba.size
+                # Read the RGB pixels once and build the RGBA array directly,
+                # rather than converting to RGBA in PIL and copying that again
+                rgb = pil_to_np(img)
                 
-                # Set alpha=0 for white pixels (make them transparent)
+                # Set alpha=0 for white or near-white pixels (make them transparent)
                 white_threshold = 245
-                white_count = 0
-                total_pixels = width * height
-                
-                for y in range(height):
-                    for x in range(width):
-                        r, g, b, a = pixel_data[x, y]
-                        # Check if pixel is white or near-white
-                        if r >= white_threshold and g >= white_threshold and b >= white_threshold:
-                            # Make white pixel transparent
-                            pixel_data[x, y] = (r, g, b, 0)
-                            white_count += 1
+                mask = white_pixel_mask(rgb, white_threshold)
+                arr = np.empty(rgb.shape[:2] + (4,), dtype=np.uint8)
+                arr[:, :, :3] = rgb
+                np.logical_not(mask, out=arr[:, :, 3])
+                arr[:, :, 3] *= 255
+                white_count = int(np.count_nonzero(mask))
+                total_pixels = mask.size
                 
                 # Log statistics about white pixels
                 white_percentage = (white_count / total_pixels) * 100
                 logger.info(f"Marked {white_count} white pixels as transparent ({white_percentage:.1f}% of image)")
                 
-                # Update the image
-                img = img_rgba
+                # Update the image; the RGBA array is wrapped, not copied
+                img = np_to_pil(arr)
             
             # Apply style-specific processing
             if self.style == "outline":
@@ -1723,35 +3002,50 @@ class AutoDraw:
                 
             elif self.style == "vector":
                 # For vector style, apply smoothing and edge preservation
-                # First apply slight blur to reduce noise
-                img = img.filter(ImageFilter.GaussianBlur(radius=0.5))
-                
-                # Then enhance edges
-                img = img.filter(ImageFilter.EDGE_ENHANCE)
-                
-                # Apply posterization to reduce colors (if cv2 is available)
                 if cv2:
-                    # Convert PIL image to cv2 format
-                    cv_img = np.array(img)
-                    cv_img = cv2.cvtColor(cv_img, cv2.COLOR_RGB2BGR)
+                    # Work on the RGB planes directly - the bilateral filter is
+                    # per-channel symmetric, so no BGR round trip is needed
+                    arr = pil_to_np(img)
+                    rgb = np.ascontiguousarray(arr[:, :, :3])
                     
-                    # Apply bilateral filter to smooth while preserving edges
-                    cv_img = cv2.bilateralFilter(cv_img, 9, 75, 75)
+                    # Bilateral filter smooths noise while preserving edges,
+                    # which also covers the light pre-blur
+                    rgb = cv2.bilateralFilter(rgb, 9, 75, 75)
                     
-                    # Convert back to PIL image
-                    cv_img = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-                    img = Image.fromarray(cv_img)
+                    # Enhance edges with the same kernel as PIL's EDGE_ENHANCE
+                    rgb = cv2.filter2D(rgb, -1, _edge_enhance_kernel())
+                    
+                    # Keep the white-pixel alpha mask, if any
+                    if arr.shape[2] == 4:
+                        rgb = np.dstack((rgb, arr[:, :, 3]))
+                    img = np_to_pil(rgb)
                     logger.info("Applied vector processing with bilateral filter")
                 else:
                     # Fall back to simpler processing if OpenCV not available
+                    img = img.filter(ImageFilter.GaussianBlur(radius=0.5))
+                    img = img.filter(ImageFilter.EDGE_ENHANCE)
                     img = img.filter(ImageFilter.SMOOTH)
                     logger.info("Applied basic vector processing (OpenCV not available)")
             
             else:  # pixel style
-                # For pixel style, quantize colors to match palette
-                # No additional processing needed beyond palette matching
+                # For pixel style, match every pixel to the palette in C with
+                # PIL (nearest color in RGB); draw_image reuses the index map
+                if self.palette and len(self.palette) <= 256:
+                    quantized = img.convert("RGB").quantize(palette=self.get_palette_image(), dither=0)
+                    index_map = np.asarray(quantized)
+                    index_map = np.where(index_map < len(self.palette), index_map, 0)  # Padding slots repeat color 0
+                    self.palette_index_map = (self.palette_key(), index_map)
+                elif not self.palette:
+                    # Otherwise draw_image would switch color for every distinct
+                    # color of the image
+                    img = reduce_colors(img)
+                    logger.info(f"No palette set - reduced the image to at most {AUTO_PALETTE_COLORS} colors")
                 logger.info("Using pixel style drawing mode")
             
+            # Drawing expects 3- or 4-channel uint8 data
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGB")
+            
             # Store the processed image
             self.processed_image = img
             
@@ -1766,14 +3060,71 @@ class AutoDraw:
             logger.error(traceback.format_exc())
             return False
     
+    def process_image_cached(self):
+        """process_image, reusing the stored result of an identical earlier run
+        
+        Results for local images are kept in IMAGE_CACHE_DIR next to the
+        working copies, keyed by processed_cache_path.
+        """
+        cache_path = processed_cache_path(self)
+        cached = load_processed_cache(cache_path) if cache_path else None
+        if cached is not None:
+            pixels, index_map = cached
+            self.processed_image = np_to_pil(pixels)
+            self.preview_image = self.processed_image.copy()
+            self.palette_index_map = (self.palette_key(), index_map) if index_map is not None else None
+            logger.info(f"Using cached processed image: {self.processed_image.width}x{self.processed_image.height}")
+            return True
+        
+        if not self.process_image():
+            return False
+        if cache_path:
+            index_map = self.palette_index_map[1] if self.palette_index_map else None
+            save_processed_cache(cache_path, self.processed_image, index_map)
+        return True
+    
     @error_handler
-    def find_target_window(self):
-        """Find available windows for drawing target selection with improved detection and filtering"""
+    def activate_last_window(self):
+        """Bring the last selected target window to the front if it still exists
+        
+        Returns:
+            dict: The window info, or None if there is no usable cached window
+        """
+        window = self.last_window
+        if not window or sys.platform != 'win32' or 'win32gui' not in sys.modules:
+            return None
+        
+        hwnd = window.get("hwnd")
+        try:
+            # Window handles can be reused, so the title must still match
+            if not (hwnd and win32gui.IsWindow(hwnd) and win32gui.IsWindowVisible(hwnd)
+                    and win32gui.GetWindowText(hwnd) == window.get("title")):
+                return None
+            win32gui.SetForegroundWindow(hwnd)
+        except Exception as e:
+            logger.warning(f"Could not reactivate last window: {e}")
+            return None
+        
+        logger.info(f"Reactivated last window: '{window['title']}' with hwnd: {hwnd}")
+        return window
+    
+    def find_target_window(self, force_select=False):
+        """Find available windows for drawing target selection with improved detection and filtering
+        
+        The previously selected window is reused without showing the dialog
+        while it still exists, unless force_select is True.
+        """
         try:
             # First try the more robust win32gui method
             if sys.platform == 'win32' and 'win32gui' in sys.modules:
                 import win32gui  # pylint: disable=unused-import,reimported
                 
+                # Skip enumeration and the dialog when the last window is still valid
+                if not force_select:
+                    window = self.activate_last_window()
+                    if window:
+                        return window
+                
                 # Get list of windows with more information
                 windows = []
                 
@@ -1914,8 +3265,16 @@ class AutoDraw:
                                 display_text += f" ({window['width']}x{window['height']})"
                             window_listbox.insert(tk.END, display_text)
                 
-                # Connect search variable to update function
-                search_var.trace("w", update_listbox)
+                # Connect search variable to update function, rebuilding the
+                # list once typing pauses rather than on every keystroke
+                search_after = [None]
+                
+                def schedule_update_listbox(*args):
+                    if search_after[0] is not None:
+                        dialog.after_cancel(search_after[0])
+                    search_after[0] = dialog.after(150, update_listbox)
+                
+                search_var.trace("w", schedule_update_listbox)
                 
                 # Fill initial window list
                 update_listbox()
@@ -1999,6 +3358,7 @@ class AutoDraw:
                 if selected_window[0]:
                     hwnd = selected_window[0]["hwnd"]
                     title = selected_window[0]["title"]
+                    self.last_window = {"hwnd": hwnd, "title": title}
                     
                     try:
                         # Attempt to activate the window and bring it to front
@@ -2056,21 +3416,23 @@ class AutoDraw:
         logger.info(f"  - Number of colors in palette: {len(self.palette)}")
         logger.info(f"  - Color positions defined: {len(self.color_positions)}")
 
-        # Reset stop flag
+        # Reset stop flag; Esc is polled by stop_requested between drawing
+        # steps, so drop any press from before the drawing started
         self.stop_drawing = False
+        esc_pressed()
         
-        # Install keyboard handler for ESC key
-        keyboard.on_press_key("esc", lambda _: self.stop_drawing_callback())
+        # Palette buttons may have moved since the last drawing
+        self.palette_position_cache.clear()
         
         try:
             # Get image data
-            img_data = np.array(self.processed_image)
+            img_data = pil_to_np(self.processed_image)
             height, width = img_data.shape[:2]
             
             # If canvas area is not set, use the center of the screen
             if not self.canvas_area:
                 logger.info("Canvas area not set, using screen center")
-                screen_width, screen_height = pyautogui.size()
+                screen_width, screen_height = get_screen_size()
                 x1 = (screen_width - width) // 2
                 y1 = (screen_height - height) // 2
                 self.canvas_area = (x1, y1, x1 + width, y1 + height)
@@ -2087,11 +3449,6 @@ class AutoDraw:
             # Move mouse to drawing area
             pyautogui.moveTo(x1, y1)
             time.sleep(0.5)  # Give time to move
-
-            # Optimize pyautogui for speed
-            pyautogui.MINIMUM_DURATION = 0
-            pyautogui.MINIMUM_SLEEP = 0
-            pyautogui.PAUSE = 0
             
             # Drawing styles
             if self.style == "pixel":
@@ -2108,36 +3465,58 @@ class AutoDraw:
                 
                 # Preprocess to group pixels by color for more efficient drawing
                 logger.info("Preprocessing image to group pixels by color...")
-                for y in range(height):
-                    for x in range(width):
-                        # Get color at pixel
-                        if len(img_data.shape) == 3:
-                            pixel_color = tuple(img_data[y, x][:3])  # RGB
-                        else:
-                            # Grayscale
-                            pixel_color = (img_data[y, x], img_data[y, x], img_data[y, x])
-                        
-                        # Skip white pixels
-                        if all(c >= white_threshold for c in pixel_color):
-                            skipped_pixels += 1
-                            continue
-                            
-                        # Skip transparent pixels
-                        if len(img_data.shape) == 3 and img_data.shape[2] == 4 and img_data[y, x][3] == 0:
-                            skipped_pixels += 1
-                            continue
-                        
-                        # Find closest color in palette
-                        target_color = self.find_closest_color(pixel_color)
-                        
-                        # Add to color group
-                        if target_color not in pixels_by_color:
-                            pixels_by_color[target_color] = []
-                        
-                        # Store pixel position
-                        pos_x = x1 + (x * pixel_width) + (pixel_width / 2)
-                        pos_y = y1 + (y * pixel_height) + (pixel_height / 2)
-                        pixels_by_color[target_color].append((pos_x, pos_y))
+                # process_image always produces RGB or RGBA
+                flat = img_data.reshape(-1, img_data.shape[2])
+                
+                # Skip white pixels, and transparent ones for RGBA images
+                valid = drawable_pixel_indices(flat, white_threshold)
+                skipped_pixels = len(flat) - len(valid)
+                
+                # Find the closest palette color for all remaining pixels in one pass
+                rgb = flat[valid, :3]
+                if self.palette:
+                    target_colors = self.palette
+                    index_map = self.palette_index_map
+                    if (index_map is not None and index_map[0] == self.palette_key()
+                            and index_map[1].shape == (height, width)):
+                        # Reuse the palette matching done by process_image
+                        color_indices = index_map[1].reshape(-1)[valid]
+                    else:
+                        color_indices = self.quantize_with_lut(rgb)
+                else:
+                    # Distinct colors through packed 24-bit codes - one 1-D unique
+                    # instead of the much slower row-wise np.unique(axis=0), with
+                    # the colors in the same order
+                    codes = (rgb[:, 0].astype(np.int32) << 16) | (rgb[:, 1].astype(np.int32) << 8) | rgb[:, 2]
+                    unique_codes, color_indices = np.unique(codes, return_inverse=True)
+                    target_colors = np.column_stack(
+                        (unique_codes >> 16, (unique_codes >> 8) & 255, unique_codes & 255)).tolist()
+                    color_indices = color_indices.reshape(-1)
+                
+                # Palettes may repeat a color - map every palette index to its
+                # distinct color first so each color is one group
+                group_colors, group_of_index = np.unique(
+                    np.asarray(target_colors, dtype=np.int64).reshape(-1, 3), axis=0, return_inverse=True)
+                group_ids = group_of_index.reshape(-1)[color_indices]
+                
+                # Screen positions of the pixel centers in one global sort: by group,
+                # so each color's pixels form one contiguous slice, then along a
+                # Z-order curve so each slice is already spatially coherent
+                pixel_ys, pixel_xs = np.divmod(valid, width)
+                order = np.lexsort((morton_keys(np.column_stack((pixel_xs, pixel_ys))), group_ids))
+                pixel_xs = pixel_xs[order]
+                pixel_ys = pixel_ys[order]
+                positions = np.column_stack((
+                    x1 + (pixel_xs + 0.5) * pixel_width,
+                    y1 + (pixel_ys + 0.5) * pixel_height
+                ))
+                counts = np.bincount(group_ids, minlength=len(group_colors))
+                offsets = np.concatenate(([0], np.cumsum(counts)))
+                
+                # Add to color groups
+                for index in np.flatnonzero(counts).tolist():
+                    target_color = tuple(group_colors[index].tolist())
+                    pixels_by_color[target_color] = positions[offsets[index]:offsets[index + 1]]
                 
                 # Log preprocessing results
                 total_pixels = height * width
@@ -2145,12 +3524,19 @@ class AutoDraw:
                 logger.info(f"Skipping {skipped_pixels} white/transparent pixels ({skipped_pixels/total_pixels*100:.1f}% of image)")
                 logger.info(f"Will draw {total_pixels - skipped_pixels} pixels")
                 
-                # Sort colors from darkest to lightest for better visual progress
-                sorted_colors = sorted(pixels_by_color.keys(), key=lambda c: sum(c))
+                # Sort colors from darkest to lightest (perceptual L*) for better visual progress
+                group_colors = list(pixels_by_color)
+                lightness = rgb2lab_batch(group_colors)[:, 0]
+                sorted_colors = [group_colors[i] for i in np.argsort(lightness, kind='stable').tolist()]
                 
-                # Draw each color group
-                for color in sorted_colors:
-                    if self.stop_drawing:
+                # Largest screen step between neighbouring image pixels (diagonal
+                # neighbours included)
+                adjacent_step = max(pixel_width, pixel_height) * 1.001
+                
+                # Draw each color group - pixels come already ordered into a short
+                # path, prepared on a worker thread while earlier colors draw
+                for color, path in self.iter_color_paths(sorted_colors, pixels_by_color):
+                    if self.stop_requested():
                         logger.info("Drawing stopped by user")
                         return True
                     
@@ -2159,69 +3545,48 @@ class AutoDraw:
                     current_color = color
                     time.sleep(max(0.2, self.speed * 2))  # Ensure color is selected
                     
-                    # Get pixels for this color
-                    pixels = pixels_by_color[color]
                     color_name = self.get_color_name(color) if hasattr(self, 'get_color_name') else str(color)
-                    logger.info(f"Drawing {len(pixels)} pixels with color {color_name}")
+                    logger.info(f"Drawing {len(path)} pixels with color {color_name}")
                     
-                    # Group pixels into clusters for more efficient drawing
-                    # This reduces mouse travel distance
-                    GRID_SIZE = 20
-                    grid_cells = {}
-                    
-                    # Organize pixels into grid cells
-                    for pos_x, pos_y in pixels:
-                        grid_x = int((pos_x - x1) // GRID_SIZE)
-                        grid_y = int((pos_y - y1) // GRID_SIZE)
-                        cell_key = (grid_x, grid_y)
+                    # At full speed neighbouring pixels are dragged as strokes and
+                    # the rest clicked in batches; with a delay each pixel is still
+                    # its own click (no strokes), paced against a running deadline
+                    # so short delays add up to one real sleep
+                    pixel_delay = self.speed / 3 if self.speed > 0 else 0  # Faster drawing within same color
+                    if pixel_delay <= 0:
+                        batch_size, stroke_step = CLICK_BATCH_SIZE, adjacent_step
+                    else:
+                        batch_size, stroke_step = 1, -1
+                    next_deadline = time.perf_counter()
+                    for is_stroke, batch in self.plan_pixel_steps(path, stroke_step, batch_size):
+                        if self.stop_requested():
+                            logger.info("Drawing stopped by user")
+                            return True
                         
-                        if cell_key not in grid_cells:
-                            grid_cells[cell_key] = []
+                        if is_stroke:
+                            # Neighbouring pixels: one press dragged through them
+                            set_cursor_pos(*batch[0].tolist())
+                            pyautogui.mouseDown(_pause=False)
+                            move_points(batch[1:])
+                            pyautogui.mouseUp(_pause=False)
+                        else:
+                            click_points(batch)
                         
-                        grid_cells[cell_key].append((pos_x, pos_y))
-                    
-                    # Process each cell
-                    for cell_pixels in grid_cells.values():
-                        # Sort pixels within cell for optimal path
-                        if len(cell_pixels) > 1:
-                            # Start with first pixel
-                            sorted_pixels = [cell_pixels[0]]
-                            remaining = cell_pixels[1:]
-                            
-                            # Find nearest neighbor each time
-                            while remaining:
-                                last = sorted_pixels[-1]
-                                nearest_idx = 0
-                                nearest_dist = float('inf')
-                                
-                                for i, pixel in enumerate(remaining):
-                                    dist = ((pixel[0] - last[0])**2 + (pixel[1] - last[1])**2)**0.5
-                                    if dist < nearest_dist:
-                                        nearest_dist = dist
-                                        nearest_idx = i
-                                
-                                sorted_pixels.append(remaining.pop(nearest_idx))
-                            
-                            cell_pixels = sorted_pixels
+                        previous_drawn = pixels_drawn
+                        pixels_drawn += len(batch)
                         
-                        # Draw pixels in cell
-                        for pos_x, pos_y in cell_pixels:
-                            if self.stop_drawing:
-                                logger.info("Drawing stopped by user")
-                                return True
-                            
-                            # Move and click with minimal delay
-                            pyautogui.moveTo(pos_x, pos_y, duration=0)
-                            pyautogui.click()
-                            
-                            pixels_drawn += 1
-                            
-                            # Minimal delay between pixels of same color
-                            if self.speed > 0:
-                                time.sleep(self.speed / 3)  # Faster drawing within same color
+                        # Minimal delay between pixels of same color - sleep only once
+                        # the deadline is a full timer tick ahead, never to catch up
+                        if pixel_delay:
+                            next_deadline += pixel_delay * len(batch)
+                            now = time.perf_counter()
+                            if next_deadline - now > SLEEP_GRANULARITY:
+                                time.sleep(next_deadline - now)
+                            elif next_deadline < now:
+                                next_deadline = now
                         
                         # Log progress periodically
-                        if pixels_drawn % 500 == 0:
+                        if pixels_drawn // 500 > previous_drawn // 500:
                             elapsed = time.time() - start_time
                             pixels_per_second = pixels_drawn / elapsed if elapsed > 0 else 0
                             percent_complete = (pixels_drawn / (total_pixels - skipped_pixels)) * 100
@@ -2236,27 +3601,24 @@ class AutoDraw:
                 # For outline drawing, implement more efficient outline detection and drawing
                 logger.info("Using outline drawing style")
                 
-                # Find all outline pixels (dark pixels)
-                outline_pixels = []
-                for y in range(height):
-                    for x in range(width):
-                        pixel = self.processed_image.getpixel((x, y))
-                        # Only dark pixels are considered part of the outline
-                        if sum(pixel) < 450:
-                            outline_pixels.append((x, y))
+                # Find all outline pixels (dark pixels) - channel sums in one pass
+                # straight over the uint8 buffer, alpha included as before
+                channels = np.asarray(self.processed_image)
+                outline_mask = np.add.reduce(channels, axis=-1, dtype=np.uint16) < 450
+                ys, xs = np.nonzero(outline_mask)
                 
                 # Calculate total pixels for progress tracking
-                total_points = len(outline_pixels)
+                total_points = len(xs)
                 
                 if total_points == 0:
                     messagebox.showinfo("Notice", "No outline pixels found in the image")
                     return False
                 
                 # Select black color for outline
-                black_color = self.find_closest_color((0, 0, 0))
-                if self.color_positions and black_color in self.color_positions:
-                    color_x, color_y = self.color_positions[black_color]
-                    pyautogui.click(color_x, color_y)
+                black_position = self.find_color_position(self.find_closest_color((0, 0, 0)))
+                if black_position:
+                    color_x, color_y = black_position
+                    pyautogui.click(color_x, color_y, _pause=False)
                     time.sleep(0.3)
                 else:
                     # If color position not set, prompt user
@@ -2268,81 +3630,101 @@ class AutoDraw:
                 
                 logger.info("Drawing outline...")
                 
-                # Group connected pixels into line segments
-                visited = set()
+                # Group connected pixels into line segments. Pixels still to be
+                # visited live in a flat bitmap with a one-pixel empty border, so
+                # each neighbour test is a single lookup with no bounds checks
+                mask_height, mask_width = outline_mask.shape
+                stride = mask_width + 2
+                remaining = bytearray((mask_height + 2) * stride)
+                padded = np.frombuffer(remaining, dtype=np.uint8).reshape(mask_height + 2, stride)
+                padded[1:-1, 1:-1] = outline_mask
                 line_segments = []
                 
-                # Define directions for connected neighbors
-                directions = [(-1,-1), (-1,0), (-1,1), (0,-1), (0,1), (1,-1), (1,0), (1,1)]
+                # Flat offsets of the connected neighbors, in (dx, dy) order
+                # (-1,-1), (-1,0), (-1,1), (0,-1), (0,1), (1,-1), (1,0), (1,1)
+                neighbour_offsets = (-stride - 1, -1, stride - 1, -stride, stride, -stride + 1, 1, stride + 1)
+                
+                seeds = (ys + 1) * stride + (xs + 1)
                 
-                # Group connected points into line segments
-                for point in outline_pixels:
-                    x, y = point
-                    if (x, y) in visited or self.stop_drawing:
-                        continue
+                if numba:
+                    # Same walk compiled to native code, then split into strokes
+                    path = np.empty(len(seeds), dtype=np.int64)
+                    breaks = np.empty(len(seeds) + 1, dtype=np.int64)
+                    count = trace_outline_kernel(padded.reshape(-1), seeds.astype(np.int64),
+                                                 np.array(neighbour_offsets, dtype=np.int64), path, breaks)
+                    breaks[count] = len(seeds)
+                    path_ys, path_xs = np.divmod(path, stride)
+                    strokes = np.column_stack((path_xs - 1, path_ys - 1))
+                    bounds = zip(breaks[:count].tolist(), breaks[1:count + 1].tolist())
+                    line_segments = [strokes[begin:end] for begin, end in bounds if end - begin > 1]
+                else:
+                    # Group connected points into line segments
+                    for start in seeds.tolist():
+                        if not remaining[start] or self.stop_drawing:
+                            continue
                     
-                    # Start a new line segment
-                    segment = [(x, y)]
-                    visited.add((x, y))
+                        # Start a new line segment
+                        segment = [start]
+                        remaining[start] = 0
                     
-                    # Find connected points
-                    current = (x, y)
-                    while not self.stop_drawing:
-                        found_next = False
-                        for dx, dy in directions:
-                            nx, ny = current[0] + dx, current[1] + dy
-                            if (nx, ny) in outline_pixels and (nx, ny) not in visited:
-                                segment.append((nx, ny))
-                                visited.add((nx, ny))
-                                current = (nx, ny)
-                                found_next = True
+                        # Find connected points
+                        current = start
+                        while not self.stop_drawing:
+                            for offset in neighbour_offsets:
+                                neighbour = current + offset
+                                if remaining[neighbour]:
+                                    segment.append(neighbour)
+                                    remaining[neighbour] = 0
+                                    current = neighbour
+                                    break
+                            else:
                                 break
-                        
-                        if not found_next:
-                            break
                     
-                    # Add complete segment
-                    if len(segment) > 1:
-                        line_segments.append(segment)
+                        # Add complete segment as (x, y) image coordinates
+                        if len(segment) > 1:
+                            seg_ys, seg_xs = np.divmod(np.array(segment), stride)
+                            line_segments.append(np.column_stack((seg_xs - 1, seg_ys - 1)))
+                
+                # Visit segments nearest-first from the cursor so the pen
+                # travels less between strokes
+                if line_segments:
+                    starts = np.array([segment[0] for segment in line_segments]) + (x1, y1)
+                    order = order_drawing_path(starts, get_cursor_pos())
+                    line_segments = [line_segments[i] for i in order.tolist()]
                 
                 # Draw each line segment
                 points_drawn = 0
                 for i, segment in enumerate(line_segments):
-                    if self.stop_drawing:
+                    if self.stop_requested():
                         break
                     
                     # Move to the beginning of the segment
-                    first_x, first_y = segment[0]
+                    first_x, first_y = segment[0].tolist()
                     pos_x = x1 + first_x
                     pos_y = y1 + first_y
-                    pyautogui.moveTo(pos_x, pos_y)
+                    pyautogui.moveTo(pos_x, pos_y, _pause=False)
                     
                     # Press down to draw a connected line
-                    pyautogui.mouseDown()
+                    pyautogui.mouseDown(_pause=False)
                     
-                    # Draw the line segment
-                    for j, (x, y) in enumerate(segment[1:]):
-                        try:
-                            # Move to the next point in the line
-                            pos_x = x1 + x
-                            pos_y = y1 + y
-                            pyautogui.moveTo(pos_x, pos_y, _pause=False)
+                    # Draw the line segment - the program joins consecutive mouse
+                    # positions with straight lines, so only the vertices of the
+                    # simplified stroke are needed
+                    try:
+                        move_points(simplify_stroke(segment)[1:] + (x1, y1))
+                        
+                        # Update progress
+                        previous_drawn = points_drawn
+                        points_drawn += len(segment) - 1
+                        if points_drawn // 100 > previous_drawn // 100:
+                            percent_complete = (points_drawn / total_points) * 100
+                            logger.info(f"Outline progress: {points_drawn}/{total_points} points ({percent_complete:.1f}%)")
                             
-                            # Short delay for drawing accuracy
-                            if j % 5 == 0:
-                                time.sleep(self.speed * 0.5)
-                                
-                            # Update progress
-                            points_drawn += 1
-                            if points_drawn % 100 == 0:
-                                percent_complete = (points_drawn / total_points) * 100
-                                logger.info(f"Outline progress: {points_drawn}/{total_points} points ({percent_complete:.1f}%)")
-                                
-                        except Exception as e:
-                            logger.error(f"Error while drawing outline: {e}")
+                    except Exception as e:
+                        logger.error(f"Error while drawing outline: {e}")
                     
                     # Release to finish the line segment
-                    pyautogui.mouseUp()
+                    pyautogui.mouseUp(_pause=False)
                     
                     # Short delay between segments
                     time.sleep(self.speed)
@@ -2350,20 +3732,108 @@ class AutoDraw:
                 # Log completion
                 logger.info(f"Outline drawing completed: {points_drawn} points drawn")
             
-            # Clean up and return
-            keyboard.unhook_all()
             return True
             
         except Exception as e:
             logger.error(f"Error in drawing image: {e}")
             logger.error(traceback.format_exc())
             messagebox.showerror("Error", f"Failed to draw image: {str(e)}")
-            keyboard.unhook_all()
             return False
     
+    def iter_color_paths(self, colors, pixels_by_color):
+        """Yield (color, ordered path) for each color group, in order
+        
+        Paths are ordered with order_drawing_path on a worker thread, up to
+        PATH_PREFETCH colors ahead, so ordering the next color overlaps with
+        drawing the current one. Each path starts from where the previous
+        one ended.
+        """
+        prepared = queue.Queue(maxsize=PATH_PREFETCH)
+        cancelled = threading.Event()
+        
+        def put(item):
+            # Give up once the consumer is gone instead of blocking forever
+            while not cancelled.is_set():
+                try:
+                    prepared.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        
+        def produce():
+            # None marks the end of the paths; an exception is handed over
+            # to be raised in the drawing thread
+            end = None
+            start = get_cursor_pos()
+            try:
+                for color in colors:
+                    pixels = pixels_by_color[color]
+                    path = pixels[order_drawing_path(pixels, start)]
+                    if not put((color, path)):
+                        return
+                    if len(path):
+                        start = path[-1]
+            except Exception as e:
+                logger.error(f"Error preparing drawing paths: {e}")
+                end = e
+            finally:
+                put(end)
+        
+        threading.Thread(target=produce, daemon=True).start()
+        try:
+            while True:
+                item = prepared.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
+    
+    def plan_pixel_steps(self, path, adjacent_step, batch_size):
+        """Split an ordered (N, 2) pixel path into drawing steps
+        
+        Yields (is_stroke, points): runs of neighbouring pixels (consecutive
+        steps of at most adjacent_step screen pixels on both axes) become a
+        single stroke, and the isolated pixels between them are grouped into
+        click batches of up to batch_size. A negative adjacent_step makes
+        every pixel an isolated one.
+        """
+        if len(path) == 0:
+            return
+        
+        breaks = np.flatnonzero(np.abs(np.diff(path, axis=0)).max(axis=1) > adjacent_step) + 1
+        starts = np.concatenate(([0], breaks))
+        ends = np.concatenate((breaks, [len(path)]))
+        
+        clicks_from = None  # Start of the pending run of isolated pixels
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if end - start == 1:
+                if clicks_from is None:
+                    clicks_from = start
+                continue
+            
+            if clicks_from is not None:
+                for begin in range(clicks_from, start, batch_size):
+                    yield False, path[begin:min(begin + batch_size, start)]
+                clicks_from = None
+            yield True, path[start:end]
+        
+        if clicks_from is not None:
+            for begin in range(clicks_from, len(path), batch_size):
+                yield False, path[begin:begin + batch_size]
+    
     def stop_drawing_callback(self):
         """Callback function to stop drawing when Esc is pressed"""
         self.stop_drawing = True
+    
+    def stop_requested(self):
+        """Return whether drawing should stop, polling the Esc key first"""
+        if not self.stop_drawing and esc_pressed():
+            self.stop_drawing_callback()
+        return self.stop_drawing
         
     def set_canvas_area(self, canvas_area):
         """Set the drawing canvas area"""
@@ -2378,6 +3848,13 @@ class AutoDraw:
         try:
             self.target_color = color
             
+            # Positions picked by the user take precedence over screen scanning
+            position = self.find_color_position(color)
+            if position:
+                pyautogui.click(position[0], position[1], _pause=False)
+                time.sleep(0.2)
+                return True
+            
             # Get color selection coords for common apps
             if self.target_app.lower() in ["mspaint", "paint"]:
                 # MS Paint color palette coordinates and handling
@@ -2386,7 +3863,7 @@ class AutoDraw:
                 color_x, color_y = self.find_closest_color_in_palette(color)
                 
                 if color_x and color_y:
-                    pyautogui.click(color_x, color_y)
+                    pyautogui.click(color_x, color_y, _pause=False)
                     time.sleep(0.2)
                     return True
                 
@@ -2411,7 +3888,7 @@ class AutoDraw:
                             # Check if this pixel matches our target color with tolerance
                             if self.is_color_similar(pixel_color, color, tolerance):
                                 # Click this color in the actual screen coordinates
-                                pyautogui.click(palette_region[0] + x, palette_region[1] + y)
+                                pyautogui.click(palette_region[0] + x, palette_region[1] + y, _pause=False)
                                 time.sleep(0.2)
                                 found = True
                                 break
@@ -2425,7 +3902,7 @@ class AutoDraw:
             
             # Generic approach for other applications
             # Implement a color picker dialog using tkinter
-            color_hex = "#{:02x}{:02x}{:02x}".format(color[0], color[1], color[2])
+            color_hex = rgb_to_hex(tuple(color))
             
             if not hasattr(self, 'color_picker_shown'):
                 self.color_picker_shown = False
@@ -2454,7 +3931,7 @@ class AutoDraw:
         color_window.attributes("-topmost", True)
         
         # Color indicator panel
-        color_hex = "#{:02x}{:02x}{:02x}".format(color[0], color[1], color[2])
+        color_hex = rgb_to_hex(tuple(color))
         color_panel = tk.Frame(color_window, bg=color_hex, width=100, height=50)
         color_panel.pack(pady=10)
         
@@ -2468,6 +3945,10 @@ class AutoDraw:
         
     def find_closest_color_in_palette(self, color):
         """Find the closest color in the MS Paint palette"""
+        cached = self.palette_position_cache.get(tuple(color))
+        if cached:
+            return cached
+        
         try:
             # First try to use fixed coordinates for standard MS Paint palette
             palette_regions = [
@@ -2480,7 +3961,7 @@ class AutoDraw:
             ]
             
             target_rgb = color
-            min_distance = float('inf')
+            min_distance = float('inf')  # Squared weighted RGB distance
             best_x, best_y = None, None
             
             for palette in palette_regions:
@@ -2494,52 +3975,53 @@ class AutoDraw:
                         cell_width = region[2] // grid_width
                         cell_height = region[3] // grid_height
                         
-                        for row in range(grid_height):
-                            for col in range(grid_width):
-                                # Get center of each color cell
-                                x = region[0] + (col * cell_width) + (cell_width // 2)
-                                y = region[1] + (row * cell_height) + (cell_height // 2)
-                                
-                                # Sample color at this position
-                                try:
-                                    sample = pyautogui.screenshot(region=(x-1, y-1, 3, 3))
-                                    sample_color = sample.getpixel((1, 1))  # Center pixel
-                                    
-                                    distance = self.color_distance(sample_color, target_rgb)
-                                    if distance < min_distance:
-                                        min_distance = distance
-                                        best_x, best_y = x, y
-                                except Exception:
-                                    continue
+                        # Sample the center of each color cell from the region
+                        # screenshot already taken
+                        centers_x = np.arange(grid_width) * cell_width + cell_width // 2
+                        centers_y = np.arange(grid_height) * cell_height + cell_height // 2
+                        samples = np.asarray(screenshot.convert("RGB"), dtype=np.int64)
+                        cells = samples[centers_y[:, None], centers_x[None, :]]
+                        
+                        differences = cells - np.asarray(target_rgb[:3], dtype=np.int64)
+                        distances = (differences * differences) @ COLOR_DISTANCE_WEIGHTS / COLOR_DISTANCE_SCALE
+                        row, col = np.unravel_index(int(np.argmin(distances)), distances.shape)
+                        if distances[row, col] < min_distance:
+                            min_distance = float(distances[row, col])
+                            best_x = region[0] + int(centers_x[col])
+                            best_y = region[1] + int(centers_y[row])
                     else:
-                        # For extended color palettes or custom layouts, scan pixel by pixel
-                        width, height = screenshot.size
+                        # For extended color palettes or custom layouts, scan every
+                        # 5th pixel of the screenshot at once
+                        samples = np.asarray(screenshot.convert("RGB"), dtype=np.float32)[::5, ::5]
+                        r, g, b = samples[..., 0], samples[..., 1], samples[..., 2]
+                        
+                        # Ignore white/gray background pixels (same test as is_gray_or_white)
+                        avg = (r + g + b) / 3
+                        background = (((r > 240) & (g > 240) & (b > 240))
+                                      | ((np.abs(r - avg) < 10) & (np.abs(g - avg) < 10) & (np.abs(b - avg) < 10)))
+                        
+                        # Weighted RGB distance, squared (see color_distance)
+                        distance_sq = ((r - target_rgb[0]) ** 2 * 0.3 + (g - target_rgb[1]) ** 2 * 0.59
+                                       + (b - target_rgb[2]) ** 2 * 0.11)
+                        distance_sq[background] = np.inf
                         
-                        for y in range(0, height, 5):  # Sample every 5 pixels for efficiency
-                            for x in range(0, width, 5):
-                                try:
-                                    pixel_color = screenshot.getpixel((x, y))
-                                    
-                                    # Ignore white/gray background pixels
-                                    if self.is_gray_or_white(pixel_color):
-                                        continue
-                                        
-                                    distance = self.color_distance(pixel_color, target_rgb)
-                                    if distance < min_distance:
-                                        min_distance = distance
-                                        best_x, best_y = region[0] + x, region[1] + y
-                                except Exception:
-                                    continue
+                        best = int(np.argmin(distance_sq))
+                        distance = float(distance_sq.flat[best])
+                        if distance < min_distance:
+                            min_distance = distance
+                            sample_y, sample_x = divmod(best, distance_sq.shape[1])
+                            best_x, best_y = region[0] + sample_x * 5, region[1] + sample_y * 5
                 except Exception as e:
                     print(f"Error scanning palette region: {e}")
                     continue
                 
                 # If we found a close match, return it
-                if min_distance < 50 and best_x and best_y:
+                if min_distance < 50 * 50 and best_x and best_y:
+                    self.palette_position_cache[tuple(color)] = (best_x, best_y)
                     return best_x, best_y
             
             # If no good match found in palette regions, try to find it in the main window
-            if min_distance > 50 or not best_x or not best_y:
+            if min_distance > 50 * 50 or not best_x or not best_y:
                 # Try to find the "Edit Colors" button and click it
                 try:
                     edit_colors_btn = pyautogui.locateOnScreen('auto_draw/resources/edit_colors.png', 
@@ -2580,55 +4062,42 @@ class AutoDraw:
         
     def color_distance(self, color1, color2):
         """Calculate Euclidean distance between two colors"""
+        return math.sqrt(self.color_distance_sq(color1, color2))
+    
+    def color_distance_sq(self, color1, color2):
+        """Squared weighted RGB distance - same ordering as color_distance, no square root"""
         if len(color1) >= 3 and len(color2) >= 3:
-            r1, g1, b1 = color1[0], color1[1], color1[2]
-            r2, g2, b2 = color2[0], color2[1], color2[2]
+            dr = int(color2[0]) - int(color1[0])
+            dg = int(color2[1]) - int(color1[1])
+            db = int(color2[2]) - int(color1[2])
             
-            # Weighted RGB distance (human eyes are more sensitive to green)
-            return ((r2-r1)**2 * 0.3 + (g2-g1)**2 * 0.59 + (b2-b1)**2 * 0.11) ** 0.5
+            # Weighted RGB distance (human eyes are more sensitive to green),
+            # summed in integers with the weights scaled by 100
+            wr, wg, wb = COLOR_DISTANCE_WEIGHTS
+            return (wr * dr * dr + wg * dg * dg + wb * db * db) / COLOR_DISTANCE_SCALE
         
         return float('inf')
     
     def is_color_similar(self, color1, color2, tolerance=20):
         """Check if two colors are similar within tolerance"""
-        return self.color_distance(color1, color2) <= tolerance
+        return self.color_distance_sq(color1, color2) <= tolerance * tolerance
 
     def get_color_name(self, color):
         """Get name for a color"""
-        color_names = {
-            (0, 0, 0): "Black",
-            (255, 255, 255): "White",
-            (255, 0, 0): "Red",
-            (0, 255, 0): "Green",
-            (0, 0, 255): "Blue",
-            (255, 255, 0): "Yellow",
-            (255, 0, 255): "Magenta",
-            (0, 255, 255): "Cyan",
-            (128, 128, 128): "Gray",
-            (128, 0, 0): "Maroon",
-            (0, 128, 0): "Dark Green",
-            (0, 0, 128): "Navy Blue",
-            (128, 128, 0): "Olive",
-            (128, 0, 128): "Purple",
-            (0, 128, 128): "Teal"
-        }
-        
         # Find exact match
-        if color in color_names:
-            return color_names[color]
-        
-        # Find closest named color
-        min_distance = float('inf')
-        closest_name = "Custom Color"
+        if color in NAMED_COLORS:
+            return NAMED_COLORS[color]
         
-        for named_color, name in color_names.items():
-            distance = self.color_distance(color, named_color)
-            if distance < min_distance:
-                min_distance = distance
-                closest_name = name
+        # Find closest named color - all squared distances at once
+        named_colors, names = _named_color_table()
+        differences = named_colors - np.asarray(color[:3], dtype=np.int64)
+        distances = (differences * differences) @ COLOR_DISTANCE_WEIGHTS
+        closest = int(np.argmin(distances))
+        min_distance = int(distances[closest])
+        closest_name = names[closest]
         
         # Only return the name if it's reasonably close
-        if min_distance < 30:
+        if min_distance < 30 * 30 * COLOR_DISTANCE_SCALE:
             return f"{closest_name}-like"
         else:
             return f"RGB({color[0]},{color[1]},{color[2]})"
@@ -2670,17 +4139,42 @@ class AutoDrawGUI:
         self.palette_var = tk.StringVar(value="default")
         self.photo_img = None  # Reference for displayed image
         
-        # Load recent files
-        self.recent_files = []
+        # Load recent files (most recent first, oldest dropped automatically)
+        self.recent_files = collections.deque(maxlen=MAX_RECENT_FILES)
         self.load_recent_files()
         
         # Create drawing area selector
         self.drawing_area_selector = DrawingAreaSelector(self.lang)
         
+        # Named fonts, resolved by Tk once instead of from a tuple per use
+        self._fonts = {
+            name: tkfont.Font(self.root, family=spec[0], size=spec[1], weight=spec[2] if len(spec) > 2 else "normal")
+            for name, spec in GUI_FONTS.items()
+        }
+        
         # Set up custom styles
+        self._style_cache = {}  # {style name: {option: last value sent to Tk}}
+        self._pending = set()  # keys of updates already queued by _coalesce
+        self._preview_after = None  # pending debounced preview repaint
+        self._preview_generation = 0  # bumped per preview request; stale results are dropped
+        self._load_generation = 0  # preview generation of the latest image load
+        self._preview_lock = threading.Lock()
+        self._preview_shown = None  # (source image, canvas size) currently drawn
+        self._preview_item = None  # canvas image item showing the preview
+        self._preview_buf = None  # canvas-sized RGBA buffer the preview is centred in
+        self._settings_save_lock = threading.Lock()
+        self._draw_countdown = None  # pending after() id while counting down to a drawing
         self.apply_theme()
         
+        # Route the mousewheel to whichever canvas is active - bound once so
+        # handlers cannot pile up across widget rebuilds
+        self._active_scroll_canvas = None
+        self.root.bind_all("<MouseWheel>", self._on_mousewheel_dispatch)
+        
         # Create UI widgets
+        self._i18n_vars = {}  # {translation key: StringVar shown by widgets}
+        self._i18n_widgets = []  # [(widget, translation key)] for widgets without textvariable
+        self._opt_vars_ready = False  # set once create_widgets has made the optimization vars
         self.create_widgets()
         
         # Create menu
@@ -2704,9 +4198,11 @@ class AutoDrawGUI:
                 with open(config_file, 'r') as f:
                     settings = json.load(f)
                 if "recent_files" in settings:
-                    self.recent_files = settings["recent_files"]
                     # Filter out files that no longer exist
-                    self.recent_files = [f for f in self.recent_files if os.path.exists(f)]
+                    self.recent_files = collections.deque(
+                        (f for f in settings["recent_files"] if os.path.exists(f)),
+                        maxlen=MAX_RECENT_FILES
+                    )
         except Exception as e:
             print(f"Error loading recent files: {e}")
             
@@ -2720,10 +4216,9 @@ class AutoDrawGUI:
             else:
                 settings = {}
                 
-            settings["recent_files"] = self.recent_files
+            settings["recent_files"] = list(self.recent_files)
             
-            with open(config_file, 'w') as f:
-                json.dump(settings, f, indent=4)
+            write_json_atomic(config_file, settings)
         except Exception as e:
             print(f"Error saving recent files: {e}")
             
@@ -2736,11 +4231,8 @@ class AutoDrawGUI:
         if file_path in self.recent_files:
             self.recent_files.remove(file_path)
             
-        # Add to the beginning
-        self.recent_files.insert(0, file_path)
-        
-        # Limit to max number
-        self.recent_files = self.recent_files[:self.max_recent_files]
+        # Add to the beginning; the deque drops the oldest past MAX_RECENT_FILES
+        self.recent_files.appendleft(file_path)
         
         # Save to settings
         self.save_recent_files()
@@ -2789,95 +4281,103 @@ class AutoDrawGUI:
     def apply_theme(self):
         """Apply the current theme to the UI with modern styling"""
         if self.theme_mode == "dark":
-            self.theme = DARK_THEME.copy()
+            self.theme = DARK_THEME
         else:
-            self.theme = LIGHT_THEME.copy()
+            self.theme = LIGHT_THEME
         
         # Configure ttk styles with modern look
         self.style = ttk.Style()
         
         # Basic element styling
-        self.style.configure("TFrame", background=self.theme["bg"])
-        self.style.configure("TLabel", background=self.theme["bg"], foreground=self.theme["fg"], font=("Segoe UI", 10))
-        self.style.configure("TLabelframe", background=self.theme["bg"], foreground=self.theme["fg"])
-        self.style.configure("TLabelframe.Label", background=self.theme["bg"], foreground=self.theme["fg"], font=("Segoe UI", 11, "bold"))
+        self._configure_style("TFrame", background=self.theme["bg"])
+        self._configure_style("TLabel", background=self.theme["bg"], foreground=self.theme["fg"], font=self._fonts["ui10"])
+        self._configure_style("TLabelframe", background=self.theme["bg"], foreground=self.theme["fg"])
+        self._configure_style("TLabelframe.Label", background=self.theme["bg"], foreground=self.theme["fg"], font=self._fonts["ui11_bold"])
         
         # Button styling - more modern look with rounded corners where possible
-        self.style.configure("TButton", 
-                            background=self.theme["control_bg"], 
-                            foreground=self.theme["fg"],
-                            font=("Segoe UI", 10),
-                            padding=5)
+        self._configure_style("TButton", 
+                             background=self.theme["control_bg"], 
+                             foreground=self.theme["fg"],
+                             font=self._fonts["ui10"],
+                             padding=5)
         self.style.map("TButton",
                       background=[('active', self.theme["hover"])],
                       foreground=[('active', self.theme["fg"])])
         
         # Accent button - prominent primary action button
-        self.style.configure("Accent.TButton", 
-                            background=self.theme["accent"], 
-                            foreground=self.theme["accent_fg"], 
-                            font=("Segoe UI", 12, "bold"),
-                            padding=8)
+        self._configure_style("Accent.TButton", 
+                             background=self.theme["accent"], 
+                             foreground=self.theme["accent_fg"], 
+                             font=self._fonts["ui12_bold"],
+                             padding=8)
         self.style.map("Accent.TButton",
                       background=[('active', self.theme["control_active"])],
                       foreground=[('active', self.theme["accent_fg"])])
         
         # Success button - for positive actions
-        self.style.configure("Success.TButton", 
-                            background=self.theme["success"], 
-                            foreground=self.theme["accent_fg"], 
-                            font=("Segoe UI", 11),
-                            padding=5)
+        self._configure_style("Success.TButton", 
+                             background=self.theme["success"], 
+                             foreground=self.theme["accent_fg"], 
+                             font=self._fonts["ui11"],
+                             padding=5)
         self.style.map("Success.TButton",
                       background=[('active', self.theme["success"])])
         
         # Info button - for neutral actions
-        self.style.configure("Info.TButton", 
-                            background=self.theme["info"], 
-                            foreground=self.theme["accent_fg"], 
-                            font=("Segoe UI", 11),
-                            padding=5)
+        self._configure_style("Info.TButton", 
+                             background=self.theme["info"], 
+                             foreground=self.theme["accent_fg"], 
+                             font=self._fonts["ui11"],
+                             padding=5)
         
         # Danger button - for destructive actions
-        self.style.configure("Danger.TButton", 
-                            background=self.theme["danger"], 
-                            foreground=self.theme["accent_fg"], 
-                            font=("Segoe UI", 11),
-                            padding=5)
+        self._configure_style("Danger.TButton", 
+                             background=self.theme["danger"], 
+                             foreground=self.theme["accent_fg"], 
+                             font=self._fonts["ui11"],
+                             padding=5)
         
         # ComboBox styling
-        self.style.configure("TCombobox", 
-                            fieldbackground=self.theme["control_bg"],
-                            background=self.theme["control_bg"],
-                            foreground=self.theme["fg"])
+        self._configure_style("TCombobox", 
+                             fieldbackground=self.theme["control_bg"],
+                             background=self.theme["control_bg"],
+                             foreground=self.theme["fg"])
         
         # Scale styling
-        self.style.configure("TScale", 
-                           background=self.theme["bg"],
-                           troughcolor=self.theme["secondary"],
-                           sliderrelief="flat")
+        self._configure_style("TScale", 
+                            background=self.theme["bg"],
+                            troughcolor=self.theme["secondary"],
+                            sliderrelief="flat")
         
         # Radiobutton styling
-        self.style.configure("TRadiobutton", 
-                           background=self.theme["bg"],
-                           foreground=self.theme["fg"],
-                           font=("Segoe UI", 10))
+        self._configure_style("TRadiobutton", 
+                            background=self.theme["bg"],
+                            foreground=self.theme["fg"],
+                            font=self._fonts["ui10"])
         
         # Status bar styling
-        self.style.configure("Status.TLabel", 
-                           background=self.theme["header_bg"],
-                           foreground=self.theme["fg"],
-                           font=("Segoe UI", 9))
+        self._configure_style("Status.TLabel", 
+                            background=self.theme["header_bg"],
+                            foreground=self.theme["fg"],
+                            font=self._fonts["ui9"])
         
         # Section header styling
-        self.style.configure("Header.TLabel", 
-                           background=self.theme["bg"],
-                           foreground=self.theme["accent"],
-                           font=("Segoe UI", 12, "bold"))
+        self._configure_style("Header.TLabel", 
+                            background=self.theme["bg"],
+                            foreground=self.theme["accent"],
+                            font=self._fonts["ui12_bold"])
         
         # Apply theme to root window
         self.root.configure(bg=self.theme["bg"])
     
+    def _configure_style(self, style_name, **options):
+        """Configure a ttk style, sending Tk only the options whose values changed"""
+        applied = self._style_cache.setdefault(style_name, {})
+        changed = {key: value for key, value in options.items() if applied.get(key) != value}
+        if changed:
+            self.style.configure(style_name, **changed)
+            applied.update(changed)
+    
     def create_menu(self):
         """Create the application menu"""
         self.menu_bar = tk.Menu(self.root)
@@ -2923,7 +4423,7 @@ class AutoDrawGUI:
         self.settings_menu.add_cascade(label=self.translations["language"], menu=self.language_menu)
         
         # Add language options
-        for lang_code, lang_name in LANGUAGES.items():
+        for lang_code, lang_name in _LANGUAGE_ITEMS:
             self.language_menu.add_command(label=lang_name, command=lambda lc=lang_code: self.change_language(lc))
         
         # Theme submenu
@@ -2947,16 +4447,32 @@ class AutoDrawGUI:
     def change_language(self, lang_code):
         """Change the UI language"""
         if lang_code != self.lang:
+            old_translations = self.translations
             self.lang = lang_code
             self.translations = TRANSLATIONS[self.lang]
             self.drawing_area_selector = DrawingAreaSelector(self.lang)
             
-            # Recreate the widgets with new language
-            for widget in self.root.winfo_children():
-                widget.destroy()
+            # Retranslate the existing widgets in place
+            for key, var in self._i18n_vars.items():
+                var.set(self.translations[key])
+            for widget, key in self._i18n_widgets:
+                widget.configure(text=self.translations[key])
+            
+            self.target_combo.configure(values=TARGET_APP_VALUES + (self.translations["custom"],))
+            if self.target_var.get() == old_translations["custom"]:
+                self.target_var.set(self.translations["custom"])
             
-            self.create_widgets()
+            # Status texts still showing their default message follow the language
+            for var, key in ((self.canvas_info_var, "not_set"),
+                             (self.color_pos_info_var, "not_set"),
+                             (self.status_var, "ready")):
+                if var.get() == old_translations[key]:
+                    var.set(self.translations[key])
+            
+            # Menu entry labels are not variable-backed, so only the menu is rebuilt
+            old_menu = self.menu_bar
             self.create_menu()
+            old_menu.destroy()
     
     def change_theme(self, theme_mode):
         """Change the UI theme"""
@@ -2964,37 +4480,29 @@ class AutoDrawGUI:
             self.theme_mode = theme_mode
             self.apply_theme()
             
-            # Recreate the widgets with new theme
-            for widget in self.root.winfo_children():
-                widget.destroy()
-            
-            self.create_widgets()
-            self.create_menu()
+            # ttk widgets follow the restyled theme; recolor the plain Tk ones
+            self.controls_canvas.configure(bg=self.theme["bg"])
+            self.preview_canvas.configure(
+                bg=self.theme["canvas_bg"],
+                highlightbackground=self.theme["border"]
+            )
+            self.no_image_label.configure(
+                background=self.theme["canvas_bg"],
+                foreground=self.theme["fg"]
+            )
     
     def show_about(self):
         """Show about dialog"""
         messagebox.showinfo(
             "About AutoDraw",
-            self.translations["version"].format(VERSION, AUTHOR)
+            self.translations["version"]
         )
     
     def show_shortcuts(self):
         """Show keyboard shortcuts dialog"""
-        shortcuts = [
-            ("Ctrl+O", "Open image file"),
-            ("Ctrl+S", "Save settings"),
-            ("F5", "Start drawing"),
-            ("F6", "Set drawing area"),
-            ("F7", "Set color positions"),
-            ("Ctrl+T", "Toggle theme"),
-            ("Esc", "Stop drawing (while drawing)")
-        ]
-        
-        shortcut_text = "\n".join([f"{key:<10} : {desc}" for key, desc in shortcuts])
-        
         messagebox.showinfo(
             "Keyboard Shortcuts",
-            f"Available keyboard shortcuts:\n\n{shortcut_text}"
+            f"Available keyboard shortcuts:\n\n{SHORTCUTS_TEXT}"
         )
     
     def create_widgets(self):
@@ -3004,26 +4512,38 @@ class AutoDrawGUI:
         main_frame.pack(fill=tk.BOTH, expand=True)
 
         # Create left panel (controls)
-        controls_frame = ttk.LabelFrame(main_frame, text=self.translations["controls"], padding=10)
+        controls_frame = self._tr_widget(ttk.LabelFrame(main_frame, padding=10), "controls")
         controls_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 5))
 
         # Create scrollable controls frame
-        controls_canvas = tk.Canvas(controls_frame)
+        controls_canvas = self.controls_canvas = tk.Canvas(
+            controls_frame,
+            bg=self.theme["bg"],
+            highlightthickness=0
+        )
         controls_scrollbar = ttk.Scrollbar(controls_frame, orient="vertical", command=controls_canvas.yview)
         controls_scrollable = ttk.Frame(controls_canvas)
 
-        controls_scrollable.bind(
-            "<Configure>",
-            lambda e: controls_canvas.configure(scrollregion=controls_canvas.bbox("all"))
-        )
+        # Recompute the scroll region once per idle cycle - <Configure> fires
+        # for every widget added while the controls are being built
+        scrollregion_pending = [False]
+        
+        def update_scrollregion():
+            scrollregion_pending[0] = False
+            controls_canvas.configure(scrollregion=controls_canvas.bbox("all"))
+        
+        def on_controls_configure(event):
+            if not scrollregion_pending[0]:
+                scrollregion_pending[0] = True
+                controls_canvas.after_idle(update_scrollregion)
+        
+        controls_scrollable.bind("<Configure>", on_controls_configure)
 
         controls_canvas.create_window((0, 0), window=controls_scrollable, anchor="nw")
         controls_canvas.configure(yscrollcommand=controls_scrollbar.set)
 
-        # Configure scrolling with mousewheel
-        def _on_mousewheel(event):
-            controls_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        controls_canvas.bind_all("<MouseWheel>", _on_mousewheel)
+        # Scroll the controls with the mousewheel (bound once in __init__)
+        self._active_scroll_canvas = controls_canvas
 
         controls_canvas.pack(side="left", fill="both", expand=True)
         controls_scrollbar.pack(side="right", fill="y")
@@ -3032,65 +4552,67 @@ class AutoDrawGUI:
         current_row = 0
         
         # Image source section
-        current_row = self.create_section_header(controls_scrollable, self.translations["image_source"], current_row)
+        current_row = self.create_section_header(controls_scrollable, self._tr_var("image_source"), current_row)
         
         # Local file button
         ttk.Button(
             controls_scrollable, 
-            text=self.translations["local_file"], 
+            textvariable=self._tr_var("local_file"), 
             command=self.select_local_file
         ).grid(row=current_row, column=0, sticky="ew", padx=5, pady=2)
         
         # URL button
         ttk.Button(
             controls_scrollable, 
-            text=self.translations["url"], 
+            textvariable=self._tr_var("url"), 
             command=self.enter_url
         ).grid(row=current_row, column=1, sticky="ew", padx=5, pady=2)
         
         current_row += 1
         
         # Target application section
-        current_row = self.create_section_header(controls_scrollable, self.translations["target_app"], current_row)
+        current_row = self.create_section_header(controls_scrollable, self._tr_var("target_app"), current_row)
         
         # Target app dropdown
         self.target_var = tk.StringVar(value="mspaint")
-        target_combo = ttk.Combobox(
+        self.target_combo = ttk.Combobox(
             controls_scrollable, 
             textvariable=self.target_var,
-            values=["mspaint", "gartic", self.translations["custom"]]
+            values=TARGET_APP_VALUES + (self.translations["custom"],)
         )
-        target_combo.grid(row=current_row, column=0, columnspan=2, sticky="ew", padx=5, pady=2)
-        target_combo.bind("<<ComboboxSelected>>", self.on_target_change)
+        self.target_combo.grid(row=current_row, column=0, columnspan=2, sticky="ew", padx=5, pady=2)
+        self.target_combo.bind("<<ComboboxSelected>>", self.on_target_change)
         
         current_row += 1
         
         # Custom target button (initially hidden)
         self.custom_target_button = ttk.Button(
             controls_scrollable,
-            text=self.translations["custom_target"],
+            textvariable=self._tr_var("custom_target"),
             command=self.select_target_window
         )
         
-        # Show if "custom" is selected
-        if self.target_var.get() == self.translations["custom"]:
-            self.custom_target_button.grid(row=current_row, column=0, columnspan=2, sticky="ew", padx=5, pady=2)
-            current_row += 1
+        # Reserve its grid slot, hidden unless "custom" is selected;
+        # on_target_change toggles it with grid()/grid_remove()
+        self.custom_target_button.grid(row=current_row, column=0, columnspan=2, sticky="ew", padx=5, pady=2)
+        if self.target_var.get() != self.translations["custom"]:
+            self.custom_target_button.grid_remove()
+        current_row += 1
         
         # Drawing area section
-        current_row = self.create_section_header(controls_scrollable, self.translations["drawing_area"], current_row)
+        current_row = self.create_section_header(controls_scrollable, self._tr_var("drawing_area"), current_row)
         
         # Set drawing area button
         ttk.Button(
             controls_scrollable, 
-            text=self.translations["set_drawing_area"], 
+            textvariable=self._tr_var("set_drawing_area"), 
             command=self.select_canvas_area
         ).grid(row=current_row, column=0, sticky="ew", padx=5, pady=2)
         
         # Reset button
         ttk.Button(
             controls_scrollable, 
-            text=self.translations["reset"], 
+            textvariable=self._tr_var("reset"), 
             command=self.reset_canvas_area
         ).grid(row=current_row, column=1, sticky="ew", padx=5, pady=2)
         
@@ -3101,25 +4623,25 @@ class AutoDrawGUI:
         ttk.Label(
             controls_scrollable, 
             textvariable=self.canvas_info_var,
-            font=("Arial", 9)
+            font=self._fonts["arial9"]
         ).grid(row=current_row, column=0, columnspan=2, sticky="w", padx=5, pady=2)
         
         current_row += 1
         
         # Color positions section
-        current_row = self.create_section_header(controls_scrollable, self.translations["color_positions"], current_row)
+        current_row = self.create_section_header(controls_scrollable, self._tr_var("color_positions"), current_row)
         
         # Set color positions button
         ttk.Button(
             controls_scrollable, 
-            text=self.translations["set_color_positions"], 
+            textvariable=self._tr_var("set_color_positions"), 
             command=self.set_color_positions
         ).grid(row=current_row, column=0, sticky="ew", padx=5, pady=2)
         
         # Reset color positions button
         ttk.Button(
             controls_scrollable, 
-            text=self.translations["reset"], 
+            textvariable=self._tr_var("reset"), 
             command=self.reset_color_positions
         ).grid(row=current_row, column=1, sticky="ew", padx=5, pady=2)
         
@@ -3130,26 +4652,26 @@ class AutoDrawGUI:
         ttk.Label(
             controls_scrollable, 
             textvariable=self.color_pos_info_var,
-            font=("Arial", 9)
+            font=self._fonts["arial9"]
         ).grid(row=current_row, column=0, columnspan=2, sticky="w", padx=5, pady=2)
         
         current_row += 1
         
         # Drawing style section
-        current_row = self.create_section_header(controls_scrollable, self.translations["drawing_style"], current_row)
+        current_row = self.create_section_header(controls_scrollable, self._tr_var("drawing_style"), current_row)
         
         # Style options
         self.style_var = tk.StringVar(value="pixel")
         ttk.Radiobutton(
             controls_scrollable, 
-            text=self.translations["pixel"], 
+            textvariable=self._tr_var("pixel"), 
             variable=self.style_var, 
             value="pixel"
         ).grid(row=current_row, column=0, sticky="w", padx=5, pady=2)
         
         ttk.Radiobutton(
             controls_scrollable, 
-            text=self.translations["outline"], 
+            textvariable=self._tr_var("outline"), 
             variable=self.style_var, 
             value="outline"
         ).grid(row=current_row, column=1, sticky="w", padx=5, pady=2)
@@ -3157,7 +4679,7 @@ class AutoDrawGUI:
         current_row += 1
         
         # Resolution section
-        current_row = self.create_section_header(controls_scrollable, self.translations["resolution"], current_row)
+        current_row = self.create_section_header(controls_scrollable, self._tr_var("resolution"), current_row)
         
         # Resolution slider
         self.resolution_var = tk.DoubleVar(value=1.0)
@@ -3181,14 +4703,14 @@ class AutoDrawGUI:
         
         # Update resolution label on slider change
         def update_resolution_label(*args):
-            resolution_label.config(text=f"{self.resolution_var.get():.2f}x")
+            self._coalesce("resolution", lambda: resolution_label.config(text=f"{self.resolution_var.get():.2f}x"))
         
         self.resolution_var.trace("w", update_resolution_label)
         
         current_row += 1
         
         # Drawing speed section
-        current_row = self.create_section_header(controls_scrollable, self.translations["drawing_speed"], current_row)
+        current_row = self.create_section_header(controls_scrollable, self._tr_var("drawing_speed"), current_row)
         
         # Speed slider
         self.speed_var = tk.DoubleVar(value=0.001)
@@ -3212,7 +4734,7 @@ class AutoDrawGUI:
         
         # Update speed label on slider change
         def update_speed_label(*args):
-            speed_label.config(text=f"{self.speed_var.get():.4f}s")
+            self._coalesce("speed", lambda: speed_label.config(text=f"{self.speed_var.get():.4f}s"))
         
         self.speed_var.trace("w", update_speed_label)
         
@@ -3249,7 +4771,8 @@ class AutoDrawGUI:
         strategy_combo = ttk.Combobox(
             controls_scrollable,
             textvariable=self.strategy_var,
-            values=["optimized", "line-by-line", "color-by-color"],
+            values=DRAWING_STRATEGIES,
+            state="readonly",
             width=15
         )
         strategy_combo.grid(row=current_row, column=1, sticky="ew", padx=5, pady=2)
@@ -3278,12 +4801,12 @@ class AutoDrawGUI:
         precision_label = ttk.Label(
             controls_scrollable,
             text="Balanced",
-            font=("Arial", 9)
+            font=self._fonts["arial9"]
         )
         precision_label.grid(row=current_row, column=1, sticky="e", padx=5, pady=2)
         
         # Update label on slider change
-        def update_precision_label(*args):
+        def refresh_precision_label():
             value = self.precision_var.get()
             if value < 30:
                 precision_label.config(text="Faster")
@@ -3292,12 +4815,15 @@ class AutoDrawGUI:
             else:
                 precision_label.config(text="Balanced")
         
+        def update_precision_label(*args):
+            self._coalesce("precision", refresh_precision_label)
+        
         self.precision_var.trace("w", update_precision_label)
         
         current_row += 1
         
         # Color palette section
-        current_row = self.create_section_header(controls_scrollable, self.translations["color_palette"], current_row)
+        current_row = self.create_section_header(controls_scrollable, self._tr_var("color_palette"), current_row)
         
         # Palette frame
         palette_frame = ttk.Frame(controls_scrollable)
@@ -3308,30 +4834,30 @@ class AutoDrawGUI:
         # Default palette button
         ttk.Button(
             palette_frame, 
-            text=self.translations["default"], 
+            textvariable=self._tr_var("default"), 
             command=self.use_default_palette
         ).grid(row=0, column=0, sticky="ew", padx=(0, 3))
         
         # Custom palette button
         ttk.Button(
             palette_frame, 
-            text=self.translations["custom"], 
+            textvariable=self._tr_var("custom"), 
             command=self.select_palette_file
         ).grid(row=0, column=1, sticky="ew", padx=(3, 0))
         
         current_row += 1
         
         # Draw button
-        draw_button = ttk.Button(
+        self.draw_button = ttk.Button(
             controls_scrollable,
-            text=self.translations["draw"],
+            textvariable=self._tr_var("draw"),
             command=self.start_drawing,
             style="Accent.TButton"
         )
-        draw_button.grid(row=current_row, column=0, columnspan=2, sticky="ew", padx=5, pady=10)
+        self.draw_button.grid(row=current_row, column=0, columnspan=2, sticky="ew", padx=5, pady=10)
         
         # Create custom style for the accent button
-        self.style.configure("Accent.TButton", font=("Arial", 12, "bold"))
+        self.style.configure("Accent.TButton", font=self._fonts["arial12_bold"])
         
         current_row += 1
         
@@ -3340,48 +4866,96 @@ class AutoDrawGUI:
         status_label = ttk.Label(
             controls_scrollable,
             textvariable=self.status_var,
-            font=("Arial", 10)
+            font=self._fonts["arial10"]
         )
         status_label.grid(row=current_row, column=0, columnspan=2, sticky="w", padx=5, pady=5)
         
         current_row += 1
         
         # Create right panel (preview)
-        preview_frame = ttk.LabelFrame(main_frame, text=self.translations["preview"], padding=10)
+        preview_frame = self._tr_widget(ttk.LabelFrame(main_frame, padding=10), "preview")
         preview_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=(5, 0))
         
         # Preview canvas
         self.preview_canvas = tk.Canvas(
             preview_frame, 
-            bg=self.theme_colors["canvas_bg"],
+            bg=self.theme["canvas_bg"],
             highlightthickness=1,
-            highlightbackground=self.theme_colors["border"]
+            highlightbackground=self.theme["border"]
         )
         self.preview_canvas.pack(fill=tk.BOTH, expand=True)
         
         # No image label
         self.no_image_label = ttk.Label(
             self.preview_canvas,
-            text=self.translations["no_image"],
-            font=("Arial", 12),
-            background=self.theme_colors["canvas_bg"],
-            foreground=self.theme_colors["fg"]
+            textvariable=self._tr_var("no_image"),
+            font=self._fonts["arial12"],
+            background=self.theme["canvas_bg"],
+            foreground=self.theme["fg"]
         )
         self.no_image_label.pack(expand=True)
 
         # Set up event for canvas resize
-        self.preview_canvas.bind("<Configure>", self.display_preview)
+        self.preview_canvas.bind("<Configure>", self._schedule_preview)
+        
+        self._opt_vars_ready = True
+    
+    def _on_mousewheel_dispatch(self, event):
+        """Scroll the active canvas for a mousewheel event anywhere in the app"""
+        if self._active_scroll_canvas:
+            self._active_scroll_canvas.yview_scroll(int(-event.delta / 120), "units")
+    
+    def _coalesce(self, key, fn):
+        """Run fn once at the next idle tick, however often it is requested until then
+        
+        Slider traces fire for every intermediate value while dragging; this
+        collapses them into a single trailing label update.
+        """
+        if key in self._pending:
+            return
+        self._pending.add(key)
+        
+        def run():
+            self._pending.discard(key)
+            fn()
+        
+        self.root.after_idle(run)
+    
+    def _tr_var(self, key):
+        """Return the shared StringVar holding the current translation of key"""
+        var = self._i18n_vars.get(key)
+        if var is None:
+            var = self._i18n_vars[key] = tk.StringVar(value=self.translations[key])
+        return var
+    
+    def _tr_widget(self, widget, key):
+        """Set a widget's text to the translation of key and keep it translated"""
+        widget.configure(text=self.translations[key])
+        self._i18n_widgets.append((widget, key))
+        return widget
     
     def create_section_header(self, parent, text, row):
-        """Create a section header with modern styling"""
-        header = ttk.Label(parent, text=text, style="Header.TLabel")
+        """Create a section header with modern styling
+        
+        Args:
+            parent: The widget to place the header in
+            text: The header text, or a translation StringVar from _tr_var
+            row: The grid row to place the header at
+            
+        Returns:
+            int: The first grid row below the header
+        """
+        if isinstance(text, tk.Variable):
+            header = ttk.Label(parent, textvariable=text, style="Header.TLabel")
+        else:
+            header = ttk.Label(parent, text=text, style="Header.TLabel")
         header.grid(row=row, column=0, sticky=tk.W, pady=(15, 5), padx=10)
         
         # Add subtle separator line
         separator = ttk.Separator(parent, orient="horizontal")
         separator.grid(row=row+1, column=0, sticky=tk.W+tk.E, padx=10)
         
-        return header
+        return row + 2
     
     def save_settings(self):
         """Save current settings to file"""
@@ -3391,41 +4965,40 @@ class AutoDrawGUI:
         self.auto_draw.resolution = self.resolution_var.get()
         self.auto_draw.speed = self.speed_var.get()
         
-        # Add optimization settings if they exist
-        if hasattr(self, 'skip_white_var'):
+        # Add optimization settings once their controls exist
+        if self._opt_vars_ready:
             self.auto_draw.skip_white = self.skip_white_var.get()
-        
-        if hasattr(self, 'optimize_colors_var'):
             self.auto_draw.optimize_colors = self.optimize_colors_var.get()
-            
-        if hasattr(self, 'strategy_var'):
             self.auto_draw.drawing_strategy = self.strategy_var.get()
-            
-        if hasattr(self, 'precision_var'):
             self.auto_draw.precision_value = self.precision_var.get()
         
-        # Save settings
-        if self.auto_draw.save_settings():
-            self.status_var.set(self.translations["settings_saved"])
-        else:
-            self.status_var.set(self.translations["settings_save_error"])
-            messagebox.showerror(self.translations["error"], self.translations["settings_save_error"])
+        # Save settings on a worker thread so the disk write can't stall the
+        # UI; the lock keeps overlapping saves from sharing the temp file
+        def save_thread():
+            with self._settings_save_lock:
+                saved = self.auto_draw.save_settings()
+            
+            if saved:
+                self.root.after(0, lambda: self.status_var.set(self.translations["settings_saved"]))
+            else:
+                self.root.after(0, lambda: self.status_var.set(self.translations["settings_save_error"]))
+                self.root.after(0, lambda: messagebox.showerror(self.translations["error"], self.translations["settings_save_error"]))
+        
+        threading.Thread(target=save_thread, daemon=True).start()
     
     def select_target_window(self):
         """Improved method to select target window by showing a list"""
         self.status_var.set("Selecting target window...")
-        self.root.update_idletasks()
         
         try:
             # Use the improved find_target_window method from auto_draw
-            window_info = self.auto_draw.find_target_window()
+            window_info = self.auto_draw.find_target_window(force_select=True)
             
             if window_info:
                 # Set window title as target app
-                self.target_var.set("Custom...")
+                self.target_var.set(self.translations["custom"])
                 self.custom_target_var.set(window_info["title"])
-                self.custom_target_entry.grid()  # Show the entry
-                self.target_info_var.set(f"Selected window: {window_info['title']}")
+                self.custom_target_button.grid()  # Keep the selector shown
                 self.auto_draw.target_app = window_info["title"]
                 self.status_var.set("Target window set")
             else:
@@ -3437,10 +5010,7 @@ class AutoDrawGUI:
     def select_local_file(self):
         file_path = filedialog.askopenfilename(
             title="Select Image",
-            filetypes=[
-                ("Image files", "*.jpg *.jpeg *.png *.bmp *.gif *.tiff *.svg"),
-                ("All files", "*.*")
-            ]
+            filetypes=IMAGE_FILETYPES
         )
         
         if file_path:
@@ -3467,48 +5037,45 @@ class AutoDrawGUI:
             if not url:
                 return  # User cancelled
                 
-            # Basic URL validation and correction
-            if not re.match(r'^https?://', url):
+            # Basic URL validation and correction (schemes are case-insensitive)
+            if not url[:8].lower().startswith(URL_SCHEMES):
                 # Try to add https:// prefix if missing
                 url = "https://" + url
                 
             self.status_var.set(f"Downloading image from {url}...")
-            self.root.update_idletasks()
             
             # Use thread to prevent UI freezing during download
             def download_thread():
                 try:
-                    # Prepare request headers to mimic a browser
-                    headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                        'Accept': 'image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
-                        'Accept-Language': 'en-US,en;q=0.9',
-                        'Referer': 'https://www.google.com/'
-                    }
-                    
-                    # Perform the request with a reasonable timeout
-                    response = requests.get(url, headers=headers, timeout=15)
-                    
-                    # Check for HTTP errors
-                    response.raise_for_status()
-                    
-                    # Check if the content is actually an image
-                    content_type = response.headers.get('Content-Type', '')
-                    
-                    if content_type.startswith('image/'):
-                        # It's an image, load it directly
-                        image_data = BytesIO(response.content)
+                    # Perform the request with a reasonable timeout; stream it so a
+                    # non-image is rejected from its headers before the body is
+                    # read. Image bytes are already compressed, so skip gzip
+                    with get_http_session().get(url, timeout=15, stream=True,
+                                                headers={'Accept-Encoding': 'identity'}) as response:
+                        # Check for HTTP errors
+                        response.raise_for_status()
                         
-                        # Schedule UI update in the main thread
-                        self.root.after(0, lambda: self.load_and_preview_image(image_data))
-                    else:
-                        # Not an image, check if it's HTML that might contain an image
-                        self.root.after(0, lambda: messagebox.showerror(
-                            "Error", 
-                            f"URL does not point to an image (Content-Type: {content_type}).\n\n"
-                            "Please provide a direct link to an image file."
-                        ))
-                        self.root.after(0, lambda: self.status_var.set("Ready"))
+                        # Check if the content is actually an image
+                        content_type = response.headers.get('Content-Type', '')
+                        
+                        if not content_type.startswith('image/'):
+                            # Not an image, check if it's HTML that might contain an image
+                            self.root.after(0, lambda: messagebox.showerror(
+                                "Error", 
+                                f"URL does not point to an image (Content-Type: {content_type}).\n\n"
+                                "Please provide a direct link to an image file."
+                            ))
+                            self.root.after(0, lambda: self.status_var.set("Ready"))
+                            return
+                        
+                        # It's an image, read the body into a single buffer
+                        image_data = BytesIO()
+                        for chunk in response.iter_content(chunk_size=65536):
+                            image_data.write(chunk)
+                        image_data.seek(0)
+                    
+                    # Schedule UI update in the main thread
+                    self.root.after(0, lambda: self.load_and_preview_image(image_data))
                         
                 except requests.exceptions.RequestException as e:
                     # Network-related errors
@@ -3534,10 +5101,10 @@ class AutoDrawGUI:
             self.status_var.set("Ready")
     
     def on_target_change(self, event):
-        if self.target_var.get() == "Custom...":
-            self.custom_target_entry.grid()
+        if self.target_var.get() == self.translations["custom"]:
+            self.custom_target_button.grid()
         else:
-            self.custom_target_entry.grid_remove()
+            self.custom_target_button.grid_remove()
     
     def use_default_palette(self):
         target = self.get_target_app()
@@ -3547,11 +5114,7 @@ class AutoDrawGUI:
     def select_palette_file(self):
         file_path = filedialog.askopenfilename(
             title="Select Palette File",
-            filetypes=[
-                ("JSON files", "*.json"),
-                ("CSV files", "*.csv"),
-                ("All files", "*.*")
-            ]
+            filetypes=PALETTE_FILETYPES
         )
         
         if file_path:
@@ -3562,62 +5125,166 @@ class AutoDrawGUI:
             
     @error_handler
     def load_and_preview_image(self, source):
-        """تحسين دالة تحميل الصورة للعمل مع الملفات المحلية روابط URL والبيانات الثنائية"""
-        self.status_var.set(f"جارِ تحميل الصورة...")
-        self.root.update_idletasks()
+        """تحسين دالة تحميل الصورة للعمل مع الملفات المحلية روابط URL والبيانات الثنائية
         
-        try:
-            if self.auto_draw.load_image(source):
-                self.display_preview()
-                img_width, img_height = self.auto_draw.image.size
+        يتم تحميل الصورة وتصغير المعاينة في خيط خلفي حتى لا تتجمد الواجهة
+        """
+        self.status_var.set(f"جارِ تحميل الصورة...")
+        canvas_size = self._preview_canvas_size()
+        self._preview_generation += 1
+        generation = self._preview_generation
+        self._load_generation = generation
+        # Drawing waits until this image is installed
+        self.draw_button.state(["disabled"])
+        
+        def finish_load(loaded=None, working=None, preview=None, error=None):
+            # Only the latest load may replace the image; an older one that
+            # finishes afterwards is dropped
+            if generation != self._load_generation:
+                return
+            self.draw_button.state(["!disabled"])
+            if loaded is not None:
+                self.auto_draw.set_loaded_image(loaded, working)
+                if generation == self._preview_generation:
+                    self._install_preview(preview, loaded.image, canvas_size, generation)
+                else:
+                    # The canvas was resized meanwhile - redraw at its new size
+                    self.display_preview()
+                img_width, img_height = loaded.image.size
                 self.status_var.set(f"تم تحميل الصورة بنجاح - الأبعاد: {img_width}×{img_height}")
             else:
-                messagebox.showerror(self.translations["error"], "فشل تحميل الصورة")
+                messagebox.showerror(self.translations["error"], error or "فشل تحميل الصورة")
                 self.status_var.set(self.translations["ready"])
-        except Exception as e:
-            messagebox.showerror(self.translations["error"], f"حدث خطأ أثناء تحميل الصورة: {str(e)}")
-            self.status_var.set(self.translations["ready"])
+        
+        def load_thread():
+            # The image is decoded into locals here; the engine only sees it
+            # once finish_load installs it on the Tk thread
+            try:
+                loaded = self.auto_draw.open_image(source)
+                if loaded is not None:
+                    working = make_working_image(loaded.image, loaded.image_path, loaded.image_stat)
+                    preview = self._resample_preview(working, canvas_size)
+                    self.root.after(0, lambda: finish_load(loaded, working, preview))
+                else:
+                    self.root.after(0, finish_load)
+            except Exception as e:
+                message = f"حدث خطأ أثناء تحميل الصورة: {str(e)}"
+                self.root.after(0, lambda: finish_load(error=message))
+        
+        threading.Thread(target=load_thread, daemon=True).start()
+    
+    def _schedule_preview(self, event=None):
+        """Repaint the preview once resizing pauses for PREVIEW_RESIZE_DELAY_MS
+        
+        <Configure> fires for every intermediate size while the window is
+        dragged; each repaint is a full LANCZOS resize.
+        """
+        if self._preview_after:
+            self.root.after_cancel(self._preview_after)
+        
+        def repaint():
+            self._preview_after = None
+            self.display_preview()
+        
+        self._preview_after = self.root.after(PREVIEW_RESIZE_DELAY_MS, repaint)
     
     @error_handler
     def display_preview(self):
-        if self.auto_draw.image:
-            # Resize image to fit canvas while maintaining aspect ratio
-            canvas_width = self.canvas.winfo_width()
-            canvas_height = self.canvas.winfo_height()
-            
-            # Make sure we have actual dimensions
-            if canvas_width < 10:
-                canvas_width = 400
-            if canvas_height < 10:
-                canvas_height = 400
-            
-            img_width, img_height = self.auto_draw.image.size
+        """Redraw the loaded image to fit the preview canvas
+        
+        The resample runs on a worker thread; only the PhotoImage, which Tk
+        requires on its own thread, is built back here by _install_preview.
+        """
+        image = self.auto_draw.image
+        if not image:
+            return
+        
+        canvas_size = self._preview_canvas_size()
+        
+        # <Configure> also fires for moves and restacking - nothing to redo
+        # when this image is already shown at this size
+        shown = self._preview_shown
+        if shown and shown[0] is image and shown[1] == canvas_size:
+            return
+        
+        self._preview_generation += 1
+        generation = self._preview_generation
+        
+        def resample_thread():
+            preview = self._resample_preview(self.auto_draw.get_working_image(), canvas_size)
+            self.root.after(0, lambda: self._install_preview(preview, image, canvas_size, generation))
+        
+        threading.Thread(target=resample_thread, daemon=True).start()
+    
+    def _preview_canvas_size(self):
+        """Current preview canvas size, read on the Tk thread"""
+        canvas_width = self.preview_canvas.winfo_width()
+        canvas_height = self.preview_canvas.winfo_height()
+        
+        # Make sure we have actual dimensions
+        if canvas_width < 10:
+            canvas_width = 400
+        if canvas_height < 10:
+            canvas_height = 400
+        
+        return canvas_width, canvas_height
+    
+    def _resample_preview(self, image, canvas_size):
+        """Resize image to fit canvas_size, keeping its aspect ratio (worker thread)"""
+        canvas_width, canvas_height = canvas_size
+        
+        # One resample at a time: workers may share a lazily decoded image
+        with self._preview_lock:
+            img_width, img_height = image.size
             
             # Calculate scale factor
             scale = min(canvas_width / img_width, canvas_height / img_height)
             
             # Resize image for display
-            display_width = int(img_width * scale)
-            display_height = int(img_height * scale)
-            
-            display_img = self.auto_draw.image.resize((display_width, display_height), Image.LANCZOS)
-            
-            # Convert to PhotoImage for display
-            self.photo_img = ImageTk.PhotoImage(display_img)
+            display_width = max(1, int(img_width * scale))
+            display_height = max(1, int(img_height * scale))
             
-            # Clear previous image
-            self.canvas.delete("all")
-            
-            # Display new image
-            self.canvas.create_image(
+            # An INTER_AREA shrink with OpenCV; in Pillow, box-reduce by an
+            # integer factor first, as Image.thumbnail does, then finish with
+            # BILINEAR - plenty for an on-screen preview, the drawing itself
+            # is still resampled with LANCZOS
+            return resize_image(image, (display_width, display_height), Image.BILINEAR,
+                                reducing_gap=PREVIEW_REDUCING_GAP)
+    
+    def _install_preview(self, preview, image, canvas_size, generation):
+        """Show a resampled preview of image unless a newer one has been requested"""
+        if generation != self._preview_generation:
+            return
+        self._preview_shown = (image, canvas_size)
+        canvas_width, canvas_height = canvas_size
+        
+        # Centre the preview in a canvas-sized buffer so the Tk photo only
+        # changes size with the canvas; otherwise its pixels are pasted in
+        # place rather than allocating a new photo per preview
+        if self._preview_buf is None or self._preview_buf.size != canvas_size:
+            self._preview_buf = Image.new("RGBA", canvas_size)
+            self.photo_img = ImageTk.PhotoImage("RGBA", canvas_size)
+        else:
+            self._preview_buf.paste((0, 0, 0, 0), (0, 0, canvas_width, canvas_height))
+        self._preview_buf.paste(preview, ((canvas_width - preview.width) // 2,
+                                          (canvas_height - preview.height) // 2))
+        self.photo_img.paste(self._preview_buf)
+        
+        # Display new image, reusing the canvas item once it exists
+        if self._preview_item is None:
+            self.no_image_label.pack_forget()
+            self._preview_item = self.preview_canvas.create_image(
                 canvas_width // 2,
                 canvas_height // 2,
                 image=self.photo_img,
                 anchor=tk.CENTER
             )
+        else:
+            self.preview_canvas.coords(self._preview_item, canvas_width // 2, canvas_height // 2)
+            self.preview_canvas.itemconfigure(self._preview_item, image=self.photo_img)
     
     def get_target_app(self):
-        if self.target_var.get() == "Custom...":
+        if self.target_var.get() == self.translations["custom"]:
             return self.custom_target_var.get()
         else:
             return self.target_var.get()
@@ -3626,13 +5293,14 @@ class AutoDrawGUI:
     def select_canvas_area(self):
         """Allow user to select the drawing canvas area"""
         self.status_var.set("Setting drawing area...")
-        self.root.update_idletasks()
         
+        # Minimize our window temporarily to make selection easier
+        self._iconify_then(self._select_canvas_area)
+    
+    @error_handler
+    def _select_canvas_area(self):
+        """Run the canvas area selection once the main window is minimized"""
         try:
-            # Minimize our window temporarily to make selection easier
-            self.root.iconify()
-            time.sleep(0.5)  # Give time for the window to minimize
-            
             # Use the drawing area selector to get the canvas area
             canvas_area = self.drawing_area_selector.select_drawing_area()
             
@@ -3652,6 +5320,24 @@ class AutoDrawGUI:
             messagebox.showerror(self.translations["error"], f"{self.translations['error_area']} {str(e)}")
             self.status_var.set("Drawing area setting failed")
     
+    def _iconify_then(self, callback, timeout=ICONIFY_TIMEOUT):
+        """Minimize the main window and call callback as soon as it is unmapped
+        
+        The check is polled with root.after so the <Unmap> is handled by the
+        main event loop itself, instead of pumping it re-entrantly from
+        inside the button callback.
+        """
+        self.root.iconify()
+        deadline = time.monotonic() + timeout
+        
+        def poll():
+            if self.root.winfo_ismapped() and time.monotonic() < deadline:
+                self.root.after(10, poll)
+            else:
+                callback()
+        
+        poll()
+    
     def reset_canvas_area(self):
         """Reset the drawing canvas area to default (center of screen)"""
         self.auto_draw.set_canvas_area(None)
@@ -3665,15 +5351,18 @@ class AutoDrawGUI:
             self.use_default_palette()
         
         self.status_var.set("Setting color positions...")
-        self.root.update_idletasks()
         
+        # Minimize our window temporarily to make selection easier
+        self._iconify_then(self._set_color_positions)
+    
+    @error_handler
+    def _set_color_positions(self):
+        """Run the color position picker once the main window is minimized"""
         try:
-            # Minimize our window temporarily to make selection easier
-            self.root.iconify()
-            time.sleep(0.5)  # Give time for the window to minimize
-            
             # Use the drawing area selector to get color positions
             color_positions = self.drawing_area_selector.select_color_positions(self.auto_draw.palette)
+            # Custom colors may have been added to the palette in place
+            self.auto_draw.palette_changed()
             
             # Restore our window
             self.root.deiconify()
@@ -3698,6 +5387,10 @@ class AutoDrawGUI:
     
     @error_handler
     def start_drawing(self):
+        if self._draw_countdown is not None:
+            return  # already counting down to a drawing
+        if self.draw_button.instate(["disabled"]):
+            return  # an image is still loading (F5 and the menu bypass the button)
         if not self.auto_draw.image:
             messagebox.showerror(self.translations["error"], "No image loaded")
             return
@@ -3712,7 +5405,8 @@ class AutoDrawGUI:
         if not self.auto_draw.palette:
             self.auto_draw.palette = self.auto_draw.get_default_palette(self.auto_draw.target_app)
         
-        # Process the image
+        # Process the image; the status is flushed by hand because processing
+        # blocks the event loop
         self.status_var.set("Processing image...")
         self.root.update_idletasks()
         
@@ -3735,13 +5429,26 @@ class AutoDrawGUI:
             self.status_var.set("Drawing cancelled")
             return
         
-        # Create a countdown
-        for i in range(3, 0, -1):
-            self.status_var.set(f"Drawing will begin in {i} seconds...")
-            self.root.update_idletasks()
-            time.sleep(1)
+        # Bring the selected target window back to the front, if any
+        if self.auto_draw.last_window and self.auto_draw.target_app == self.auto_draw.last_window.get("title"):
+            self.auto_draw.activate_last_window()
         
-        # Start drawing
+        # Count down from the event loop so the window keeps repainting
+        self._draw_countdown_tick(DRAW_COUNTDOWN_SECONDS)
+    
+    def _draw_countdown_tick(self, seconds_left):
+        """Show one countdown step, then schedule the next or the drawing itself"""
+        if seconds_left > 0:
+            self.status_var.set(f"Drawing will begin in {seconds_left} seconds...")
+            self._draw_countdown = self.root.after(1000, self._draw_countdown_tick, seconds_left - 1)
+        else:
+            self._draw_countdown = None
+            self._begin_drawing()
+    
+    @error_handler
+    def _begin_drawing(self):
+        """Draw the processed image once the countdown has finished"""
+        # draw_image blocks the event loop, so flush the status before it starts
         self.status_var.set("Drawing in progress... Press ESC to stop.")
         self.root.update_idletasks()
         
@@ -3784,7 +5491,7 @@ def main():
             # Set window icon (if available)
             try:
                 # Try to set an icon
-                icon = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icon.png")
+                icon = os.path.join(_HERE, "icon.png")
                 if os.path.exists(icon):
                     img = ImageTk.PhotoImage(file=icon)
                     root.iconphoto(True, img)
@@ -3858,7 +5565,7 @@ def run_cli_mode(args):
     # Process image
     print("Processing image...")
     logger.info("CLI: Processing image")
-    if not auto_draw.process_image():
+    if not auto_draw.process_image_cached():
         logger.error("CLI: Failed to process image")
         print("Error: Failed to process image")
         return
@@ -6,50 +6,511 @@
 ويتضمن تخطي اللون الأبيض لتسريع الرسم
 """
 
-import os
 import sys
 import time
 import json
 import logging
 import argparse
-from PIL import Image
-import numpy as np
-import pyautogui
-import keyboard
+import queue
+import threading
+import bisect
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from auto_draw_common import (LazyModule, check_pillow_simd, configure_pyautogui, esc_pressed, keyboard,
+                              load_aot_kernel, parse_color_positions, pillow_simd)
 
 # إعداد التسجيل
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler("auto_draw_log.txt"),
+        logging.FileHandler("auto_draw_log.txt", encoding="utf-8"),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger("AutoDrawCLI")
 
-# تعطيل ميزة الأمان في PyAutoGUI
-pyautogui.FAILSAFE = False
+# الوحدات الثقيلة تُستورد عند أول استخدام (LazyModule في auto_draw_common.py)
+Image = LazyModule("PIL.Image", on_load=check_pillow_simd)
+np = LazyModule("numpy")
+pyautogui = LazyModule("pyautogui", on_load=configure_pyautogui)
+
+# اختيارية: Numba يُترجم ربط المقاطع، وOpenCV أسرع من Pillow في تغيير الحجم
+numba = LazyModule("numba", required=False, warning="Numba غير مثبت، ستُربط المقاطع بدون ترجمة JIT")
+cv2 = LazyModule("cv2", required=False, warning="OpenCV غير مثبت، سيُغيَّر حجم الصور بـ Pillow")
+
+# أحداث الماوس المرسلة في كل استدعاء لـ SendInput
+SEND_INPUT_BATCH = 64
+
+# أوامر الماوس المستخدمة داخل حلقة الرسم. على ويندوز يُرسل الخط كاملًا
+# (الضغط ثم الحركة عبر رؤوسه ثم الرفع) بـ SendInput دفعات من
+# SEND_INPUT_BATCH حدثًا بدلًا من استدعاء لكل نقطة؛ وعلى الأنظمة الأخرى
+# يُستخدم PyAutoGUI
+if sys.platform == "win32":
+    from auto_draw_common import (MOUSEEVENTF_ABSOLUTE, MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP,
+                                  MOUSEEVENTF_MOVE, mouse_input_buffer, send_inputs, user32 as _user32)
+    
+    # مخزن أحداث واحد يُعاد استخدامه لكل الخطوط
+    _input_buffer = mouse_input_buffer(SEND_INPUT_BATCH)
+    
+    @functools.lru_cache(maxsize=None)
+    def _absolute_scale():
+        """معاملا تحويل إحداثيات الشاشة إلى المجال 0..65535 الذي تستخدمه الحركة المطلقة"""
+        width = _user32.GetSystemMetrics(0)   # SM_CXSCREEN
+        height = _user32.GetSystemMetrics(1)  # SM_CYSCREEN
+        return 65535.0 / max(width - 1, 1), 65535.0 / max(height - 1, 1)
+    
+    def draw_stroke(points):
+        """الضغط عند أول نقطة والسحب عبر البقية ثم الرفع (نقرة لنقطة واحدة)
+        
+        الضغط يُدمج في حدث الحركة إلى أول نقطة والرفع في حدث الحركة إلى آخرها،
+        فيكون الخط len(points) حدثًا فقط.
+        """
+        scale_x, scale_y = _absolute_scale()
+        last = len(points) - 1
+        for start in range(0, len(points), SEND_INPUT_BATCH):
+            batch = points[start:start + SEND_INPUT_BATCH]
+            for index, (event, (x, y)) in enumerate(zip(_input_buffer, batch), start):
+                flags = MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE
+                if index == 0:
+                    flags |= MOUSEEVENTF_LEFTDOWN
+                if index == last:
+                    flags |= MOUSEEVENTF_LEFTUP
+                event.mi.dwFlags = flags
+                event.mi.dx = int(round(round(x) * scale_x))
+                event.mi.dy = int(round(round(y) * scale_y))
+            send_inputs(_input_buffer, len(batch))
+else:
+    def draw_stroke(points):
+        """الضغط عند أول نقطة والسحب عبر البقية ثم الرفع (نقرة لنقطة واحدة)"""
+        pyautogui.moveTo(*points[0], duration=0)
+        pyautogui.mouseDown()
+        for point in points[1:]:
+            pyautogui.moveTo(*point, duration=0)
+        pyautogui.mouseUp()
+
+# عدد البكسلات المرسومة بين كل فحصين لطلب الإيقاف
+STOP_CHECK_PIXELS = 256
+
+# عدد مجموعات الألوان التي تُجهَّز خطوطها مسبقًا أثناء رسم المجموعة الحالية
+STROKE_PREFETCH = 2
+
+# مدة العد التنازلي قبل الرسم، والفاصل بين فحوص مفتاح Esc خلاله (بالثواني)
+COUNTDOWN_SECONDS = 5
+COUNTDOWN_POLL_INTERVAL = 0.05
+
+def resize_image(img, size):
+    """تغيير حجم صورة RGB أو RGBA إلى size بجودة LANCZOS
+    
+    تُستخدم OpenCV إن توفرت والصورة معتمة بالكامل (INTER_AREA عند التصغير
+    وINTER_LANCZOS4 عند التكبير) وتُعاد الصورة RGB؛ أما الصور ذات الشفافية
+    فتبقى مع Pillow الذي يضرب الألوان في قناة ألفا فلا تتسرب ألوان البكسلات
+    الشفافة للحواف، وكذلك كل الصور مع Pillow-SIMD لأن تغيير الحجم فيه متجه أصلًا.
+    """
+    opaque = img.mode == "RGB" or (img.mode == "RGBA" and img.getextrema()[3] == (255, 255))
+    if cv2 and not pillow_simd() and opaque:
+        if size[0] <= img.width and size[1] <= img.height:
+            interpolation = cv2.INTER_AREA
+        else:
+            interpolation = cv2.INTER_LANCZOS4
+        rgb = img if img.mode == "RGB" else img.convert("RGB")
+        return Image.fromarray(cv2.resize(np.asarray(rgb), size, interpolation=interpolation))
+    return img.resize(size, Image.LANCZOS)
+
+def click_at(x, y):
+    """النقر بالزر الأيسر عند (x, y)"""
+    draw_stroke([(x, y)])
+
+def chain_runs(run_ys, run_starts, run_ends):
+    """ربط مقاطع الصفوف في خطوط متعرجة (ذهابًا وإيابًا) لتقليل مرات الضغط والرفع
+    
+    يُضاف مقطع من الصف التالي إلى الخط الحالي فقط إذا كان أحد طرفيه ملاصقًا
+    (أفقيًا أو قطريًا) لنهاية الخط، فتبقى كل وصلة بين بكسلين متجاورين ولا
+    يمر السحب فوق بكسلات غير مرسومة.
+    
+    المدخلات: صف وبداية ونهاية (غير شاملة) كل مقطع مرتبة حسب الصف ثم العمود.
+    المخرجات: مصفوفات (x الرؤوس، y الرؤوس، بداية رؤوس كل خط فيها مع نهاية
+    أخيرة، عدد بكسلات كل خط).
+    """
+    count = len(run_starts)
+    vertex_x = np.empty(2 * count, dtype=np.int64)
+    vertex_y = np.empty(2 * count, dtype=np.int64)
+    stroke_offsets = np.empty(count + 1, dtype=np.int64)
+    stroke_pixels = np.empty(count, dtype=np.int64)
+    
+    kernel = _chain_runs_kernel() if count else None
+    if kernel is not None:
+        # أول مقطع في كل صف، حتى الصف الذي يلي آخر صف فيه مقاطع
+        row_offsets = np.searchsorted(run_ys, np.arange(int(run_ys[-1]) + 2)).astype(np.int64)
+        vertices, strokes = kernel(
+            np.ascontiguousarray(run_ys, dtype=np.int64),
+            np.ascontiguousarray(run_starts, dtype=np.int64),
+            np.ascontiguousarray(run_ends, dtype=np.int64),
+            row_offsets, np.zeros(count, dtype=np.bool_),
+            vertex_x, vertex_y, stroke_offsets, stroke_pixels)
+    else:
+        vertices, strokes = _chain_runs_python(
+            run_ys, run_starts, run_ends, vertex_x, vertex_y, stroke_offsets, stroke_pixels)
+    
+    return vertex_x[:vertices], vertex_y[:vertices], stroke_offsets[:strokes + 1], stroke_pixels[:strokes]
+
+def _chain_runs_python(run_ys, run_starts, run_ends, vertex_x, vertex_y, stroke_offsets, stroke_pixels):
+    """تنفيذ chain_runs بقوائم بايثون عند عدم توفر Numba، يعيد (عدد الرؤوس، عدد الخطوط)"""
+    starts = run_starts.tolist()
+    lasts = (run_ends - 1).tolist()
+    ys = run_ys.tolist()
+    
+    # مقاطع كل صف ونهاياتها المرتبة للبحث الثنائي
+    rows = {}
+    for index, y in enumerate(ys):
+        rows.setdefault(y, []).append(index)
+    row_lasts = {y: [lasts[index] for index in indices] for y, indices in rows.items()}
+    
+    used = [False] * len(starts)
+    points_x, points_y, offsets, pixel_counts = [], [], [], []
+    
+    for first in range(len(starts)):
+        if used[first]:
+            continue
+        used[first] = True
+        y = ys[first]
+        offsets.append(len(points_x))
+        points_x.append(starts[first])
+        points_y.append(y)
+        if lasts[first] != starts[first]:
+            points_x.append(lasts[first])
+            points_y.append(y)
+        stroke_pixel_count = lasts[first] - starts[first] + 1
+        x = lasts[first]
+        
+        while True:
+            y += 1
+            indices = rows.get(y)
+            if not indices:
+                break
+            
+            # المقاطع منفصلة بفجوة، لذا يلامس النافذة [x-1, x+1] مقطعان على الأكثر
+            position = bisect.bisect_left(row_lasts[y], x - 1)
+            for index in indices[position:position + 2]:
+                if used[index]:
+                    continue
+                if abs(lasts[index] - x) <= 1:
+                    entry, exit_ = lasts[index], starts[index]
+                elif abs(starts[index] - x) <= 1:
+                    entry, exit_ = starts[index], lasts[index]
+                else:
+                    continue
+                used[index] = True
+                points_x.append(entry)
+                points_y.append(y)
+                if exit_ != entry:
+                    points_x.append(exit_)
+                    points_y.append(y)
+                stroke_pixel_count += lasts[index] - starts[index] + 1
+                x = exit_
+                break
+            else:
+                break
+        
+        pixel_counts.append(stroke_pixel_count)
+    
+    vertices, strokes = len(points_x), len(offsets)
+    vertex_x[:vertices] = points_x
+    vertex_y[:vertices] = points_y
+    stroke_offsets[:strokes] = offsets
+    stroke_offsets[strokes] = vertices
+    stroke_pixels[:strokes] = pixel_counts
+    return vertices, strokes
+
+def _chain_runs_numba(run_ys, run_starts, run_ends, row_offsets, used,
+                      vertex_x, vertex_y, stroke_offsets, stroke_pixels):
+    """نفس _chain_runs_python على المصفوفات مباشرة ليترجمه Numba
+    
+    row_offsets[y] أول مقطع في الصف y، وused مصفوفة bool أصفار بطول المقاطع.
+    """
+    count = run_starts.size
+    rows = row_offsets.size - 1
+    vertices = 0
+    strokes = 0
+    
+    for first in range(count):
+        if used[first]:
+            continue
+        used[first] = True
+        y = run_ys[first]
+        start = run_starts[first]
+        last = run_ends[first] - 1
+        stroke_offsets[strokes] = vertices
+        vertex_x[vertices] = start
+        vertex_y[vertices] = y
+        vertices += 1
+        if last != start:
+            vertex_x[vertices] = last
+            vertex_y[vertices] = y
+            vertices += 1
+        stroke_pixel_count = last - start + 1
+        x = last
+        
+        while True:
+            y += 1
+            if y >= rows:
+                break
+            row_begin = row_offsets[y]
+            row_end = row_offsets[y + 1]
+            
+            # بحث ثنائي عن أول مقطع في الصف ينتهي عند x-1 أو بعده، ثم يُفحص
+            # هو والمقطع الذي يليه
+            position = row_begin
+            high = row_end
+            while position < high:
+                middle = (position + high) // 2
+                if run_ends[middle] < x:
+                    position = middle + 1
+                else:
+                    high = middle
+            found = False
+            for index in range(position, min(position + 2, row_end)):
+                if used[index]:
+                    continue
+                start = run_starts[index]
+                last = run_ends[index] - 1
+                if abs(last - x) <= 1:
+                    entry, exit_ = last, start
+                elif abs(start - x) <= 1:
+                    entry, exit_ = start, last
+                else:
+                    continue
+                used[index] = True
+                vertex_x[vertices] = entry
+                vertex_y[vertices] = y
+                vertices += 1
+                if exit_ != entry:
+                    vertex_x[vertices] = exit_
+                    vertex_y[vertices] = y
+                    vertices += 1
+                stroke_pixel_count += last - start + 1
+                x = exit_
+                found = True
+                break
+            if not found:
+                break
+        
+        stroke_pixels[strokes] = stroke_pixel_count
+        strokes += 1
+    
+    stroke_offsets[strokes] = vertices
+    return vertices, strokes
+
+@functools.lru_cache(maxsize=None)
+def _chain_runs_kernel():
+    """_chain_runs_numba مترجمًا، أو None بدون Numba
+    
+    تُستخدم النسخة المترجمة مسبقًا بـ compile_kernels.py إن وُجدت وترجمت
+    من مصدر _chain_runs_numba الحالي، وإلا يُترجم عند أول استدعاء ويُحفظ في
+    __pycache__ للتشغيلات التالية.
+    """
+    kernel = load_aot_kernel("chain_runs_kernel", _chain_runs_numba)
+    if kernel is not None:
+        return kernel
+    if numba:
+        return numba.njit(cache=True)(_chain_runs_numba)
+    return None
+
+def hilbert_keys(xs, ys, size):
+    """موقع كل نقطة (xs, ys) من الشبكة على منحنى هيلبرت يغطي مربعًا ضلعه size على الأقل
+    
+    النقاط المتقاربة في ترتيب المفاتيح متقاربة في المكان أيضًا، دون قفزات
+    بعرض الصورة كما في الترتيب النقطي. كل مستوى من المنحنى عملية واحدة
+    على كل المصفوفة.
+    """
+    n = 1 << (max(int(size), 1) - 1).bit_length()
+    x = np.asarray(xs).astype(np.int64)
+    y = np.asarray(ys).astype(np.int64)
+    keys = np.zeros(len(x), dtype=np.int64)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        keys += s * s * ((3 * rx) ^ ry)
+        # تدوير الربع وعكسه ليتصل المنحنى بين الأرباع
+        flip = rx & ~ry
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s >>= 1
+    return keys
+
+def plan_strokes(draw_mask, x1, y1, pixel_width, pixel_height):
+    """تحويل قناع البكسلات المراد رسمها إلى خطوط بإحداثيات الشاشة
+    
+    المخرجات: قائمة (رؤوس الخط كمراكز بكسلات على الشاشة، عدد بكسلات الخط)
+    مرتبة على منحنى هيلبرت حسب أول رأس في كل خط ليقل تنقل الماوس بين الخطوط.
+    """
+    height, width = draw_mask.shape
+    
+    # تجميع البكسلات المتجاورة في كل صف في مقاطع: بداية المقطع حيث
+    # يتغير القناع من 0 إلى 1 ونهايته حيث يعود إلى 0
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = draw_mask
+    edges = np.diff(padded, axis=1)
+    run_ys, run_starts = np.nonzero(edges == 1)
+    run_ends = np.nonzero(edges == -1)[1]  # بعد آخر بكسل في المقطع
+    
+    # ربط المقاطع المتتالية في خطوط متعرجة ثم حساب مواقع رؤوسها
+    # (مراكز البكسلات) على الشاشة دفعة واحدة
+    vertex_x, vertex_y, stroke_offsets, stroke_pixels = chain_runs(run_ys, run_starts, run_ends)
+    screen_x = (x1 + (vertex_x + 0.5) * pixel_width).tolist()
+    screen_y = (y1 + (vertex_y + 0.5) * pixel_height).tolist()
+    points = list(zip(screen_x, screen_y))
+    offsets = stroke_offsets.tolist()
+    strokes = [
+        (points[begin:end], stroke_pixel_count)
+        for begin, end, stroke_pixel_count in zip(offsets, offsets[1:], stroke_pixels.tolist())
+    ]
+    
+    # الخطوط تخرج بترتيب صفوف بداياتها، فيعود الماوس عبر عرض الصورة كله بين
+    # صف وآخر؛ ترتيبها على منحنى هيلبرت يبقي كل خط قريبًا من سابقه
+    first_vertices = stroke_offsets[:-1]
+    order = np.argsort(hilbert_keys(vertex_x[first_vertices], vertex_y[first_vertices], max(height, width)),
+                       kind="stable")
+    return [strokes[index] for index in order.tolist()]
+
+def iter_color_strokes(color_masks, x1, y1, pixel_width, pixel_height):
+    """إرجاع (اللون، الخطوط) لكل مجموعة ألوان بالترتيب
+    
+    تُجهَّز الخطوط بـ plan_strokes في خيط خلفي حتى STROKE_PREFETCH مجموعات
+    مقدمًا، فيتداخل تجهيز المجموعة التالية مع رسم الحالية ويبدأ الرسم دون
+    انتظار تجهيز كل الألوان. color_masks تُقرأ في الخيط الخلفي نفسه.
+    """
+    prepared = queue.Queue(maxsize=STROKE_PREFETCH)
+    cancelled = threading.Event()
+    
+    def put(item):
+        # التوقف عند انتهاء المستهلك بدل الانتظار للأبد
+        while not cancelled.is_set():
+            try:
+                prepared.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def produce():
+        # None تعني انتهاء الخطوط، والاستثناء يُمرَّر ليُرفع في خيط الرسم
+        end = None
+        try:
+            for color, color_mask in color_masks:
+                if not put((color, plan_strokes(color_mask, x1, y1, pixel_width, pixel_height))):
+                    return
+        except Exception as e:
+            logger.error(f"خطأ أثناء تجهيز الخطوط: {e}")
+            end = e
+        finally:
+            put(end)
+    
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item = prepared.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
+
+def warm_up():
+    """استيراد الوحدات الثقيلة وترجمة نواة Numba مسبقًا
+    
+    تُستدعى في خيط خلفي أثناء انتظار المستخدم، فلا يدفع الرسم ثمنها لاحقًا.
+    """
+    try:
+        # الوحدة المطلوبة المفقودة تُترك لأول استخدام فعلي ليبلغ عنها
+        if not all([module.preload() for module in (np, Image, pyautogui, keyboard)]):
+            return
+        cv2.preload()
+        # مقطع واحد يكفي لترجمة ربط المقاطع (وحفظه في __pycache__)
+        if numba.preload():
+            chain_runs(np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64), np.ones(1, dtype=np.int64))
+    except Exception as e:
+        logger.debug(f"فشل التجهيز المسبق: {e}")
 
 class SimpleAutoDraw:
     """نسخة مبسطة من فئة AutoDraw"""
     
     def __init__(self):
         self.image = None
+        self.source_size = None  # (w, h) للصورة الأصلية قبل فك JPEG بحجم مصغر
         self.processed_image = None
+        self.draw_mask = None  # قناع bool للبكسلات المراد رسمها، من process_image
         self.canvas_area = None  # (x1, y1, x2, y2)
         self.speed = 0.001
         self.resolution = 1.0
         self.skip_white = True
-        self.stop_drawing = False
-        self.palette = []
+        self._stop_event = threading.Event()  # يُضبط عند Esc أو بطلب من خيط آخر
+        self.palette = []  # ألوان (r, g, b) المتاحة في التطبيق المستهدف
+        self.color_positions = {}  # {(r, g, b): (x, y)} موقع كل لون على الشاشة
+        self.color_indices = None  # رقم لون كل بكسل في palette، من process_image
+    
+    @property
+    def stop_drawing(self):
+        """هل طُلب إيقاف الرسم"""
+        return self._stop_event.is_set()
+    
+    @stop_drawing.setter
+    def stop_drawing(self, value):
+        if value:
+            self._stop_event.set()
+        else:
+            self._stop_event.clear()
         
+    def load_color_positions(self, settings_path):
+        """تحميل مواقع الألوان من ملف إعدادات الواجهة الرسومية (settings.json)
+        
+        تُستخدم الألوان المحفوظة كلوحة ألوان يُحوَّل إليها لون كل بكسل.
+        """
+        try:
+            with open(settings_path, 'r') as f:
+                settings = json.load(f)
+            
+            # الصيغة الحالية (قائمة أزواج [[r, g, b], [x, y]]) والقاموس القديم
+            self.color_positions = parse_color_positions(settings.get("color_positions") or [])
+            self.palette = list(self.color_positions)
+            if self.palette:
+                logger.info(f"تم تحميل مواقع {len(self.palette)} لون من: {settings_path}")
+            else:
+                logger.warning(f"لا توجد مواقع ألوان في {settings_path}، سيُرسم كل شيء باللون الحالي")
+            return True
+        except Exception as e:
+            logger.error(f"فشل تحميل مواقع الألوان: {e}")
+            return False
+    
     def load_image(self, image_path):
-        """تحميل صورة من مسار"""
+        """تحميل صورة من مسار
+        
+        يُؤجَّل فك الصورة إلى process_image، وتحتفظ صور RGB وRGBA بوضعها فلا
+        تُنسخ بالحجم الكامل إلى RGBA قبل تصغيرها.
+        """
         try:
             logger.info(f"تحميل الصورة من: {image_path}")
-            self.image = Image.open(image_path).convert("RGBA")
-            logger.info(f"تم تحميل الصورة: {self.image.width}x{self.image.height} بكسل")
+            image = Image.open(image_path)
+            self.source_size = image.size
+            
+            # عندما سيُصغَّر الرسم على أي حال يفك مفكك JPEG الصورة بحجم أصغر
+            # مباشرة بدل فكها كاملة ثم تصغيرها
+            if image.format == "JPEG" and self.resolution < 1.0:
+                width, height = self.source_size
+                image.draft("RGB", (max(1, int(width * self.resolution)), max(1, int(height * self.resolution))))
+            
+            # الأوضاع الأخرى (لوحة، رمادي، ...) تُحوَّل إلى RGBA إن كانت فيها شفافية
+            if image.mode not in ("RGB", "RGBA"):
+                has_alpha = "A" in image.getbands() or "transparency" in image.info
+                image = image.convert("RGBA" if has_alpha else "RGB")
+            
+            self.image = image
+            logger.info(f"تم تحميل الصورة: {self.source_size[0]}x{self.source_size[1]} بكسل")
             return True
         except Exception as e:
             logger.error(f"فشل تحميل الصورة: {e}")
@@ -62,45 +523,69 @@ class SimpleAutoDraw:
             return False
             
         try:
-            # نسخة من الصورة الأصلية
-            img = self.image.copy()
+            # الصورة الأصلية لا تُعدَّل (تغيير الحجم والتحويل يعيدان صورًا جديدة)
+            # فلا حاجة لنسخها
+            img = self.image
             
-            # تغيير الحجم حسب دقة الإخراج
+            # تغيير الحجم حسب دقة الإخراج، من حجم المصدر (قد تكون JPEG مفكوكة
+            # بحجم مصغر)
             if self.resolution != 1.0:
-                width, height = img.size
+                width, height = self.source_size or img.size
                 new_width = int(width * self.resolution)
                 new_height = int(height * self.resolution)
-                img = img.resize((new_width, new_height), Image.LANCZOS)
+                img = resize_image(img, (new_width, new_height))
                 logger.info(f"تغيير حجم الصورة إلى {new_width}x{new_height}")
             
+            # RGB أو RGBA فقط (load_image تحوّل الأوضاع الأخرى)
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA")
+            
+            width, height = img.size
+            pixels = np.asarray(img)
+            
+            # البكسلات المراد رسمها: غير الشفافة تمامًا، أو كلها بدون قناة ألفا
+            if img.mode == "RGBA":
+                draw_mask = pixels[..., 3] != 0
+            else:
+                draw_mask = np.ones((height, width), dtype=bool)
+            
             # معالجة البكسلات البيضاء
             if self.skip_white:
-                # التحويل لوضع RGBA إذا لم يكن كذلك بالفعل
-                if img.mode != "RGBA":
-                    img = img.convert("RGBA")
-                
-                pixel_data = img.load()
-                width, height = img.size
-                
-                # تحديد البكسلات البيضاء كشفافة
+                # تحديد البكسلات البيضاء لتخطيها
                 white_threshold = 240
-                white_count = 0
                 
-                for y in range(height):
-                    for x in range(width):
-                        r, g, b, a = pixel_data[x, y]
-                        # التحقق إذا كان البكسل أبيض أو قريب من الأبيض
-                        if r >= white_threshold and g >= white_threshold and b >= white_threshold:
-                            # جعل البكسل الأبيض شفافًا
-                            pixel_data[x, y] = (r, g, b, 0)
-                            white_count += 1
+                # البكسل أبيض أو قريب من الأبيض إذا بلغت أغمق قنواته الثلاث الحد.
+                # أغمق قناة تُحسب بمرورين لـ np.minimum (الثاني في المكان نفسه)
+                # ثم مقارنة واحدة، وهو أسرع كثيرًا من all على مقارنة كل قناة
+                darkest = np.minimum(pixels[..., 0], pixels[..., 1])
+                np.minimum(darkest, pixels[..., 2], out=darkest)
+                white_mask = darkest >= white_threshold
+                draw_mask &= ~white_mask
+                white_count = int(np.count_nonzero(white_mask))
                 
                 # إحصائيات
                 white_percentage = (white_count / (width * height)) * 100
                 logger.info(f"تم تحديد {white_count} بكسل أبيض كشفاف ({white_percentage:.1f}% من الصورة)")
             
-            # تخزين الصورة المعالجة
-            self.processed_image = img
+            # تخزين الصورة المعالجة بدون قناة ألفا - الشفافية محفوظة في قناع
+            # منفصل ببايت واحد لكل بكسل يقرؤه draw_image مباشرة
+            self.processed_image = img if img.mode == "RGB" else img.convert("RGB")
+            self.draw_mask = draw_mask
+            
+            # تحويل كل بكسل إلى أقرب لون في اللوحة (بدون تنقيط) ليُرسم كل لون
+            # دفعة واحدة بنقرة واحدة على موقعه
+            self.color_indices = None
+            if self.palette:
+                colors = [tuple(color[:3]) for color in self.palette[:256]]
+                flat = [channel for color in colors for channel in color]
+                # تُملأ بقية خانات اللوحة (256) بتكرار اللون الأول
+                palette_image = Image.new("P", (1, 1))
+                palette_image.putpalette(flat + flat[:3] * (256 - len(colors)))
+                quantized = self.processed_image.quantize(palette=palette_image, dither=Image.Dither.NONE)
+                color_indices = np.array(quantized)
+                color_indices[color_indices >= len(colors)] = 0
+                self.color_indices = color_indices
+                logger.info(f"تم تحويل الصورة إلى لوحة من {len(colors)} لون")
             logger.info("تم معالجة الصورة بنجاح")
             return True
             
@@ -121,16 +606,15 @@ class SimpleAutoDraw:
             
         logger.info("بدء عملية الرسم...")
         
-        # إعادة تعيين علامة التوقف
+        # إعادة تعيين علامة التوقف. مفتاح Esc يُفحص بـ esc_pressed أثناء الرسم،
+        # فيُتجاهل أي ضغط سبق بدء الرسم
         self.stop_drawing = False
-        
-        # تثبيت معالج مفتاح ESC
-        keyboard.on_press_key("esc", lambda _: self.stop_drawing_callback())
+        esc_pressed()
         
         try:
-            # الحصول على بيانات الصورة
-            img_data = np.array(self.processed_image)
-            height, width = img_data.shape[:2]
+            # الحصول على قناع البكسلات المراد رسمها
+            draw_mask = self.draw_mask
+            height, width = draw_mask.shape
             
             # إذا لم يتم تعيين منطقة الرسم، استخدم وسط الشاشة
             if not self.canvas_area:
@@ -147,72 +631,81 @@ class SimpleAutoDraw:
             pixel_width = (x2 - x1) / width
             pixel_height = (y2 - y1) / height
             
-            # تحسين pyautogui للسرعة
-            pyautogui.MINIMUM_DURATION = 0
-            pyautogui.MINIMUM_SLEEP = 0
-            pyautogui.PAUSE = 0
-            
             # التحضير للرسم
             pixels_drawn = 0
             skipped_pixels = 0
             start_time = time.time()
             
             # تجهيز قائمة البكسلات المراد رسمها مع تجاهل البكسلات الشفافة
-            pixels_to_draw = []
-            
             logger.info("تحليل البكسلات للرسم...")
             
-            for y in range(height):
-                for x in range(width):
-                    # التحقق من الشفافية (قناة ألفا)
-                    if len(img_data.shape) > 2 and img_data.shape[2] > 3:
-                        # هناك قناة ألفا
-                        alpha = img_data[y, x][3]
-                        if alpha == 0:  # شفاف تمامًا
-                            skipped_pixels += 1
-                            continue
-                    
-                    # حساب الموقع
-                    pos_x = x1 + (x * pixel_width) + (pixel_width / 2)
-                    pos_y = y1 + (y * pixel_height) + (pixel_height / 2)
-                    
-                    # إضافة البكسل للقائمة
-                    pixels_to_draw.append((pos_x, pos_y))
+            total_pixels = int(np.count_nonzero(draw_mask))
+            skipped_pixels = height * width - total_pixels
+            
+            # تجميع البكسلات حسب اللون: مجموعة لكل لون من اللوحة (ويُختار
+            # اللون مرة واحدة قبل خطوطه)، أو مجموعة واحدة باللون الحالي.
+            # الأقنعة تُحسب عند الطلب أثناء تجهيز خطوطها في iter_color_strokes
+            color_indices = self.color_indices
+            if color_indices is not None and color_indices.shape == draw_mask.shape:
+                color_list = np.unique(color_indices[draw_mask]).tolist()
+                color_masks = ((tuple(self.palette[color_index][:3]), draw_mask & (color_indices == color_index))
+                               for color_index in color_list)
+                color_count = len(color_list)
+            else:
+                color_masks = [(None, draw_mask)]
+                color_count = 1
             
-            total_pixels = len(pixels_to_draw)
-            logger.info(f"سيتم رسم {total_pixels} بكسل، تم تخطي {skipped_pixels} بكسل")
+            logger.info(f"سيتم رسم {total_pixels} بكسل بـ {color_count} لون، تم تخطي {skipped_pixels} بكسل")
             
             # التحرك لمنطقة الرسم
             pyautogui.moveTo(x1, y1)
             time.sleep(0.5)  # إعطاء وقت للتحرك
             
             # الرسم
-            for i, (pos_x, pos_y) in enumerate(pixels_to_draw):
-                # التحقق من طلب التوقف
-                if self.stop_drawing:
-                    logger.info("تم إيقاف الرسم بواسطة المستخدم")
-                    return True
+            next_report = 0
+            next_stop_check = 0
+            strokes_done = 0
+            for color, strokes_to_draw in iter_color_strokes(color_masks, x1, y1, pixel_width, pixel_height):
+                # اختيار اللون بالنقر على موقعه في لوحة التطبيق
+                if color is not None:
+                    position = self.color_positions.get(color)
+                    if position:
+                        click_at(*position)
+                        time.sleep(0.1)  # إعطاء التطبيق وقتًا لتغيير اللون
+                    else:
+                        logger.warning(f"لا يوجد موقع محفوظ للون {color}، سيُرسم باللون الحالي")
                 
-                # التحرك والنقر
-                pyautogui.moveTo(pos_x, pos_y, duration=0)
-                pyautogui.click()
-                
-                pixels_drawn += 1
-                
-                # تأخير بين البكسلات
-                if self.speed > 0:
-                    time.sleep(self.speed)
-                
-                # تسجيل التقدم
-                if i % 500 == 0 or i == total_pixels - 1:
-                    elapsed = time.time() - start_time
-                    pixels_per_second = pixels_drawn / elapsed if elapsed > 0 else 0
-                    percent = (pixels_drawn / total_pixels) * 100
-                    logger.info(f"التقدم: {pixels_drawn}/{total_pixels} بكسل ({percent:.1f}%) - {pixels_per_second:.1f} بكسل/ثانية")
+                for points, stroke_pixels in strokes_to_draw:
+                    # التحقق من طلب التوقف كل STOP_CHECK_PIXELS بكسل تقريبًا
+                    if pixels_drawn >= next_stop_check:
+                        next_stop_check = pixels_drawn + STOP_CHECK_PIXELS
+                        if not self._stop_event.is_set() and esc_pressed():
+                            self.stop_drawing_callback()
+                        if self._stop_event.is_set():
+                            logger.info("تم إيقاف الرسم بواسطة المستخدم")
+                            return True
+                    
+                    # خط متصل: سحب واحد عبر كل رؤوسه (أو نقرة لبكسل منفرد)
+                    draw_stroke(points)
+                    
+                    pixels_drawn += stroke_pixels
+                    strokes_done += 1
+                    
+                    # تأخير بين الخطوط
+                    if self.speed > 0:
+                        time.sleep(self.speed)
+                    
+                    # تسجيل التقدم كل 500 بكسل تقريبًا
+                    if pixels_drawn >= next_report or pixels_drawn == total_pixels:
+                        next_report = pixels_drawn + 500
+                        elapsed = time.time() - start_time
+                        pixels_per_second = pixels_drawn / elapsed if elapsed > 0 else 0
+                        percent = (pixels_drawn / total_pixels) * 100
+                        logger.info(f"التقدم: {pixels_drawn}/{total_pixels} بكسل ({percent:.1f}%) - {pixels_per_second:.1f} بكسل/ثانية")
             
             # إحصائيات النهاية
             elapsed = time.time() - start_time
-            logger.info(f"اكتمل الرسم: {pixels_drawn} بكسل في {elapsed:.1f} ثانية ({pixels_drawn/elapsed:.1f} بكسل/ثانية)")
+            logger.info(f"اكتمل الرسم: {pixels_drawn} بكسل ({strokes_done} خط) في {elapsed:.1f} ثانية ({pixels_drawn/elapsed:.1f} بكسل/ثانية)")
             return True
             
         except Exception as e:
@@ -220,10 +713,6 @@ class SimpleAutoDraw:
             import traceback
             logger.error(traceback.format_exc())
             return False
-            
-        finally:
-            # تنظيف
-            keyboard.unhook_all()
 
 def main():
     """الدالة الرئيسية للبرنامج"""
@@ -232,14 +721,22 @@ def main():
     parser.add_argument("--speed", "-s", type=float, default=0.001, help="سرعة الرسم (تأخير بالثواني)")
     parser.add_argument("--resolution", "-r", type=float, default=1.0, help="دقة الإخراج")
     parser.add_argument("--no-skip-white", action="store_true", help="عدم تخطي البكسلات البيضاء")
+    parser.add_argument("--settings", help="ملف إعدادات الواجهة الرسومية (settings.json) لقراءة مواقع الألوان منه")
     
     args = parser.parse_args()
     
+    # تجهيز الوحدات الثقيلة في الخلفية أثناء انتظار المستخدم
+    warm_up_thread = threading.Thread(target=warm_up, daemon=True)
+    warm_up_thread.start()
+    
     # إنشاء كائن الرسم
     app = SimpleAutoDraw()
     app.speed = args.speed
     app.resolution = args.resolution
     app.skip_white = not args.no_skip_white
+    if args.settings and not app.load_color_positions(args.settings):
+        print("\nتعذرت قراءة مواقع الألوان من ملف الإعدادات. راجع ملف السجل للمزيد من التفاصيل.")
+        return
     
     # عرض الإعدادات
     logger.info(f"الإعدادات:")
@@ -252,20 +749,19 @@ def main():
     if not image_path:
         image_path = input("أدخل مسار الصورة للرسم: ")
     
-    if not os.path.exists(image_path):
-        logger.error(f"الملف غير موجود: {image_path}")
-        return
-    
-    # تحميل الصورة
+    # تحميل الصورة (يفشل برسالة واضحة إذا لم يوجد الملف)
     if not app.load_image(image_path):
         logger.error("فشل تحميل الصورة")
         return
     
     # معالجة الصورة
+    # تجري المعالجة في الخلفية أثناء التأكيد والعد التنازلي، ولا تُنتظر
+    # نتيجتها إلا قبل الرسم مباشرة
     logger.info("جاري معالجة الصورة...")
-    if not app.process_image():
-        logger.error("فشل معالجة الصورة")
-        return
+    warm_up_thread.join()
+    executor = ThreadPoolExecutor(max_workers=1)
+    processing = executor.submit(app.process_image)
+    executor.shutdown(wait=False)
     
     # التأكيد قبل الرسم
     print("\n=== تنبيه مهم ===")
@@ -279,11 +775,30 @@ def main():
         logger.info("تم إلغاء الرسم بواسطة المستخدم")
         return
     
-    # عد تنازلي
-    print("\nالرسم سيبدأ خلال:")
-    for i in range(5, 0, -1):
-        print(f"{i}...")
-        time.sleep(1)
+    # عد تنازلي حتى موعد واحد، مع إمكانية الإلغاء بـ Esc في أي لحظة
+    print("\nالرسم سيبدأ خلال: (Esc للإلغاء)")
+    deadline = time.monotonic() + COUNTDOWN_SECONDS
+    shown = None
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        seconds = int(remaining) + 1
+        if seconds != shown:
+            print(f"{seconds}...")
+            shown = seconds
+        if esc_pressed():
+            logger.info("تم إلغاء الرسم بواسطة المستخدم أثناء العد التنازلي")
+            print("\nتم إلغاء الرسم.")
+            return
+        time.sleep(min(COUNTDOWN_POLL_INTERVAL, remaining))
+    
+    if not processing.done():
+        print("\nانتظار انتهاء معالجة الصورة...")
+    if not processing.result():
+        logger.error("فشل معالجة الصورة")
+        print("\nفشل معالجة الصورة. راجع ملف السجل للمزيد من التفاصيل.")
+        return
     
     print("\nبدء الرسم... اضغط ESC للإيقاف الفوري.")
     
@@ -300,14 +815,27 @@ def main():
         print("\nفشل الرسم. راجع ملف السجل للمزيد من التفاصيل.")
 
 if __name__ == "__main__":
+    # الرسائل عربية، وعند تحويل المخرجات إلى ملف أو أنبوب يكتب ويندوز بترميز
+    # النظام (مثل cp1252) فتفشل أول رسالة؛ لذا تُفرض UTF-8 (منذ Python 3.7)
+    for stream in (sys.stdout, sys.stderr):
+        if hasattr(stream, "reconfigure"):
+            stream.reconfigure(encoding="utf-8")
+    
+    exit_code = 0
     try:
         main()
     except KeyboardInterrupt:
         print("\nتم إيقاف البرنامج بواسطة المستخدم.")
+        exit_code = 130
     except Exception as e:
         logger.error(f"خطأ غير متوقع: {e}")
         import traceback
         logger.error(traceback.format_exc())
         print(f"\nحدث خطأ غير متوقع: {e}")
+        exit_code = 1
     
-    input("\nاضغط Enter للخروج...") 
\ No newline at end of file
+    # الانتظار قبل الإغلاق يفيد فقط عند التشغيل في نافذة طرفية (مثل النقر المزدوج)؛
+    # التشغيل من سكربت أو مهمة مجدولة لا يجد من يضغط Enter فينتظر للأبد
+    if sys.stdin and sys.stdin.isatty():
+        input("\nاضغط Enter للخروج...")
+    sys.exit(exit_code) 
\ No newline at end of file
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+أدوات مشتركة بين auto_draw.py وauto_draw_cli.py
+
+الاستيراد المؤجل للوحدات الثقيلة، وضبط PyAutoGUI، واكتشاف Pillow-SIMD،
+وأحداث الماوس المرسلة بـ SendInput وقراءة مفتاح Esc على Windows.
+لا تستورد هذه الوحدة Tk، فتبقى نسخة سطر الأوامر خفيفة.
+"""
+
+import ast
+import functools
+import hashlib
+import importlib
+import inspect
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+class LazyModule:
+    """Stand-in for a module that performs the real import on first use
+
+    Heavy dependencies (OpenCV, PIL, Tk, PyAutoGUI...) are only imported when
+    a code path actually touches them, so `--help` and the CLI start fast.
+    Required modules keep the old behaviour of exiting with an install hint
+    when missing; optional ones evaluate as False so `if cv2:` checks work.
+    """
+
+    def __init__(self, name, required=True, warning=None, on_load=None):
+        self._name = name
+        self._required = required
+        self._warning = warning
+        self._on_load = on_load
+        self._module = None
+        self._failed = False
+
+    def _load(self):
+        if self._module is None and not self._failed:
+            try:
+                module = importlib.import_module(self._name)
+            except ImportError as e:
+                if self._required:
+                    logger.critical(f"Failed to import required module: {e}")
+                    print(f"Error: Missing required dependency - {e}")
+                    print("Please install required packages using: pip install -r requirements.txt")
+                    sys.exit(1)
+                logger.warning(self._warning or f"Optional module {self._name} not found.")
+                self._failed = True
+                return None
+            if self._on_load:
+                self._on_load(module)
+            self._module = module
+        return self._module
+
+    def preload(self):
+        """Import the module ahead of use; return whether it is available
+
+        Unlike first use, a missing module is neither reported nor remembered
+        here, so a warm-up thread never exits or prints; the real first use
+        still handles it as usual.
+        """
+        if self._module is None and not self._failed:
+            try:
+                module = importlib.import_module(self._name)
+            except ImportError:
+                return False
+            if self._on_load:
+                self._on_load(module)
+            self._module = module
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        module = self._load()
+        if module is None:
+            raise AttributeError(f"Optional module '{self._name}' is not available")
+        return getattr(module, attr)
+
+    def __bool__(self):
+        return self._load() is not None
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+keyboard = LazyModule("keyboard")
+
+def configure_pyautogui(module):
+    """Apply global PyAutoGUI tuning as soon as it is imported"""
+    # Disable PyAutoGUI failsafe
+    module.FAILSAFE = False
+
+    # Optimize pyautogui for speed - the default PAUSE sleeps 0.1s after every call
+    module.MINIMUM_DURATION = 0
+    module.MINIMUM_SLEEP = 0
+    module.PAUSE = 0
+
+@functools.lru_cache(maxsize=None)
+def pillow_simd():
+    """Return whether PIL is the Pillow-SIMD fork, whose vectorised resampling needs no OpenCV hand-off"""
+    import PIL
+    # Pillow-SIMD releases are versioned as post-releases of Pillow (e.g. 9.0.0.post1)
+    simd = ".post" in PIL.__version__
+    if simd:
+        logger.info(f"Pillow-SIMD {PIL.__version__} detected")
+    else:
+        logger.info("Install Pillow-SIMD for faster image resizing: pip install pillow-simd")
+    return simd
+
+def check_pillow_simd(module):
+    """on_load hook for PIL.Image - detect Pillow-SIMD as soon as PIL is imported"""
+    pillow_simd()
+
+def parse_color_positions(saved):
+    """Return {(r, g, b): (x, y)} from the color_positions entry of settings.json
+
+    Reads the current list of [[r, g, b], [x, y]] pairs as well as the older
+    dict format, whose keys are "(r, g, b)" or "r,g,b" strings.
+    """
+    color_positions = {}
+    if isinstance(saved, list):
+        # Current format: list of [[r, g, b], [x, y]] pairs
+        for color, position in saved:
+            color_positions[tuple(color)] = tuple(position)
+    else:
+        # Older dict format with string keys
+        for key, value in saved.items():
+            # Handle both string format "(r,g,b)" and legacy format "r,g,b"
+            if key.startswith("(") and key.endswith(")"):
+                color = tuple(ast.literal_eval(key))
+            else:
+                r, g, b = map(int, key.split(","))
+                color = (r, g, b)
+
+            color_positions[color] = tuple(value)
+    return color_positions
+
+# Extension module built by compile_kernels.py
+AOT_KERNELS_MODULE = "_autodraw_kernels"
+
+def kernel_fingerprint(func):
+    """Return a 63-bit hash of func's source code
+
+    compile_kernels.py stores it next to each kernel as <name>_fingerprint,
+    so a build made from older kernel source can be told apart.
+    """
+    digest = hashlib.sha1(inspect.getsource(func).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little") >> 1
+
+def load_aot_kernel(name, func):
+    """Return kernel name from the compile_kernels.py build, or None
+
+    The build is ignored when it is missing or was compiled from a different
+    version of func, the Python source of the kernel.
+    """
+    try:
+        module = importlib.import_module(AOT_KERNELS_MODULE)
+    except ImportError:
+        return None
+    fingerprint = getattr(module, name + "_fingerprint", None)
+    if fingerprint is None or fingerprint() != kernel_fingerprint(func):
+        logger.warning(f"{AOT_KERNELS_MODULE} is out of date for {name}; rebuild it with compile_kernels.py")
+        return None
+    return getattr(module, name)
+
+# Direct Win32 input - one SendInput call submits a whole batch of mouse
+# events, and the Esc key state is read without a keyboard hook
+if sys.platform == 'win32':
+    import ctypes
+
+    user32 = ctypes.windll.user32
+
+    class MOUSEINPUT(ctypes.Structure):
+        _fields_ = [("dx", ctypes.c_long), ("dy", ctypes.c_long),
+                    ("mouseData", ctypes.c_ulong), ("dwFlags", ctypes.c_ulong),
+                    ("time", ctypes.c_ulong), ("dwExtraInfo", ctypes.c_size_t)]
+
+    class INPUT(ctypes.Structure):
+        # MOUSEINPUT is the largest member of the INPUT union, so it alone
+        # gives the struct the size SendInput expects
+        _fields_ = [("type", ctypes.c_ulong), ("mi", MOUSEINPUT)]
+
+    INPUT_MOUSE = 0
+    MOUSEEVENTF_MOVE = 0x0001
+    MOUSEEVENTF_LEFTDOWN = 0x0002
+    MOUSEEVENTF_LEFTUP = 0x0004
+    MOUSEEVENTF_ABSOLUTE = 0x8000
+    VK_ESCAPE = 0x1B
+
+    def mouse_input_buffer(size, flags=0):
+        """Preallocate size mouse INPUT structs sharing the given flags"""
+        buffer = (INPUT * size)()
+        for event in buffer:
+            event.type = INPUT_MOUSE
+            event.mi.dwFlags = flags
+        return buffer
+
+    def send_inputs(buffer, count):
+        """Submit the first count events of buffer in one SendInput call"""
+        user32.SendInput(count, buffer, ctypes.sizeof(INPUT))
+
+    def esc_pressed():
+        """Return whether Esc is held, or was pressed since the previous call
+
+        Reads the global key state, so it works whichever window has focus
+        without a system-wide keyboard hook and its listener thread.
+        """
+        return bool(user32.GetAsyncKeyState(VK_ESCAPE) & 0x8001)
+else:
+    def esc_pressed():
+        """Return whether Esc is held"""
+        return keyboard.is_pressed("esc")
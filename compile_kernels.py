@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+ترجمة نوى Numba مسبقًا (AOT) إلى وحدة _autodraw_kernels بجانب البرنامج
+
+عند وجود الوحدة يستخدمها auto_draw.py وauto_draw_cli.py مباشرة فلا يدفع
+التشغيل ثمن ترجمة JIT، وتعمل النوى حتى بدون تثبيت Numba. يلزم Numba ومترجم
+C وقت البناء فقط. النوى المتوازية (prange) لا تدعمها الترجمة المسبقة فتبقى JIT.
+إن تغيّر مصدر نواة بعد البناء تُتجاهل نسختها المترجمة حتى يُعاد تشغيل هذا الملف.
+"""
+
+import os
+import sys
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _HERE)
+
+try:
+    from numba.pycc import CC
+except ImportError:
+    print("Numba with numba.pycc is required to build the kernels: pip install numba")
+    sys.exit(1)
+
+import auto_draw
+import auto_draw_cli
+from auto_draw_common import AOT_KERNELS_MODULE, kernel_fingerprint
+
+cc = CC(AOT_KERNELS_MODULE)
+cc.output_dir = _HERE
+
+def export(name, signature, func):
+    """تصدير النواة func باسم name مع بصمة مصدرها
+
+    <name>_fingerprint تُرجع بصمة مصدر func وقت البناء، فيتجاهل البرنامج
+    النواة المترجمة إن تغيّر مصدرها بعد ذلك بدل استخدام نسخة قديمة.
+    """
+    cc.export(name, signature)(func)
+    fingerprint = kernel_fingerprint(func)
+    cc.export(name + "_fingerprint", "i8()")(lambda: fingerprint)
+
+# التوقيعات تطابق أنواع المصفوفات التي يمررها البرنامج لكل نواة
+export("drawable_pixels_kernel", "i8(u1[:, :], i8, i8[:])",
+       auto_draw.drawable_pixels_kernel.py_func)
+export("nearest_neighbour_kernel", "void(f4[:, :], f4, f4, b1[:], i4[:])",
+       auto_draw.nearest_neighbour_kernel.py_func)
+export("chain_runs_kernel",
+       "UniTuple(i8, 2)(i8[:], i8[:], i8[:], i8[:], b1[:], i8[:], i8[:], i8[:], i8[:])",
+       auto_draw_cli._chain_runs_numba)
+
+if __name__ == "__main__":
+    cc.compile()
+    print(f"Kernels compiled to {cc.output_dir}")
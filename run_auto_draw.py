@@ -11,8 +11,14 @@ import os
 import traceback
 import time
 
-# إضافة مجلد auto_draw لمسار البحث
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'auto_draw'))
+def wait_for_enter():
+    """انتظار Enter قبل الإغلاق ليقرأ المستخدم الرسائل
+    
+    فقط عند التشغيل في نافذة طرفية (مثل النقر المزدوج)؛ التشغيل من سكربت أو
+    مهمة مجدولة لا يجد من يضغط Enter فينتظر للأبد.
+    """
+    if sys.stdin and sys.stdin.isatty():
+        input("\nاضغط Enter للخروج...")
 
 def check_requirements():
     """التحقق من وجود المكتبات المطلوبة"""
@@ -69,7 +75,7 @@ if __name__ == "__main__":
             print(f"- {lib}")
         print("\nيرجى تثبيت المكتبات المطلوبة باستخدام الأمر:")
         print("pip install -r auto_draw/requirements.txt")
-        input("\nاضغط Enter للخروج...")
+        wait_for_enter()
         sys.exit(1)
     
     # محاولة تشغيل البرنامج
@@ -100,4 +106,5 @@ if __name__ == "__main__":
         print(f"- المسار: {os.getcwd()}")
         print(f"- مسارات البحث: {sys.path}")
         
-        input("\nاضغط Enter للخروج...") 
\ No newline at end of file
+        wait_for_enter()
+        sys.exit(1)
@@ -4,20 +4,55 @@ AutoDraw CLI Version - نسخة مبسطة تعمل من سطر الأوامر
 """
 
 import sys
-import os
+import argparse
+import cProfile
+import pstats
+import threading
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
-# إضافة مجلد auto_draw لمسار البحث
-sys.path.append(os.path.join(os.path.dirname(__file__), 'auto_draw'))
+# استيراد الفئة الرئيسية (auto_draw.py بجانب هذا الملف، ومجلده أول مسار
+# بحث عند تشغيله كسكربت)
+from auto_draw import AUTO_PALETTE_COLORS, AutoDraw, esc_pressed, warm_up
 
-# استيراد الفئة الرئيسية
-from auto_draw import AutoDraw
+# مدة العد التنازلي قبل الرسم، والفاصل بين فحوص مفتاح Esc خلاله (بالثواني)
+COUNTDOWN_SECONDS = 5
+COUNTDOWN_POLL_INTERVAL = 0.05
 
-def run_cli():
-    """تشغيل نسخة سطر الأوامر من البرنامج"""
-    print("=== AutoDraw CLI ===")
-    print("برنامج الرسم التلقائي - نسخة سطر الأوامر")
-    print("-" * 40)
+# ملفات cProfile المسجلة عند التشغيل بـ --profile، وNone بدونه
+PROFILES = None
+
+def profiled(func, *args):
+    """استدعاء func وتسجيل أدائه في PROFILES إذا كان التحليل مفعّلًا
+    
+    قبل Python 3.12 لا يسجل cProfile إلا الخيط الذي فُعّل فيه، فتُستدعى به
+    مهام الخيوط الخلفية أيضًا (التجهيز المسبق ومعالجة الصورة) لتظهر في
+    النتائج. منذ 3.12 يسجل أول ملف كل الخيوط ويُرفض تشغيل ملف ثانٍ معه.
+    """
+    if PROFILES is None or (PROFILES and sys.version_info >= (3, 12)):
+        return func(*args)
+    profiler = cProfile.Profile()
+    PROFILES.append(profiler)
+    return profiler.runcall(func, *args)
+
+def parse_arguments():
+    """قراءة خيارات سطر الأوامر"""
+    parser = argparse.ArgumentParser(description="AutoDraw CLI - نسخة مبسطة تعمل من سطر الأوامر")
+    parser.add_argument("--image", help="مسار الصورة للرسم (بدلًا من سؤال المستخدم)")
+    parser.add_argument("--profile", metavar="PSTATS",
+                        help="تحليل الأداء بـ cProfile وحفظ الإحصائيات في هذا الملف")
+    return parser.parse_args()
+
+def run_cli(image_path=None):
+    """تشغيل نسخة سطر الأوامر من البرنامج
+    
+    Args:
+        image_path: مسار الصورة للرسم؛ يُسأل المستخدم عنه إذا لم يُحدد
+    """
+    print("=== AutoDraw CLI ===\n"
+          "برنامج الرسم التلقائي - نسخة سطر الأوامر\n"
+          + "-" * 40)
     
     # إنشاء كائن من الفئة الرئيسية
     app = AutoDraw()
@@ -25,23 +60,26 @@ def run_cli():
     # تحميل الإعدادات الافتراضية
     app.load_settings()
     
-    # عرض الإعدادات الحالية
-    print(f"الإعدادات الحالية:")
-    print(f"- التطبيق المستهدف: {app.target_app}")
-    print(f"- أسلوب الرسم: {app.style}")
-    print(f"- الدقة: {app.resolution}")
-    print(f"- السرعة: {app.speed}")
-    print(f"- تخطي اللون الأبيض: {app.skip_white}")
-    print("-" * 40)
+    # عرض الإعدادات الحالية (كتابة واحدة للطرفية بدل سطر لكل إعداد، فطرفية
+    # ويندوز بطيئة في كل عملية كتابة)
+    print(f"الإعدادات الحالية:\n"
+          f"- التطبيق المستهدف: {app.target_app}\n"
+          f"- أسلوب الرسم: {app.style}\n"
+          f"- الدقة: {app.resolution}\n"
+          f"- السرعة: {app.speed}\n"
+          f"- تخطي اللون الأبيض: {app.skip_white}\n"
+          f"- عدد الألوان: {len(app.palette) if app.palette else f'حتى {AUTO_PALETTE_COLORS} (تلقائي)'}\n"
+          f"{'-' * 40}")
     
-    # سؤال المستخدم عن مسار الصورة
-    image_path = input("أدخل مسار الصورة للرسم: ")
+    # تجهيز الوحدات الثقيلة ونوى Numba في الخلفية أثناء انتظار المستخدم
+    warm_up_thread = threading.Thread(target=profiled, args=(warm_up,), daemon=True)
+    warm_up_thread.start()
     
-    if not os.path.exists(image_path):
-        print(f"خطأ: الملف {image_path} غير موجود!")
-        return
+    # سؤال المستخدم عن مسار الصورة إذا لم يُحدد
+    if not image_path:
+        image_path = input("أدخل مسار الصورة للرسم: ")
     
-    # تحميل الصورة
+    # تحميل الصورة (load_image تتحقق من وجود الملف بنفسها)
     print(f"جاري تحميل الصورة من {image_path}...")
     if not app.load_image(image_path):
         print("فشل في تحميل الصورة!")
@@ -49,31 +87,48 @@ def run_cli():
     
     print("تم تحميل الصورة بنجاح.")
     
-    # معالجة الصورة
+    # معالجة الصورة في الخلفية أثناء التأكيد والعد التنازلي، ولا تُنتظر
+    # نتيجتها إلا قبل الرسم مباشرة
     print("جاري معالجة الصورة...")
-    if not app.process_image():
-        print("فشل في معالجة الصورة!")
-        return
-    
-    print("تم معالجة الصورة بنجاح وهي جاهزة للرسم.")
+    warm_up_thread.join()
+    executor = ThreadPoolExecutor(max_workers=1)
+    processing = executor.submit(profiled, app.process_image_cached)
+    executor.shutdown(wait=False)
     
     # التأكيد قبل الرسم
-    print("\nتنبيه مهم:")
-    print("1. تأكد من فتح التطبيق المستهدف (مثل برنامج الرسام)")
-    print("2. حدد المنطقة التي تريد الرسم فيها")
-    print("3. اضغط ESC في أي وقت لإيقاف الرسم")
+    print("\nتنبيه مهم:\n"
+          "1. تأكد من فتح التطبيق المستهدف (مثل برنامج الرسام)\n"
+          "2. حدد المنطقة التي تريد الرسم فيها\n"
+          "3. اضغط ESC في أي وقت لإيقاف الرسم")
     
     confirm = input("\nهل تريد البدء بالرسم الآن؟ (y/n): ")
     if confirm.lower() != 'y':
         print("تم إلغاء عملية الرسم.")
         return
     
-    # عد تنازلي
-    print("الرسم سيبدأ خلال:")
-    for i in range(5, 0, -1):
-        print(f"{i}...")
-        import time
-        time.sleep(1)
+    # عد تنازلي حتى موعد واحد، مع إمكانية الإلغاء بـ Esc في أي لحظة
+    print("الرسم سيبدأ خلال: (Esc للإلغاء)")
+    deadline = time.monotonic() + COUNTDOWN_SECONDS
+    shown = None
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        seconds = int(remaining) + 1
+        if seconds != shown:
+            print(f"{seconds}...")
+            shown = seconds
+        if esc_pressed():
+            print("تم إلغاء عملية الرسم.")
+            return
+        time.sleep(min(COUNTDOWN_POLL_INTERVAL, remaining))
+    
+    if not processing.done():
+        print("انتظار انتهاء معالجة الصورة...")
+    if not processing.result():
+        print("فشل في معالجة الصورة!")
+        return
+    print("تم معالجة الصورة بنجاح وهي جاهزة للرسم.")
     
     # بدء الرسم
     print("جاري الرسم... اضغط ESC للإيقاف.")
@@ -86,12 +141,37 @@ def run_cli():
         print("حدث خطأ أثناء الرسم.")
 
 if __name__ == "__main__":
+    # الرسائل عربية، وعند تحويل المخرجات إلى ملف أو أنبوب يكتب ويندوز بترميز
+    # النظام (مثل cp1252) فتفشل أول رسالة؛ لذا تُفرض UTF-8 (منذ Python 3.7)
+    for stream in (sys.stdout, sys.stderr):
+        if hasattr(stream, "reconfigure"):
+            stream.reconfigure(encoding="utf-8")
+    
+    args = parse_arguments()
+    if args.profile:
+        PROFILES = []
+    
+    exit_code = 0
     try:
-        run_cli()
+        profiled(run_cli, args.image)
+    except KeyboardInterrupt:
+        # إيقاف من المستخدم (Ctrl+C) وليس خطأ: بدون تفاصيل الخطأ
+        print("\nتم إيقاف البرنامج بواسطة المستخدم.")
+        exit_code = 130
     except Exception as e:
         print("حدث خطأ أثناء تشغيل البرنامج:")
         print(str(e))
         print("\nتفاصيل الخطأ:")
         traceback.print_exc()
+        exit_code = 1
+    
+    # حفظ إحصائيات كل الخيوط في ملف واحد (يُقرأ بـ pstats أو snakeviz)
+    if PROFILES:
+        pstats.Stats(*PROFILES).dump_stats(args.profile)
+        print(f"تم حفظ إحصائيات الأداء في {args.profile}")
     
-    input("\nاضغط Enter للإغلاق...") 
\ No newline at end of file
+    # الانتظار قبل الإغلاق يفيد فقط عند التشغيل في نافذة طرفية (مثل النقر المزدوج)؛
+    # التشغيل من سكربت أو مهمة مجدولة لا يجد من يضغط Enter فينتظر للأبد
+    if sys.stdin and sys.stdin.isatty():
+        input("\nاضغط Enter للإغلاق...")
+    sys.exit(exit_code)